@@ -3,8 +3,10 @@ from flask import Flask, send_from_directory
 from flask_migrate import Migrate
 from flask_bcrypt import Bcrypt
 from flask_jwt_extended import JWTManager
+from werkzeug.middleware.proxy_fix import ProxyFix
 from config import DevelopmentConfig, TestingConfig, ProductionConfig
-from app.database import db
+from app.database import db, configure_engine
+from app import audit, catalogue, encoding, hashing, mail_utils, throttle
 
 # Initialize Flask extensions
 bcrypt = Bcrypt()
@@ -31,6 +33,11 @@ def create_app(test_config=None):
     else: 
         app.config.from_object(ProductionConfig)
     
+    # Take the client address from the proxies' headers, so the login throttle keys on it
+    if app.config.get('TRUSTED_PROXIES'):
+        proxies = app.config['TRUSTED_PROXIES']
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=proxies, x_proto=proxies)
+
     # Ensure the instance folder exists
     try:
         os.makedirs(app.instance_path)
@@ -40,8 +47,15 @@ def create_app(test_config=None):
     # Initialize Flask extensions with the app
     bcrypt.init_app(app)
     jwt.init_app(app)
+    configure_engine(app)  # One pooled engine per app, shared by every session
     db.init_app(app)
     migrate.init_app(app, db)
+    hashing.init_app(app)  # Bounded bcrypt worker pool
+    throttle.init_app(app)  # Login brute-force throttle
+    mail_utils.init_app(app)  # Cached, asynchronous email validation
+    catalogue.init_app(app)  # Versioned cache of movie listings
+    encoding.init_app(app)  # orjson-backed jsonify when available
+    audit.init_app(app)  # Wakes movie log feed listeners on commit
     
     with app.app_context():
         # Import and register your blueprints, routes, and other application components here
@@ -58,6 +72,17 @@ def create_app(test_config=None):
         init_app(app)
         # Initialize the database
         init_db() 
+
+        from app import principals, revocation, search, suggest
+        from app.database import get_db
+
+        search.init_app(app)  # Full-text index for movie search
+        suggest.init_app(app, get_db())  # In-memory typeahead index
+
+        # Load revoked tokens into memory so token checks skip the database
+        revocation.init_app(app)
+        revocation.preload(app, get_db())
+        principals.init_app(app)
     
         # For testing purposes
         @app.route('/hello')
@@ -0,0 +1,342 @@
+import collections
+import datetime
+import gzip
+import heapq
+import json
+import os
+import re
+from flask import current_app
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app.audit import LOG_COLUMNS, LOG_FIELDS, encode_log_cursor, decode_log_cursor, page_statement, serialize_log
+from app.models import MovieLogRollup, MoviesLog
+
+ARCHIVE_FILE = 'movies_logs-{month}.jsonl.gz'
+ARCHIVE_FILE_PATTERN = re.compile(r'^movies_logs-(\d{4}-\d{2})\.jsonl\.gz$')
+ROLLUP_COLUMNS = {'ADDED': 'added', 'UPDATED': 'updated', 'DELETED': 'deleted'}
+
+# Archived log entry, with the attributes of a row of LOG_COLUMNS
+ArchivedLog = collections.namedtuple('ArchivedLog', LOG_FIELDS)
+
+def archive_dir(app=None):
+    """
+    Returns the directory of the movie log archive.
+
+    Args:
+        app (optional): The Flask application object. Defaults to the current application.
+
+    Returns:
+        str: ``MOVIE_LOG_ARCHIVE_DIR``, or ``movie_log_archive`` in the instance folder.
+    """
+    app = app or current_app
+    return app.config.get('MOVIE_LOG_ARCHIVE_DIR') or os.path.join(app.instance_path, 'movie_log_archive')
+
+def archive_path(directory, month):
+    """
+    Returns the archive file of a month.
+
+    Args:
+        directory (str): The archive directory.
+        month (str): The month, as ``YYYY-MM``.
+
+    Returns:
+        str: The path of the gzipped JSON Lines file.
+    """
+    return os.path.join(directory, ARCHIVE_FILE.format(month=month))
+
+def archived_months(directory):
+    """
+    Lists the months present in the archive.
+
+    Args:
+        directory (str): The archive directory.
+
+    Returns:
+        list: The months, as ``YYYY-MM``, oldest first.
+    """
+    if not os.path.isdir(directory):
+        return []
+    return sorted(match.group(1) for match in map(ARCHIVE_FILE_PATTERN.match, os.listdir(directory)) if match)
+
+def month_bounds(month):
+    """
+    Returns the first moment of a month and of the next one.
+    """
+    start = datetime.datetime.strptime(month, '%Y-%m')
+    return start, (start + datetime.timedelta(days=32)).replace(day=1)
+
+def _log_key(row):
+    return row.timestamp, row.id
+
+def _encode_log(row):
+    entry = {field: getattr(row, field) for field in LOG_FIELDS}
+    entry['timestamp'] = row.timestamp.isoformat()
+    return json.dumps(entry, separators=(',', ':')).encode('utf-8') + b'\n'
+
+def _read_file(path):
+    with gzip.open(path, 'rt', encoding='utf-8') as archive:
+        for line in archive:
+            entry = json.loads(line)
+            entry['timestamp'] = datetime.datetime.fromisoformat(entry['timestamp'])
+            yield ArchivedLog(**entry)
+
+# Size and last (timestamp, id) of the archive files this process has read or written
+_last_keys = {}
+
+def _last_key(path):
+    if not os.path.exists(path):
+        return None
+    size = os.path.getsize(path)
+    cached = _last_keys.get(path)
+    if cached is not None and cached[0] == size:
+        return cached[1]
+    last = None
+    for entry in _read_file(path):
+        last = _log_key(entry)
+    _last_keys[path] = (size, last)
+    return last
+
+def _rewrite_month(path, rows):
+    """
+    Merges sorted rows into an archive file, dropping repeats, and replaces it atomically.
+    """
+    temporary = path + '.tmp'
+    with open(temporary, 'wb') as file:
+        with gzip.GzipFile(fileobj=file, mode='wb') as archive:
+            last = None
+            for row in heapq.merge(_read_file(path), rows, key=_log_key):
+                if _log_key(row) != last:
+                    archive.write(_encode_log(row))
+                    last = _log_key(row)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary, path)
+
+def write_archive(directory, rows):
+    """
+    Adds log rows to the archive file of their month.
+
+    Each month file holds its entries once, in ``(timestamp, id)`` order, so readers can
+    stream it. Rows newer than everything in the file, as from every run of
+    :func:`archive_logs`, are appended as one gzip member, which readers see as a single
+    stream. Older or repeated rows, as left by a run interrupted before deleting its
+    batch, are merged in by rewriting the file. The files are synced to disk before
+    returning, so the rows can then be deleted.
+
+    Args:
+        directory (str): The archive directory.
+        rows (list): Rows of :data:`app.audit.LOG_COLUMNS`.
+
+    Returns:
+        list: The months written to.
+    """
+    by_month = collections.defaultdict(list)
+    for row in rows:
+        by_month[row.timestamp.strftime('%Y-%m')].append(row)
+    os.makedirs(directory, exist_ok=True)
+    for month, month_rows in by_month.items():
+        month_rows.sort(key=_log_key)
+        path = archive_path(directory, month)
+        last = _last_key(path)
+        if last is None or _log_key(month_rows[0]) > last:
+            with open(path, 'ab') as file:
+                with gzip.GzipFile(fileobj=file, mode='ab') as archive:
+                    for row in month_rows:
+                        archive.write(_encode_log(row))
+                file.flush()
+                os.fsync(file.fileno())
+        else:
+            _rewrite_month(path, month_rows)
+        last = _log_key(month_rows[-1]) if last is None else max(last, _log_key(month_rows[-1]))
+        _last_keys[path] = (os.path.getsize(path), last)
+    return sorted(by_month)
+
+def apply_rollups(connection, rows):
+    """
+    Adds log rows to the daily counts of their movies.
+
+    Args:
+        connection: The connection of the transaction deleting the rows.
+        rows (list): Rows of :data:`app.audit.LOG_COLUMNS`.
+
+    Returns:
+        None
+    """
+    counts = collections.defaultdict(collections.Counter)
+    for row in rows:
+        if row.movie_id is not None and row.action in ROLLUP_COLUMNS:
+            counts[row.timestamp.date(), row.movie_id][ROLLUP_COLUMNS[row.action]] += 1
+    if not counts:
+        return
+    table = MovieLogRollup.__table__
+    statement = sqlite_insert(table)
+    statement = statement.on_conflict_do_update(
+        index_elements=['day', 'movie_id'],
+        set_={column: table.c[column] + statement.excluded[column] for column in ROLLUP_COLUMNS.values()}
+    )
+    connection.execute(statement, [
+        {'day': day, 'movie_id': movie_id, **{column: count[column] for column in ROLLUP_COLUMNS.values()}}
+        for (day, movie_id), count in counts.items()
+    ])
+
+def archive_logs(db_session, directory, before, batch_size=1000):
+    """
+    Moves the movie logs older than ``before`` to the archive, oldest first.
+
+    Each batch is appended to the monthly archive files, added to the daily rollups and
+    deleted from ``movies_logs`` in its own short transaction, so the write lock is never
+    held for long. A crash after a batch is written but before it is deleted leaves the
+    batch in both places; it is archived again on the next run, which merges the repeated
+    entries away, see :func:`write_archive`.
+
+    Args:
+        db_session: The database session.
+        directory (str): The archive directory.
+        before (datetime): The naive UTC cut-off time.
+        batch_size (int, optional): The number of logs moved per transaction. Defaults to 1000.
+
+    Returns:
+        int: The number of archived logs.
+    """
+    statement = (select(*LOG_COLUMNS).where(MoviesLog.timestamp < before)
+                 .order_by(MoviesLog.timestamp, MoviesLog.id).limit(batch_size))
+    total = 0
+    while True:
+        rows = db_session.execute(statement).all()
+        if not rows:
+            break
+        write_archive(directory, rows)
+        apply_rollups(db_session.connection(), rows)
+        db_session.execute(delete(MoviesLog).where(MoviesLog.id.in_([row.id for row in rows])))
+        db_session.commit()
+        total += len(rows)
+    return total
+
+def iter_month(directory, month):
+    """
+    Streams the archived logs of a month.
+
+    Args:
+        directory (str): The archive directory.
+        month (str): The month, as ``YYYY-MM``.
+
+    Returns:
+        generator: The entries as :class:`ArchivedLog`, ordered by timestamp and id.
+    """
+    last = None
+    for entry in _read_file(archive_path(directory, month)):
+        key = _log_key(entry)
+        if last is None or key > last:  # Skips a repeat left by an interrupted append
+            last = key
+            yield entry
+
+def read_month(directory, month):
+    """
+    Reads the archived logs of a month.
+
+    Args:
+        directory (str): The archive directory.
+        month (str): The month, as ``YYYY-MM``.
+
+    Returns:
+        list: The entries as :class:`ArchivedLog`, ordered by timestamp and id.
+    """
+    return list(iter_month(directory, month))
+
+def read_archive(directory, filters, order='asc', position=None, limit=None):
+    """
+    Yields the archived movie logs matching the filters.
+
+    Only the files of months that can hold matching entries are read, one at a time and
+    as a stream. Ascending reads stop as soon as the caller stops iterating; descending
+    reads go through each month once, keeping only the last ``limit`` matches.
+
+    Args:
+        directory (str): The archive directory.
+        filters (dict): The filters, see :func:`app.audit.parse_log_filters`.
+        order (str, optional): 'asc' for the oldest entries first, or 'desc'. Defaults to 'asc'.
+        position (tuple, optional): The timestamp and id of the last entry already listed.
+        limit (int, optional): The most entries the caller will take. Defaults to all of them.
+
+    Returns:
+        generator: The entries as :class:`ArchivedLog`, in ``(timestamp, id)`` order.
+    """
+    actions, movie_id = set(filters.get('actions') or ()), filters.get('movie_id')
+    since, until = filters.get('since'), filters.get('until')
+    ascending = order == 'asc'
+
+    def matching(month):
+        for entry in iter_month(directory, month):
+            key = (entry.timestamp, entry.id)
+            if (until is not None and entry.timestamp >= until) or \
+                    (position is not None and not ascending and key >= position):
+                return  # Every later entry of the month is out of range too
+            if position is not None and ascending and key <= position:
+                continue
+            if actions and entry.action not in actions:
+                continue
+            if movie_id is not None and entry.movie_id != movie_id:
+                continue
+            if since is not None and entry.timestamp < since:
+                continue
+            yield entry
+
+    remaining = limit
+    for month in sorted(archived_months(directory), reverse=not ascending):
+        if remaining is not None and remaining <= 0:
+            return
+        start, end = month_bounds(month)
+        if (since is not None and end <= since) or (until is not None and start >= until):
+            continue
+        if position is not None and (end <= position[0] if ascending else start > position[0]):
+            continue
+        if ascending:
+            entries = matching(month)
+        else:
+            entries = reversed(collections.deque(matching(month), maxlen=remaining))
+        for entry in entries:
+            yield entry
+            if remaining is not None:
+                remaining -= 1
+                if remaining <= 0:
+                    return
+
+def history_page(db_session, directory, filters, order='desc', cursor=None, limit=100):
+    """
+    Returns one page of movie logs from both the archive and ``movies_logs``.
+
+    Archived logs are older than the logs still in the table, so pages run through the
+    archive and then the table when ascending, and the other way round when descending.
+    Cursors are those of :func:`app.audit.logs_page`.
+
+    Args:
+        db_session: The database session.
+        directory (str): The archive directory.
+        filters (dict): The filters, see :func:`app.audit.parse_log_filters`.
+        order (str, optional): 'desc' for the newest entries first, or 'asc'. Defaults to 'desc'.
+        cursor (str, optional): The cursor of the previous page, or None for the first page.
+        limit (int, optional): The number of entries per page. Defaults to 100.
+
+    Returns:
+        dict: ``logs`` and ``next_cursor``, which is None on the last page.
+
+    Raises:
+        InvalidLogQuery: If the cursor is malformed.
+    """
+    position = decode_log_cursor(cursor, order) if cursor else None
+
+    def archived(wanted):
+        return list(read_archive(directory, filters, order, position, limit=wanted))
+
+    def current(wanted):
+        return db_session.execute(page_statement(filters, order, position).limit(wanted)).all()
+
+    rows = []
+    for source in ((archived, current) if order == 'asc' else (current, archived)):
+        if len(rows) > limit:
+            break
+        rows.extend(source(limit + 1 - len(rows)))
+    return {
+        'logs': [serialize_log(row) for row in rows[:limit]],
+        'next_cursor': encode_log_cursor(order, rows[limit - 1]) if len(rows) > limit else None
+    }
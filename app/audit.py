@@ -0,0 +1,430 @@
+import base64
+import binascii
+import csv
+import datetime
+import io
+import itertools
+import json
+import threading
+import time
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect, insert, select, tuple_
+from sqlalchemy.orm import Session
+from app.models import Movie, MoviesLog
+
+ACTIONS = ('ADDED', 'UPDATED', 'DELETED')
+LOG_COLUMNS = (MoviesLog.id, MoviesLog.movie_id, MoviesLog.movie_name, MoviesLog.action, MoviesLog.timestamp)
+LOG_FIELDS = ('id', 'movie_id', 'movie_name', 'action', 'timestamp')
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+class InvalidLogQuery(ValueError):
+    """
+    Raised when the parameters of a movie log query are malformed.
+    """
+
+def audit_rows(session):
+    """
+    Builds the MoviesLog rows for the movies about to be written by a flush.
+
+    Args:
+        session: The flushing session.
+
+    Returns:
+        list: One row per added, changed or deleted movie.
+    """
+    rows = []
+    for movie in session.new:
+        if isinstance(movie, Movie):
+            rows.append({'movie_id': movie.id, 'movie_name': movie.name, 'action': 'ADDED'})
+    for movie in session.dirty:
+        if isinstance(movie, Movie) and session.is_modified(movie):
+            rows.append({'movie_id': movie.id, 'movie_name': movie.name, 'action': 'UPDATED'})
+    for movie in session.deleted:
+        if isinstance(movie, Movie):
+            # Read what is loaded; an expired attribute cannot be refreshed from a deleted row
+            rows.append({'movie_id': movie.id, 'movie_name': inspect(movie).dict.get('name'), 'action': 'DELETED'})
+    return rows
+
+@event.listens_for(Session, 'after_flush')
+def _log_movie_writes(session, flush_context):
+    """
+    Writes a MoviesLog row for every movie added, changed or deleted through the ORM.
+
+    The rows are inserted with one statement in the transaction of the write itself, so
+    the log commits or rolls back together with the data.
+    """
+    rows = audit_rows(session)
+    if rows:
+        session.connection().execute(insert(MoviesLog), rows)
+        session.info['movie_logs_written'] = True
+
+@event.listens_for(Session, 'after_commit')
+def _notify_log_feed(session):
+    """
+    Wakes this worker's feed listeners once new log rows are committed.
+    """
+    if session.info.pop('movie_logs_written', False):
+        feed = get_log_feed()
+        if feed is not None:
+            feed.notify()
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_rolled_back_logs(session):
+    session.info.pop('movie_logs_written', None)
+
+class LogFeed:
+    """
+    In-process notification of committed movie log rows.
+
+    Listeners remember :attr:`generation`, read the log, and then :meth:`wait` for the
+    generation to move on, so a commit between the read and the wait is never missed.
+    Only commits made by this worker notify; listeners also wake every poll interval to
+    pick up rows written by other workers.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self.generation = 0
+
+    def notify(self):
+        """
+        Signals that new log rows were committed.
+        """
+        with self._condition:
+            self.generation += 1
+            self._condition.notify_all()
+
+    def wait(self, generation, timeout):
+        """
+        Waits until a commit after ``generation`` or until the timeout.
+
+        Args:
+            generation (int): The generation read before the last look at the log.
+            timeout (float): The longest wait, in seconds.
+
+        Returns:
+            bool: True if new rows were committed by this worker.
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: self.generation != generation, timeout)
+
+def init_app(app):
+    """
+    Creates the movie log feed for the application.
+
+    Args:
+        app: The Flask application object.
+
+    Returns:
+        LogFeed: The feed.
+    """
+    feed = LogFeed()
+    app.extensions['movie_log_feed'] = feed
+    return feed
+
+def get_log_feed():
+    """
+    Returns the movie log feed of the current application, if there is one.
+
+    :return: The feed or None.
+    """
+    if not has_app_context():
+        return None
+    return current_app.extensions.get('movie_log_feed')
+
+def serialize_log(row):
+    """
+    Serializes a movie log row.
+
+    Args:
+        row: A row of :data:`LOG_COLUMNS`, or a MoviesLog.
+
+    Returns:
+        dict: The log entry, with the timestamp to the second.
+    """
+    return {
+        'id': row.id,
+        'movie_id': row.movie_id,
+        'movie_name': row.movie_name,
+        'action': row.action,
+        'timestamp': row.timestamp.strftime(TIMESTAMP_FORMAT) if row.timestamp else None
+    }
+
+def parse_time(value, name):
+    """
+    Parses an ISO 8601 time given as a query parameter.
+
+    Args:
+        value (str): The time, e.g. ``2023-10-01`` or ``2023-10-01T12:00:00Z``.
+        name (str): The parameter name, for the error message.
+
+    Returns:
+        datetime: The naive UTC time.
+
+    Raises:
+        InvalidLogQuery: If the value is not an ISO 8601 time.
+    """
+    try:
+        moment = datetime.datetime.fromisoformat(value)
+    except ValueError as e:
+        raise InvalidLogQuery(f'{name} must be an ISO 8601 time') from e
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return moment
+
+def parse_log_filters(args):
+    """
+    Reads the movie log filters from the query string.
+
+    Args:
+        args: The request arguments: ``action`` (repeated or comma-separated), ``movie_id``,
+            ``since`` (inclusive) and ``until`` (exclusive).
+
+    Returns:
+        dict: The filters, see :func:`filter_logs`.
+
+    Raises:
+        InvalidLogQuery: If a filter is malformed.
+    """
+    actions = [action.strip().upper() for value in args.getlist('action') for action in value.split(',')
+               if action.strip()]
+    unknown = set(actions) - set(ACTIONS)
+    if unknown:
+        raise InvalidLogQuery(f"Unknown actions: {', '.join(sorted(unknown))}")
+    movie_id = args.get('movie_id')
+    if movie_id is not None:
+        try:
+            movie_id = int(movie_id)
+        except ValueError as e:
+            raise InvalidLogQuery('movie_id must be an integer') from e
+    since = parse_time(args['since'], 'since') if args.get('since') else None
+    until = parse_time(args['until'], 'until') if args.get('until') else None
+    return {'actions': actions, 'movie_id': movie_id, 'since': since, 'until': until}
+
+def filter_logs(statement, actions=(), movie_id=None, since=None, until=None):
+    """
+    Applies movie log filters to a SELECT.
+
+    Args:
+        statement: The SELECT on ``movies_logs``.
+        actions (list, optional): Only keep these actions.
+        movie_id (int, optional): Only keep the entries of this movie.
+        since (datetime, optional): Only keep entries at or after this naive UTC time.
+        until (datetime, optional): Only keep entries before this naive UTC time.
+
+    Returns:
+        The filtered SELECT.
+    """
+    if actions:
+        statement = statement.where(MoviesLog.action.in_(actions))
+    if movie_id is not None:
+        statement = statement.where(MoviesLog.movie_id == movie_id)
+    if since is not None:
+        statement = statement.where(MoviesLog.timestamp >= since)
+    if until is not None:
+        statement = statement.where(MoviesLog.timestamp < until)
+    return statement
+
+def encode_log_cursor(order, row):
+    """
+    Encodes the position after ``row`` as an opaque cursor.
+
+    Args:
+        order (str): The order of the listing, 'asc' or 'desc'.
+        row: The last log row of the current page.
+
+    Returns:
+        str: A URL-safe cursor.
+    """
+    position = [order, row.timestamp.isoformat(), row.id]
+    return base64.urlsafe_b64encode(json.dumps(position, separators=(',', ':')).encode('utf-8')).decode('ascii')
+
+def decode_log_cursor(cursor, order):
+    """
+    Decodes a cursor made by :func:`encode_log_cursor`.
+
+    Args:
+        cursor (str): The cursor sent by the client.
+        order (str): The order of the request.
+
+    Returns:
+        tuple: The timestamp and id of the last entry of the previous page.
+
+    Raises:
+        InvalidLogQuery: If the cursor is malformed or was made for the other order.
+    """
+    try:
+        cursor_order, timestamp, log_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        timestamp, log_id = datetime.datetime.fromisoformat(timestamp), int(log_id)
+    except (binascii.Error, UnicodeError, TypeError, ValueError) as e:
+        raise InvalidLogQuery('Invalid cursor') from e
+    if cursor_order != order:
+        raise InvalidLogQuery('Cursor does not match the order')
+    return timestamp, log_id
+
+def page_statement(filters, order='desc', position=None):
+    """
+    Builds the SELECT of the movie logs after a page position.
+
+    Args:
+        filters (dict): The filters, see :func:`parse_log_filters`.
+        order (str, optional): 'desc' or 'asc'. Defaults to 'desc'.
+        position (tuple, optional): The timestamp and id of the last entry already listed.
+
+    Returns:
+        The ordered SELECT of :data:`LOG_COLUMNS`, without a limit.
+    """
+    statement = filter_logs(select(*LOG_COLUMNS), **filters)
+    if position is not None:
+        after = tuple_(*position)
+        key = tuple_(MoviesLog.timestamp, MoviesLog.id)
+        statement = statement.where(key > after if order == 'asc' else key < after)
+    if order == 'asc':
+        return statement.order_by(MoviesLog.timestamp.asc(), MoviesLog.id.asc())
+    return statement.order_by(MoviesLog.timestamp.desc(), MoviesLog.id.desc())
+
+def logs_page(db_session, filters, order='desc', cursor=None, limit=100):
+    """
+    Returns one keyset-paginated page of movie logs.
+
+    Entries are ordered by ``(timestamp, id)``, which the log indexes cover alone and
+    after an action or movie filter, so every page is an index seek.
+
+    Args:
+        db_session: The database session.
+        filters (dict): The filters, see :func:`parse_log_filters`.
+        order (str, optional): 'desc' for the newest entries first, or 'asc'. Defaults to 'desc'.
+        cursor (str, optional): The cursor of the previous page, or None for the first page.
+        limit (int, optional): The number of entries per page. Defaults to 100.
+
+    Returns:
+        dict: ``logs`` and ``next_cursor``, which is None on the last page.
+
+    Raises:
+        InvalidLogQuery: If the cursor is malformed.
+    """
+    position = decode_log_cursor(cursor, order) if cursor else None
+    statement = page_statement(filters, order, position)
+    rows = db_session.execute(statement.limit(limit + 1)).all()
+    return {
+        'logs': [serialize_log(row) for row in rows[:limit]],
+        'next_cursor': encode_log_cursor(order, rows[limit - 1]) if len(rows) > limit else None
+    }
+
+def export_logs(db_session, filters, file_format, dumps=json.dumps, chunk_size=1000, archived=()):
+    """
+    Streams every matching movie log, oldest first, as NDJSON or CSV.
+
+    Rows are read from a server-side cursor ``chunk_size`` at a time and written out
+    as they arrive, so memory use does not grow with the size of the log.
+
+    Args:
+        db_session: The database session.
+        filters (dict): The filters, see :func:`parse_log_filters`.
+        file_format (str): 'ndjson' or 'csv'.
+        dumps (callable, optional): The JSON encoder for NDJSON lines. Defaults to :func:`json.dumps`.
+        chunk_size (int, optional): The number of rows fetched and written at a time. Defaults to 1000.
+        archived (iterable, optional): Archived log rows, oldest first, written before the
+            rows of the table, see :func:`app.archive.read_archive`.
+
+    Returns:
+        generator: Chunks of the document, as strings.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if file_format == 'csv':
+        writer.writerow(LOG_FIELDS)
+    archived = iter(archived)
+    chunks = iter(lambda: list(itertools.islice(archived, chunk_size)), [])
+    statement = filter_logs(select(*LOG_COLUMNS), **filters).order_by(MoviesLog.timestamp, MoviesLog.id)
+    result = db_session.execute(statement.execution_options(yield_per=chunk_size))
+    for rows in itertools.chain(chunks, result.partitions()):
+        for row in rows:
+            entry = serialize_log(row)
+            if file_format == 'csv':
+                writer.writerow([entry[field] for field in LOG_FIELDS])
+            else:
+                buffer.write(dumps(entry))
+                buffer.write('\n')
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+def latest_log_id(db_session):
+    """
+    Returns the id of the newest movie log, or 0 when there is none.
+    """
+    return db_session.execute(select(MoviesLog.id).order_by(MoviesLog.id.desc()).limit(1)).scalar() or 0
+
+def wait_for_logs(db_session, since_id, limit=100, timeout=0.0, poll_interval=1.0, clock=time.monotonic):
+    """
+    Returns the movie logs written after ``since_id``, waiting up to ``timeout`` for some.
+
+    The read transaction is ended after every look at the log, so later looks see rows
+    committed meanwhile by any worker.
+
+    Args:
+        db_session: The database session.
+        since_id (int): The id of the last log the caller has.
+        limit (int, optional): The most rows to return. Defaults to 100.
+        timeout (float, optional): The longest wait, in seconds. Defaults to 0.
+        poll_interval (float, optional): The longest time between looks at the log, which
+            bounds the delay for rows written by other workers. Defaults to 1.0.
+        clock (callable, optional): The monotonic clock.
+
+    Returns:
+        list: Rows of :data:`LOG_COLUMNS` in id order, empty if the wait timed out.
+    """
+    feed = get_log_feed()
+    deadline = clock() + timeout
+    statement = select(*LOG_COLUMNS).where(MoviesLog.id > since_id).order_by(MoviesLog.id).limit(limit)
+    while True:
+        generation = feed.generation if feed is not None else None
+        rows = db_session.execute(statement).all()
+        db_session.rollback()  # Let the next look see rows committed meanwhile
+        remaining = deadline - clock()
+        if rows or remaining <= 0:
+            return rows
+        if feed is not None:
+            feed.wait(generation, min(poll_interval, remaining))
+        else:
+            time.sleep(min(poll_interval, remaining))
+
+def log_events(db_session, since_id, duration, keepalive, limit=100, poll_interval=1.0, dumps=json.dumps,
+               clock=time.monotonic):
+    """
+    Streams new movie logs as Server-Sent Events.
+
+    Each log is a ``log`` event whose id is the log id, so a reconnecting EventSource
+    resumes from its ``Last-Event-ID``. A comment is sent when no log arrived for
+    ``keepalive`` seconds, and the stream ends after ``duration`` seconds, after which
+    clients reconnect.
+
+    Args:
+        db_session: The database session.
+        since_id (int): The id of the last log the client has.
+        duration (float): The lifetime of the stream, in seconds.
+        keepalive (float): The longest silence, in seconds.
+        limit (int, optional): The most logs read at a time. Defaults to 100.
+        poll_interval (float, optional): See :func:`wait_for_logs`. Defaults to 1.0.
+        dumps (callable, optional): The JSON encoder. Defaults to :func:`json.dumps`.
+        clock (callable, optional): The monotonic clock.
+
+    Returns:
+        generator: The event stream, as strings.
+    """
+    deadline = clock() + duration
+    yield 'retry: 2000\n\n'
+    while True:
+        remaining = deadline - clock()
+        if remaining <= 0:
+            return
+        rows = wait_for_logs(db_session, since_id, limit, min(keepalive, remaining), poll_interval, clock)
+        if not rows:
+            yield ': keep-alive\n\n'
+            continue
+        for row in rows:
+            yield f'id: {row.id}\nevent: log\ndata: {dumps(serialize_log(row))}\n\n'
+        since_id = rows[-1].id
@@ -0,0 +1,113 @@
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+class TTLCache:
+    """
+    A bounded, thread-safe LRU cache whose entries also expire after ``ttl`` seconds.
+
+    Hits, misses, evictions (entries dropped to respect ``maxsize``) and expirations are
+    counted so the cache can be sized from its :meth:`stats`.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        """
+        Returns the value cached for ``key`` and marks it as recently used.
+
+        Args:
+            key: The cache key.
+            default (optional): The value returned on a miss. Defaults to None.
+
+        Returns:
+            The cached value, or ``default``.
+        """
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            expires_at, value = entry
+            if expires_at <= self.clock():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        """
+        Caches ``value`` under ``key``, evicting the least recently used entries when full.
+
+        Args:
+            key: The cache key.
+            value: The value to cache.
+            ttl (float, optional): A lifetime overriding the cache's default. Defaults to None.
+
+        Returns:
+            None
+        """
+        expires_at = self.clock() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key):
+        """
+        Removes ``key`` from the cache if it is present.
+
+        Args:
+            key: The cache key.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """
+        Removes every entry from the cache.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        """
+        Returns the cache counters.
+
+        Returns:
+            dict: The size, capacity, hits, misses, evictions and expirations of the cache.
+        """
+        with self._lock:
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
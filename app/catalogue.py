@@ -0,0 +1,165 @@
+import datetime
+import threading
+import time
+from flask import current_app, has_app_context
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.orm import Session
+from app.cache import TTLCache
+from app.models import CatalogueVersion
+
+class Catalogue:
+    """
+    Versioned cache of catalogue reads.
+
+    The catalogue version lives in the ``catalogue_version`` table and is bumped in the
+    same transaction as every write to the movies, so all workers agree on it. Each
+    worker re-reads it at most every ``sync_interval`` seconds, and at once after one of
+    its own writes commits. Cached results are stored under the version that was current
+    when their query started and looked up under the current one, so a result computed
+    while a write was committing is never served afterwards.
+    """
+
+    def __init__(self, maxsize=512, ttl=30, sync_interval=1.0, clock=time.monotonic):
+        self.results = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.sync_interval = sync_interval
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._synced_at = None
+        self.version = 0
+        self.modified_at = None
+
+    def sync(self, db_session):
+        """
+        Reads the shared catalogue version unless it was read within ``sync_interval``.
+
+        A changed version drops every cached result.
+
+        Args:
+            db_session: The database session to read with.
+
+        Returns:
+            int: The current version.
+        """
+        now = self.clock()
+        if self._synced_at is not None and now - self._synced_at < self.sync_interval:
+            return self.version
+        row = db_session.execute(
+            select(CatalogueVersion.version, CatalogueVersion.updated_at).where(CatalogueVersion.id == 1)
+        ).first()
+        version, modified_at = row if row is not None else (0, None)
+        with self._lock:
+            if version != self.version:
+                self.results.clear()
+            self.version = version
+            self.modified_at = modified_at
+            self._synced_at = now
+        return version
+
+    def invalidate(self):
+        """
+        Drops every cached result and makes the next :meth:`sync` read the version.
+        """
+        with self._lock:
+            self.results.clear()
+            self._synced_at = None
+
+    def lookup(self, key):
+        """
+        Looks up a cached result.
+
+        Args:
+            key (tuple): The normalised request parameters.
+
+        Returns:
+            tuple: The current version and the cached result, or None on a miss. Pass the
+            version to :meth:`store` once the result is computed.
+        """
+        version = self.version
+        return version, self.results.get((version, key))
+
+    def store(self, version, key, result):
+        """
+        Caches a result computed at ``version``.
+
+        Args:
+            version (int): The version returned by :meth:`lookup`.
+            key (tuple): The normalised request parameters.
+            result: The result to cache.
+        """
+        if version == self.version and self._synced_at is not None:
+            self.results.set((version, key), result)
+
+    def stats(self):
+        """
+        Returns the cache counters and the catalogue version.
+
+        Returns:
+            dict: The result cache statistics and the current version.
+        """
+        return dict(self.results.stats(), version=self.version)
+
+def init_app(app):
+    """
+    Creates the catalogue cache for the application.
+
+    Args:
+        app: The Flask application object.
+
+    Returns:
+        Catalogue: The catalogue cache.
+    """
+    catalogue = Catalogue(maxsize=app.config.get('MOVIES_CACHE_SIZE', 512),
+                          ttl=app.config.get('MOVIES_CACHE_TTL', 30),
+                          sync_interval=app.config.get('CATALOGUE_SYNC_INTERVAL', 1.0))
+    app.extensions['catalogue'] = catalogue
+    return catalogue
+
+def get_catalogue():
+    """
+    Returns the catalogue cache of the current application, if there is one.
+
+    :return: The catalogue cache or None.
+    """
+    if not has_app_context():
+        return None
+    return current_app.extensions.get('catalogue')
+
+def bump_catalogue_version(db_session):
+    """
+    Records a change to the catalogue in the current transaction.
+
+    Call it before committing a write to the movies. Once the transaction commits, the
+    cached reads of this worker are dropped; other workers notice at their next sync.
+    The new version is left in ``db_session.info['catalogue_version']``.
+
+    Args:
+        db_session: The session holding the write.
+
+    Returns:
+        None
+    """
+    now = datetime.datetime.utcnow()
+    version = db_session.execute(
+        update(CatalogueVersion).where(CatalogueVersion.id == 1)
+        .values(version=CatalogueVersion.version + 1, updated_at=now)
+        .returning(CatalogueVersion.version)
+    ).scalar()
+    if version is None:
+        version = 1
+        db_session.execute(insert(CatalogueVersion).values(id=1, version=version, updated_at=now))
+    db_session.info['catalogue_changed'] = True
+    db_session.info['catalogue_version'] = version  # For indexes that follow the version, see app.suggest
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_after_commit(session):
+    """
+    Drops this worker's cached reads once a transaction that changed the catalogue commits.
+    """
+    if session.info.pop('catalogue_changed', False):
+        catalogue = get_catalogue()
+        if catalogue is not None:
+            catalogue.invalidate()
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_rolled_back_change(session):
+    session.info.pop('catalogue_changed', None)
@@ -0,0 +1,72 @@
+import datetime
+from flask import current_app, request
+
+def http_date(moment):
+    """
+    Converts a naive UTC datetime to the second-precision, timezone-aware form used in HTTP headers.
+
+    Args:
+        moment (datetime): A naive UTC datetime, or None.
+
+    Returns:
+        datetime: The aware datetime, or None.
+    """
+    if moment is None:
+        return None
+    return moment.replace(tzinfo=datetime.timezone.utc, microsecond=0)
+
+def is_not_modified(etag, last_modified=None):
+    """
+    Checks the request's validators against the current ones.
+
+    ``If-None-Match`` takes precedence; ``If-Modified-Since`` is only used without it.
+
+    Args:
+        etag (str): The current entity tag, without quotes.
+        last_modified (datetime, optional): The current naive UTC modification time.
+
+    Returns:
+        bool: True if the client's copy is current.
+    """
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    last_modified = http_date(last_modified)
+    if request.if_modified_since and last_modified is not None:
+        return last_modified <= request.if_modified_since
+    return False
+
+def add_validators(response, etag, last_modified=None, cache_control=None):
+    """
+    Sets the ETag, Last-Modified and Cache-Control headers of a response.
+
+    Args:
+        response: The response to update.
+        etag (str): The entity tag, without quotes; sent as a weak tag.
+        last_modified (datetime, optional): The naive UTC modification time.
+        cache_control (str, optional): Defaults to ``CATALOGUE_CACHE_CONTROL``.
+
+    Returns:
+        The response.
+    """
+    response.set_etag(etag, weak=True)
+    if last_modified is not None:
+        response.last_modified = http_date(last_modified)
+    response.headers['Cache-Control'] = cache_control or current_app.config.get('CATALOGUE_CACHE_CONTROL',
+                                                                             'public, no-cache')
+    return response
+
+def not_modified(etag, last_modified=None, cache_control=None):
+    """
+    Returns a 304 response if the client's copy is current.
+
+    Args:
+        etag (str): The current entity tag, without quotes.
+        last_modified (datetime, optional): The current naive UTC modification time.
+        cache_control (str, optional): Defaults to ``CATALOGUE_CACHE_CONTROL``.
+
+    Returns:
+        A 304 response with the current validators, or None if a full response is needed.
+    """
+    if not is_not_modified(etag, last_modified):
+        return None
+    return add_validators(current_app.response_class(status=304), etag, last_modified, cache_control)
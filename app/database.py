@@ -1,11 +1,169 @@
+import datetime
+import threading
+import time
 import click
-from flask import current_app, g
+from flask import current_app
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import create_engine
-from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy import delete, event, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
 
 db = SQLAlchemy()
 
+class PoolStats:
+    """
+    Thread-safe counters describing how the application's connection pool is used.
+
+    The counters are updated from pool events and from :class:`InstrumentedQueuePool`,
+    so they can be read at any time to size the pool under gunicorn/gevent load.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.timeouts = 0
+        self.waits = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def incr(self, counter):
+        """
+        Increments one of the counters by one.
+
+        Args:
+            counter (str): The name of the counter to increment.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def record_wait(self, seconds):
+        """
+        Records the time a caller spent waiting for a pooled connection.
+
+        Args:
+            seconds (float): The time spent waiting, in seconds.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self.waits += 1
+            self.wait_total += seconds
+            if seconds > self.wait_max:
+                self.wait_max = seconds
+
+    def snapshot(self, pool=None):
+        """
+        Returns the current counters, plus the live pool occupancy when available.
+
+        Args:
+            pool (Pool, optional): The pool whose occupancy should be reported. Defaults to None.
+
+        Returns:
+            dict: The pool statistics.
+        """
+        with self._lock:
+            data = {
+                'connects': self.connects,
+                'checkouts': self.checkouts,
+                'checkins': self.checkins,
+                'timeouts': self.timeouts,
+                'wait_avg_ms': (self.wait_total / self.waits * 1000) if self.waits else 0.0,
+                'wait_max_ms': self.wait_max * 1000,
+            }
+        if isinstance(pool, QueuePool):
+            data.update({
+                'size': pool.size(),
+                'checked_in': pool.checkedin(),
+                'checked_out': pool.checkedout(),
+                'overflow': pool.overflow(),
+            })
+        return data
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    A QueuePool that records how long callers wait for a connection.
+    """
+    stats = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            if self.stats is not None:
+                self.stats.incr('timeouts')
+            raise
+        finally:
+            if self.stats is not None:
+                self.stats.record_wait(time.perf_counter() - start)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+def configure_engine(app):
+    """
+    Builds the engine options used by Flask-SQLAlchemy from the pool settings in the config.
+
+    Flask-SQLAlchemy creates exactly one engine per application from these options, and
+    both ``db.session`` and :func:`get_db` draw their connections from its pool.
+    In-memory SQLite databases keep Flask-SQLAlchemy's ``StaticPool``.
+
+    Args:
+        app: The Flask application object.
+
+    Returns:
+        None
+    """
+    options = app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {})
+    url = make_url(app.config['SQLALCHEMY_DATABASE_URI'])
+    if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+        return
+    options.setdefault('poolclass', InstrumentedQueuePool)
+    options.setdefault('pool_size', app.config.get('DB_POOL_SIZE', 5))
+    options.setdefault('max_overflow', app.config.get('DB_MAX_OVERFLOW', 10))
+    options.setdefault('pool_timeout', app.config.get('DB_POOL_TIMEOUT', 30))
+    options.setdefault('pool_recycle', app.config.get('DB_POOL_RECYCLE', 1800))
+    options.setdefault('pool_pre_ping', app.config.get('DB_POOL_PRE_PING', True))
+
+def init_pool_stats(app):
+    """
+    Attaches a :class:`PoolStats` collector to the application's engine.
+
+    Args:
+        app: The Flask application object.
+
+    Returns:
+        PoolStats: The statistics collector.
+    """
+    stats = PoolStats()
+    engine = db.engine
+    engine.pool.stats = stats
+    event.listen(engine, 'connect', lambda *args: stats.incr('connects'))
+    event.listen(engine, 'checkout', lambda *args: stats.incr('checkouts'))
+    event.listen(engine, 'checkin', lambda *args: stats.incr('checkins'))
+    app.extensions['db_pool_stats'] = stats
+    return stats
+
+def get_pool_stats():
+    """
+    Returns the connection pool statistics for the current application.
+
+    :return: A dictionary of pool counters and occupancy.
+    """
+    stats = current_app.extensions.get('db_pool_stats')
+    if stats is None:
+        return {}
+    return stats.snapshot(db.engine.pool)
+
 def init_db():
     """
     Initializes the database by creating all the necessary tables.
@@ -41,23 +199,49 @@ def get_db():
     """
     Retrieves the database session object.
 
+    The session is Flask-SQLAlchemy's scoped session, so it is bound to the
+    application's pooled engine and scoped to the current application context.
+
     :return: The database session object.
     """
-    if not hasattr(g, '_database'):
-        engine = create_engine(current_app.config['SQLALCHEMY_DATABASE_URI'])
-        g._database = scoped_session(sessionmaker(bind=engine))
-    return g._database
+    return db.session
 
 def close_db(e=None):
     """
-    Closes the database connection.
+    Closes the database session and returns its connection to the pool.
 
     :param e: An optional exception object. Default is None.
     :return: None
     """
-    database = getattr(g, '_database', None)
-    if database is not None:
-        database.remove()
+    db.session.remove()
+
+def purge_expired_tokens(batch_size=1000, now=None):
+    """
+    Deletes blacklisted tokens whose expiry has passed.
+
+    Rows are deleted in batches of ``batch_size``, each in its own short transaction,
+    so the write lock is never held for long while the app keeps serving requests.
+
+    Parameters:
+        batch_size (int, optional): The number of rows deleted per transaction. Defaults to 1000.
+        now (datetime, optional): The UTC cut-off time. Defaults to the current time.
+
+    Returns:
+        int: The number of deleted rows.
+    """
+    from app.models import BlacklistToken
+    now = now or datetime.datetime.utcnow()
+    total = 0
+    while True:
+        ids = db.session.scalars(
+            select(BlacklistToken.id).where(BlacklistToken.expires_at <= now).limit(batch_size)
+        ).all()
+        if not ids:
+            break
+        db.session.execute(delete(BlacklistToken).where(BlacklistToken.id.in_(ids)))
+        db.session.commit()
+        total += len(ids)
+    return total
 
 @click.command('init-db')
 def init_db_command():
@@ -71,6 +255,37 @@ def drop_db_command():
     drop_db()
     click.echo('Dropped the database.')
 
+@click.command('purge-blacklist')
+@click.option('--batch-size', default=1000, show_default=True, help='Rows deleted per transaction.')
+def purge_blacklist_command(batch_size):
+    """Delete blacklisted tokens that have expired."""
+    deleted = purge_expired_tokens(batch_size)
+    click.echo(f'Purged {deleted} expired blacklisted tokens.')
+
+@click.command('rebuild-genre-counts')
+def rebuild_genre_counts_command():
+    """Recompute the per-genre movie counts from the movies."""
+    from app.catalogue import bump_catalogue_version
+    from app.genres import rebuild_genre_counts
+    genres = rebuild_genre_counts(db.session)
+    bump_catalogue_version(db.session)
+    db.session.commit()
+    click.echo(f'Counted movies for {genres} genres.')
+
+@click.command('archive-movie-logs')
+@click.option('--days', type=int, default=None,
+              help='Archive logs older than this many days (default: MOVIE_LOG_RETENTION_DAYS).')
+@click.option('--batch-size', default=1000, show_default=True, help='Logs moved per transaction.')
+def archive_movie_logs_command(days, batch_size):
+    """Move old movie logs to monthly archive files and daily rollups."""
+    from app.archive import archive_dir, archive_logs
+    if days is None:
+        days = current_app.config.get('MOVIE_LOG_RETENTION_DAYS', 90)
+    before = datetime.datetime.utcnow() - datetime.timedelta(days=days)
+    directory = archive_dir()
+    archived = archive_logs(db.session, directory, before, batch_size)
+    click.echo(f'Archived {archived} movie logs older than {days} days to {directory}.')
+
 # Register the commands as Flask CLI commands
 def init_app(app):
     """
@@ -84,4 +299,8 @@ def init_app(app):
     """
     app.teardown_appcontext(close_db)
     app.cli.add_command(init_db_command)
+    app.cli.add_command(purge_blacklist_command)
     app.cli.add_command(drop_db_command)
+    app.cli.add_command(rebuild_genre_counts_command)
+    app.cli.add_command(archive_movie_logs_command)
+    init_pool_stats(app)
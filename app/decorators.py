@@ -2,6 +2,7 @@ from functools import wraps
 from flask import current_app, redirect, request, g
 from app.models import User
 from app.database import get_db
+from app.principals import load_principal
 
 db_session = get_db()
 
@@ -42,12 +43,12 @@ def token_required(f):
             return redirect('/login?error=Token is missing', code=401)  # Redirect to login page with error message and 401 Unauthorized code
 
         # Validate the auth token here 
-        user_id = User.decode_auth_token(auth_token)
-        user = db_session.query(User).filter_by(id=user_id).first()
+        claims = User.decode_auth_claims(auth_token)
+        user = load_principal(claims, db_session) if not isinstance(claims, str) else None
         if not user:
             return redirect('/login?error=Invalid token', code=401)  # Redirect to login page with error message and 401 Unauthorized code
         else:
-            g.user = user
+            g.user = user  # A cached Principal (id, name, email, admin), not a session-bound User
 
         return f(*args, **kwargs)
 
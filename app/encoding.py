@@ -0,0 +1,84 @@
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # Optional: the standard library encoder is used instead
+    orjson = None
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider that encodes with orjson when it is installed.
+
+    Output matches Flask's default provider: keys are sorted, responses are indented in
+    debug mode, and dates, decimals and other values orjson does not handle natively go
+    through the same ``default`` function, so dates keep their HTTP date format. orjson
+    emits UTF-8 instead of ``\\uXXXX`` escapes. Anything orjson rejects, e.g. integers
+    wider than 64 bits, is encoded with the standard library instead.
+    """
+
+    def __init__(self, app, encoder=None):
+        super().__init__(app)
+        self.encoder = orjson if encoder is None else encoder
+
+    def _options(self, indent=False):
+        options = self.encoder.OPT_PASSTHROUGH_DATETIME | self.encoder.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            options |= self.encoder.OPT_SORT_KEYS
+        if indent:
+            options |= self.encoder.OPT_INDENT_2
+        return options
+
+    def _encode(self, obj, indent=False):
+        return self.encoder.dumps(obj, default=self.default, option=self._options(indent))
+
+    def dumps(self, obj, **kwargs):
+        """
+        Serializes ``obj`` to a JSON string.
+
+        Calls with extra arguments for :func:`json.dumps` use the standard library.
+
+        Args:
+            obj: The data to serialize.
+            **kwargs: Passed to :func:`json.dumps`.
+
+        Returns:
+            str: The JSON document.
+        """
+        if self.encoder is not None and not kwargs:
+            try:
+                return self._encode(obj).decode('utf-8')
+            except TypeError:
+                pass
+        return super().dumps(obj, **kwargs)
+
+    def response(self, *args, **kwargs):
+        """
+        Serializes the arguments to a JSON response, as :func:`flask.jsonify` does.
+
+        Returns:
+            The response object.
+        """
+        if self.encoder is None:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        try:
+            body = self._encode(obj, indent)
+        except TypeError:
+            return super().response(obj)
+        return self._app.response_class(body + b'\n', mimetype=self.mimetype)
+
+def init_app(app):
+    """
+    Installs the fast JSON provider when ``JSON_FAST_ENCODER`` is on and orjson is installed.
+
+    Args:
+        app: The Flask application object.
+
+    Returns:
+        bool: True if responses are encoded with orjson.
+    """
+    if not app.config.get('JSON_FAST_ENCODER', True) or orjson is None:
+        return False
+    app.json = FastJSONProvider(app)
+    return True
@@ -0,0 +1,126 @@
+from sqlalchemy import and_, case, func, select
+from app.genres import genre_snapshot
+from app.models import Genre, Movie, movie_genres
+
+FACETS = ('genre', 'imdb_score', 'popularity')
+
+# Bucket edges of the histograms; the first and last buckets also take values outside them
+BUCKETS = {
+    'imdb_score': (Movie.imdb_score, tuple(range(0, 11))),
+    'popularity': (Movie.popularity, tuple(range(0, 101, 10))),
+}
+
+class InvalidFacet(ValueError):
+    """
+    Raised when an unknown facet is requested.
+    """
+
+def parse_facets(value):
+    """
+    Reads the ``facets`` parameter.
+
+    Args:
+        value (str): A comma-separated list of facet names, or 'all'.
+
+    Returns:
+        tuple: The requested facets in canonical order, empty when none are requested.
+
+    Raises:
+        InvalidFacet: If a name is not one of :data:`FACETS`.
+    """
+    names = {name.strip() for name in (value or '').split(',') if name.strip()}
+    if 'all' in names:
+        return FACETS
+    unknown = names - set(FACETS)
+    if unknown:
+        raise InvalidFacet(f"Unknown facets: {', '.join(sorted(unknown))}. Use {', '.join(FACETS)} or all")
+    return tuple(name for name in FACETS if name in names)
+
+def _bucket_sum(column, edges, index):
+    if index == 0:
+        condition = column < edges[1]
+    elif index == len(edges) - 2:
+        condition = column >= edges[index]
+    else:
+        condition = and_(column >= edges[index], column < edges[index + 1])
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+def histogram_facets(db_session, movie_ids, names):
+    """
+    Counts the filtered movies per score and popularity bucket in a single scan.
+
+    Every bucket is a conditional sum in one aggregate SELECT, so all requested
+    histograms come from one pass over the filtered movies.
+
+    Args:
+        db_session: The database session.
+        movie_ids: A subquery selecting the ids of the filtered movies.
+        names (tuple): The histogram facets to compute.
+
+    Returns:
+        dict: For each facet, a list of ``{'from', 'to', 'count'}`` buckets.
+    """
+    columns = []
+    for name in names:
+        column, edges = BUCKETS[name]
+        columns.extend(_bucket_sum(column, edges, index) for index in range(len(edges) - 1))
+    row = db_session.execute(select(*columns).where(Movie.id.in_(select(movie_ids.c.id)))).one()
+
+    facets = {}
+    position = 0
+    for name in names:
+        edges = BUCKETS[name][1]
+        facets[name] = [{'from': edges[index], 'to': edges[index + 1], 'count': row[position + index]}
+                        for index in range(len(edges) - 1)]
+        position += len(edges) - 1
+    return facets
+
+def genre_facet(db_session, movie_ids=None):
+    """
+    Counts the filtered movies per genre, most common first.
+
+    Without a filter the precomputed per-genre counts are used; otherwise one grouped
+    query over ``movie_genres`` runs.
+
+    Args:
+        db_session: The database session.
+        movie_ids (optional): A subquery selecting the ids of the filtered movies, or
+            None for the whole catalogue.
+
+    Returns:
+        list: ``{'name', 'count'}`` entries ordered by descending count, then name.
+    """
+    if movie_ids is None:
+        counts = genre_snapshot(db_session)
+    else:
+        counts = db_session.execute(
+            select(Genre.name, func.count())
+            .join(movie_genres, movie_genres.c.genre_id == Genre.id)
+            .where(movie_genres.c.movie_id.in_(select(movie_ids.c.id)))
+            .group_by(Genre.id)
+        ).all()
+    return [{'name': name, 'count': count}
+            for name, count in sorted(counts, key=lambda item: (-item[1], item[0]))]
+
+def compute_facets(db_session, filtered_query, names, filtered=True):
+    """
+    Computes the requested facets for the movies matched by ``filtered_query``.
+
+    Args:
+        db_session: The database session.
+        filtered_query: The movies query with its filters, without ordering or paging.
+        names (tuple): The facets to compute, see :func:`parse_facets`.
+        filtered (bool, optional): False when the query matches the whole catalogue,
+            which lets the genre facet use the precomputed counts. Defaults to True.
+
+    Returns:
+        dict: The facets by name.
+    """
+    movie_ids = filtered_query.with_entities(Movie.id.label('id')).order_by(None).subquery()
+    facets = {}
+    if 'genre' in names:
+        facets['genre'] = genre_facet(db_session, movie_ids if filtered else None)
+    histograms = tuple(name for name in names if name in BUCKETS)
+    if histograms:
+        facets.update(histogram_facets(db_session, movie_ids, histograms))
+    return facets
@@ -0,0 +1,150 @@
+from collections import Counter
+from sqlalchemy import event, func, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session, attributes
+from app.catalogue import get_catalogue
+from app.models import Genre, Movie, movie_genres
+
+SNAPSHOT_KEY = ('genre_counts',)
+
+def normalise_genre_names(genres):
+    """
+    Cleans up a list of genre names.
+
+    Names are stripped of surrounding whitespace (``imdb.json`` stores most of them with a
+    leading space, e.g. ``" Family"``), empty names are dropped and duplicates are removed
+    while keeping their order.
+
+    Args:
+        genres (iterable): The genre names.
+
+    Returns:
+        list: The cleaned names.
+    """
+    names = []
+    for name in genres or []:
+        name = str(name).strip()
+        if name and name not in names:
+            names.append(name)
+    return names
+
+def apply_genre_counts(connection, delta):
+    """
+    Adds per-genre movie count changes to ``genres``, creating missing genres.
+
+    Args:
+        connection: The connection of the transaction holding the movie writes.
+        delta (Counter): The change of movie count per genre name. Names with no change
+            are still created, with a count of zero.
+
+    Returns:
+        None
+    """
+    rows = [{'name': name, 'movie_count': change} for name, change in delta.items()]
+    if not rows:
+        return
+    statement = sqlite_insert(Genre.__table__)
+    statement = statement.on_conflict_do_update(
+        index_elements=['name'],
+        set_={'movie_count': Genre.__table__.c.movie_count + statement.excluded.movie_count}
+    )
+    connection.execute(statement, rows)
+
+def genre_ids(connection, names):
+    """
+    Looks up the ids of genres by name.
+
+    Args:
+        connection: The connection to read with.
+        names (iterable): The genre names.
+
+    Returns:
+        dict: The id of each existing genre by name.
+    """
+    names = list(set(names))
+    if not names:
+        return {}
+    return dict(connection.execute(select(Genre.name, Genre.id).where(Genre.name.in_(names))).all())
+
+def rebuild_genre_counts(db_session):
+    """
+    Recomputes the movie count of every genre from ``movie_genres``.
+
+    Args:
+        db_session: The database session to write with. The caller commits.
+
+    Returns:
+        int: The number of genres with at least one movie.
+    """
+    movie_count = (select(func.count()).select_from(movie_genres)
+                   .where(movie_genres.c.genre_id == Genre.id).scalar_subquery())
+    db_session.execute(update(Genre).values(movie_count=movie_count))
+    return db_session.execute(select(func.count()).select_from(Genre).where(Genre.movie_count > 0)).scalar()
+
+def genre_snapshot(db_session):
+    """
+    Returns the genres that have movies, with their counts, from an in-process snapshot.
+
+    The snapshot is kept in the catalogue cache, so it is read from ``genres`` once
+    per catalogue version and served from memory until the next movie write.
+
+    Args:
+        db_session: The database session used when the snapshot is stale.
+
+    Returns:
+        tuple: ``(name, movie_count)`` pairs ordered by name.
+    """
+    catalogue = get_catalogue()
+    if catalogue is not None:
+        catalogue.sync(db_session)
+        version, snapshot = catalogue.lookup(SNAPSHOT_KEY)
+        if snapshot is not None:
+            return snapshot
+    snapshot = tuple(db_session.execute(
+        select(Genre.name, Genre.movie_count)
+        .where(Genre.movie_count > 0)
+        .order_by(Genre.name)
+    ).tuples())
+    if catalogue is not None:
+        catalogue.store(version, SNAPSHOT_KEY, snapshot)
+    return snapshot
+
+def _resolve_genres(session, names):
+    # Genres are created with a core upsert, so concurrent writers never race on the unique name
+    names = sorted(names)
+    apply_genre_counts(session.connection(), Counter(dict.fromkeys(names, 0)))
+    return {genre.name: genre for genre in session.execute(select(Genre).where(Genre.name.in_(names))).scalars()}
+
+@event.listens_for(Session, 'before_flush')
+def _track_genre_counts(session, flush_context, instances):
+    """
+    Resolves the genre names given to :meth:`Movie.set_genre` to ``genres`` rows and keeps
+    their movie counts in step with movies added, deleted or re-genred through the ORM.
+
+    The names of every movie in the flush are resolved together, with one upsert and
+    one SELECT.
+    """
+    delta = Counter()
+    with session.no_autoflush:
+        pending = [movie for movie in list(session.new) + list(session.dirty)
+                   if isinstance(movie, Movie) and getattr(movie, '_genre_names', None) is not None]
+        if pending:
+            genres = _resolve_genres(session, {name for movie in pending for name in movie._genre_names})
+            for movie in pending:
+                movie.genres = [genres[name] for name in movie._genre_names]
+                del movie._genre_names
+        for movie in session.new:
+            if isinstance(movie, Movie):
+                delta.update(genre.name for genre in movie.genres)
+        for movie in session.deleted:
+            if isinstance(movie, Movie):
+                delta.subtract(genre.name for genre in movie.genres)
+        for movie in session.dirty:
+            if isinstance(movie, Movie):
+                # Collections that were never loaded cannot have changed
+                history = attributes.get_history(movie, 'genres', passive=attributes.PASSIVE_NO_INITIALIZE)
+                delta.update(genre.name for genre in history.added)
+                delta.subtract(genre.name for genre in history.deleted)
+    delta = Counter({name: change for name, change in delta.items() if change})
+    if delta:
+        apply_genre_counts(session.connection(), delta)
@@ -0,0 +1,146 @@
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+import bcrypt
+from flask import current_app, has_app_context
+
+class PasswordHasherBusy(Exception):
+    """
+    Raised when every hashing worker is busy and the wait queue is full, or when a call
+    waits longer than the hasher's timeout.
+    """
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a dedicated, size-limited worker pool.
+
+    bcrypt releases the GIL while it hashes, so a thread pool gives real parallelism
+    while capping how many hashes run at once. At most ``workers + max_queue`` calls
+    may be in flight; further calls fail immediately with :class:`PasswordHasherBusy`
+    instead of piling up behind the pool.
+    """
+
+    def __init__(self, rounds=12, workers=2, max_queue=16, timeout=None):
+        self.rounds = rounds
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bcrypt')
+        self._slots = threading.BoundedSemaphore(workers + max_queue)
+        self._lock = threading.Lock()
+        self.completed = 0
+        self.rejected = 0
+
+    def _release(self, future):
+        self._slots.release()
+        with self._lock:
+            self.completed += 1
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise PasswordHasherBusy('Password hashing is saturated. Please try again.')
+        future = self._executor.submit(fn, *args)
+        future.add_done_callback(self._release)
+        try:
+            return future.result(self.timeout)
+        except FutureTimeoutError as e:
+            with self._lock:
+                self.rejected += 1
+            raise PasswordHasherBusy('Password hashing timed out. Please try again.') from e
+
+    def hash(self, password):
+        """
+        Hashes a password with the configured cost.
+
+        Parameters:
+            password (str): The password to be hashed.
+
+        Returns:
+            str: The hashed password.
+
+        Raises:
+            PasswordHasherBusy: If the pool is saturated or the call timed out.
+        """
+        salt = bcrypt.gensalt(rounds=self.rounds)
+        return self._run(bcrypt.hashpw, password.encode('utf-8'), salt).decode('utf-8')
+
+    def check(self, password, hashed):
+        """
+        Checks a password against a stored hash.
+
+        Parameters:
+            password (str): The password to be checked.
+            hashed (str): The stored hash.
+
+        Returns:
+            bool: True if the password matches, False otherwise.
+
+        Raises:
+            PasswordHasherBusy: If the pool is saturated or the call timed out.
+        """
+        return self._run(bcrypt.checkpw, password.encode('utf-8'), hashed.encode('utf-8'))
+
+    def needs_rehash(self, hashed):
+        """
+        Checks whether a stored hash was made with a cost other than the configured one.
+
+        Parameters:
+            hashed (str): The stored hash, e.g. ``$2b$12$...``.
+
+        Returns:
+            bool: True if the hash should be recomputed, False otherwise.
+        """
+        try:
+            return int(hashed.split('$')[2]) != self.rounds
+        except (IndexError, ValueError):
+            return True
+
+    def close(self):
+        """
+        Stops the worker threads, cancelling the calls still waiting for one.
+        """
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        """
+        Returns the pool counters.
+
+        Returns:
+            dict: The configured cost and the completed and rejected call counts.
+        """
+        with self._lock:
+            return {'rounds': self.rounds, 'completed': self.completed, 'rejected': self.rejected}
+
+def init_app(app):
+    """
+    Creates the password hasher for the application.
+
+    Args:
+        app: The Flask application object.
+
+    Returns:
+        PasswordHasher: The password hasher.
+    """
+    hasher = PasswordHasher(rounds=app.config.get('BCRYPT_LOG_ROUNDS', 12),
+                            workers=app.config.get('PASSWORD_HASH_WORKERS', 2),
+                            max_queue=app.config.get('PASSWORD_HASH_QUEUE', 16),
+                            timeout=app.config.get('PASSWORD_HASH_TIMEOUT'))
+    app.extensions['password_hasher'] = hasher
+    weakref.finalize(app, hasher.close)  # Runs when the app is collected, or at exit
+    return hasher
+
+def get_password_hasher():
+    """
+    Returns the password hasher of the current application.
+
+    Outside an application context a default hasher using bcrypt's default cost is returned.
+
+    :return: The password hasher.
+    """
+    if has_app_context():
+        hasher = current_app.extensions.get('password_hasher')
+        if hasher is not None:
+            return hasher
+    return _default_hasher
+
+_default_hasher = PasswordHasher()
@@ -1,14 +1,242 @@
-import os
-from zerobouncesdk import ZeroBounce, ZBException
-from dotenv import load_dotenv
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from flask import current_app, has_app_context
+from zerobouncesdk import ZeroBounce
+from app.cache import TTLCache
 
-API = os.getenv("ZEROBOUNCE_API_KEY")
-if API is not None and API.strip():
-    zero_bounce = ZeroBounce(API)
+# Verdicts returned by remote validators
+VALID = 'valid'
+INVALID = 'invalid'
+INVALID_DOMAIN = 'invalid_domain'
+UNKNOWN = 'unknown'
+
+EMAIL_PATTERN = re.compile(r"^[A-Za-z0-9.!#$%&'*+/=?^_`{|}~-]+@[A-Za-z0-9-]+(\.[A-Za-z0-9-]+)+$")
+
+def is_valid_syntax(email):
+    """
+    Checks the syntax of an email address without any network access.
+
+    Args:
+        email (str): The email address to be checked.
+
+    Returns:
+        bool: True if the address is well formed, False otherwise.
+    """
+    if not isinstance(email, str) or len(email) > 254:
+        return False
+    local_part = email.rsplit('@', 1)[0]
+    return len(local_part) <= 64 and EMAIL_PATTERN.match(email) is not None
+
+class CircuitBreaker:
+    """
+    Stops calling a failing remote service for a while.
+
+    After ``failure_threshold`` consecutive failures the breaker opens and :meth:`allow`
+    returns False for ``reset_timeout`` seconds. It then lets one trial call through;
+    a success closes the breaker again, a failure re-opens it.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self._lock = threading.Lock()
+        self.failures = 0
+        self.opened_at = None
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if self.clock() - self.opened_at >= self.reset_timeout:
+            return 'half-open'
+        return 'open'
+
+    def allow(self):
+        """
+        Checks whether a call to the remote service may be made.
+
+        Returns:
+            bool: True unless the breaker is open.
+        """
+        with self._lock:
+            state = self.state
+            if state == 'half-open':
+                self.opened_at = self.clock()  # Let a single trial call through
+            return state != 'open'
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = self.clock()
+
+class ZeroBounceValidator:
+    """
+    Remote validator backed by the ZeroBounce API.
+    """
+
+    def __init__(self, api_key):
+        self._client = ZeroBounce(api_key)
+
+    def __call__(self, email):
+        """
+        Validates an email address using the ZeroBounce API.
+
+        Args:
+            email (str): The email address to be validated.
+
+        Returns:
+            str: One of ``VALID``, ``INVALID``, ``INVALID_DOMAIN`` or ``UNKNOWN``.
+        """
+        response = self._client.validate(email)
+        status = getattr(response.status, 'value', response.status)
+        sub_status = getattr(response.sub_status, 'value', response.sub_status)
+        if status == 'valid':
+            return VALID
+        if sub_status == 'no_dns_entries':
+            return INVALID_DOMAIN
+        if status in ('invalid', 'spamtrap', 'abuse', 'do_not_mail'):
+            return INVALID
+        return UNKNOWN
+
+class EmailValidator:
+    """
+    Validates email addresses with a local fast path and an optional remote check.
+
+    Malformed addresses are rejected locally. Verdicts are cached per address, and
+    domains found to have no DNS entries are cached so every address at them is
+    rejected locally too. The remote check runs on a worker thread: the request waits
+    at most ``timeout`` seconds for it, after which the address is accepted and the
+    verdict is cached when it arrives. A :class:`CircuitBreaker` stops remote calls
+    while the service keeps failing or timing out, and no check is queued while every
+    worker is already busy, so a hanging service cannot pile up pending checks.
+    """
+
+    def __init__(self, remote=None, timeout=1.0, cache_size=10000, cache_ttl=86400, breaker=None, workers=4):
+        self.remote = remote
+        self.timeout = timeout
+        self.workers = workers
+        self.breaker = breaker or CircuitBreaker()
+        self.addresses = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        self.domains = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='email-validation') if remote else None
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def _check_remote(self, email, domain):
+        start = time.monotonic()
+        try:
+            verdict = self.remote(email)
+        except Exception as e:
+            print("Email validation error: " + str(e))
+            self.breaker.record_failure()
+            return UNKNOWN
+        finally:
+            with self._lock:
+                self._pending.pop(email, None)
+        if time.monotonic() - start <= self.timeout:
+            self.breaker.record_success()  # A late answer was already counted as a failure by validate
+        if verdict == INVALID_DOMAIN:
+            self.domains.set(domain, False)
+        if verdict != UNKNOWN:
+            self.addresses.set(email, verdict == VALID)
+        return verdict
+
+    def validate(self, email):
+        """
+        Validates an email address.
+
+        Args:
+            email (str): The email address to be validated.
+
+        Returns:
+            bool: False if the address is known to be invalid, True otherwise.
+        """
+        if not is_valid_syntax(email):
+            return False
+        email = email.strip().lower()
+        domain = email.rsplit('@', 1)[1]
+        if self.domains.get(domain) is False:
+            return False
+        cached = self.addresses.get(email)
+        if cached is not None:
+            return cached
+        if self.remote is None or not self.breaker.allow():
+            return True
+
+        submitted = False
+        with self._lock:
+            future = self._pending.get(email)
+            if future is None:
+                if len(self._pending) >= self.workers:
+                    return True  # Every worker is busy; accept without queueing another check
+                future = self._pending[email] = self._executor.submit(self._check_remote, email, domain)
+                submitted = True
+        try:
+            verdict = future.result(self.timeout)
+        except FutureTimeoutError:
+            if submitted:
+                self.breaker.record_failure()  # Counted even if the remote call never returns
+            return True  # Fail open; the verdict is cached once the remote answers
+        return verdict not in (INVALID, INVALID_DOMAIN)
+
+    def stats(self):
+        """
+        Returns the cache and circuit breaker state.
+
+        Returns:
+            dict: The address and domain cache statistics and the breaker state.
+        """
+        return {'addresses': self.addresses.stats(), 'domains': self.domains.stats(),
+                'breaker': self.breaker.state, 'remote': self.remote is not None}
+
+def init_app(app):
+    """
+    Creates the email validator for the application.
+
+    The remote check uses ``EMAIL_REMOTE_VALIDATOR`` when it is set to a callable,
+    otherwise ZeroBounce when ``ZEROBOUNCE_API_KEY`` is set; without either only the
+    local checks run.
+
+    Args:
+        app: The Flask application object.
+
+    Returns:
+        EmailValidator: The email validator.
+    """
+    remote = app.config.get('EMAIL_REMOTE_VALIDATOR')
+    api_key = app.config.get('ZEROBOUNCE_API_KEY')
+    if remote is None and api_key is not None and api_key.strip():
+        remote = ZeroBounceValidator(api_key)
+    validator = EmailValidator(remote=remote,
+                               timeout=app.config.get('EMAIL_VALIDATION_TIMEOUT', 1.0),
+                               cache_ttl=app.config.get('EMAIL_VALIDATION_CACHE_TTL', 86400),
+                               breaker=CircuitBreaker(app.config.get('EMAIL_VALIDATION_FAILURE_THRESHOLD', 5),
+                                                      app.config.get('EMAIL_VALIDATION_RESET_TIMEOUT', 30)))
+    app.extensions['email_validator'] = validator
+    return validator
+
+def get_email_validator():
+    """
+    Returns the email validator of the current application, if there is one.
+
+    :return: The email validator or None.
+    """
+    if not has_app_context():
+        return None
+    return current_app.extensions.get('email_validator')
 
 def validate_email(email):
     """
-    Validates an email address using the ZeroBounce API.
+    Validates an email address.
 
     Args:
         email (str): The email address to be validated.
@@ -16,11 +244,7 @@ def validate_email(email):
     Returns:
         bool: True if the email is valid, False otherwise.
     """
-    try:
-        response = zero_bounce.validate(email)
-        if response.status == "valid":
-            return True
-        else:
-            return False
-    except ZBException as e:
-        print("ZeroBounce validate error: " + str(e))
+    validator = get_email_validator()
+    if validator is None:
+        return is_valid_syntax(email)
+    return validator.validate(email)
@@ -1,8 +1,6 @@
 import datetime
-import json
-import bcrypt
 import jwt
-from flask import current_app
+from flask import current_app, has_app_context
 from app.database import db
 
 class User(db.Model):
@@ -26,15 +24,20 @@ class User(db.Model):
         """
         Hashes a given password using bcrypt.
 
+        The hash runs on the app's bounded hashing pool with the configured
+        ``BCRYPT_LOG_ROUNDS`` cost.
+
         Parameters:
             password (str): The password to be hashed.
 
         Returns:
             str: The hashed password.
+
+        Raises:
+            PasswordHasherBusy: If the hashing pool is saturated.
         """
-        salt = bcrypt.gensalt()
-        hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
-        return hashed.decode('utf-8')
+        from app.hashing import get_password_hasher
+        return get_password_hasher().hash(password)
         
     def check_password(self, password):
         """
@@ -45,8 +48,23 @@ class User(db.Model):
 
         Returns:
             bool: True if the password matches, False otherwise.
+
+        Raises:
+            PasswordHasherBusy: If the hashing pool is saturated.
+        """
+        from app.hashing import get_password_hasher
+        return get_password_hasher().check(password, self.password)
+
+    def needs_rehash(self):
+        """
+        Checks whether the stored password hash uses a cost other than the configured one.
+
+        Returns:
+            bool: True if the password should be rehashed, False otherwise.
         """
-        return bcrypt.checkpw(password.encode('utf-8'), self.password.encode('utf-8')) 
+        from app.hashing import get_password_hasher
+        return get_password_hasher().needs_rehash(self.password)
+
     def encode_auth_token(self, expires_in):
         """
         Generates an authentication token for the user.
@@ -67,6 +85,10 @@ class User(db.Model):
                 'iat': now,
                 'sub': self.id
             }
+            if current_app.config.get('AUTH_CLAIMS_ONLY'):
+                # Let token_required build the principal without a database lookup
+                payload['name'] = self.name
+                payload['admin'] = self.admin
             return jwt.encode(payload, current_app.config['JWT_SECRET_KEY'], algorithm='HS256')
         except Exception as e:
             return str(e)
@@ -78,13 +100,26 @@ class User(db.Model):
         :param auth_token:
         :return: integer|string
         """
+        claims = User.decode_auth_claims(auth_token)
+        if isinstance(claims, str):
+            return claims
+        return claims['sub']
+
+    @staticmethod
+    def decode_auth_claims(auth_token):
+        """
+        Decodes the auth token and returns all of its claims.
+
+        :param auth_token: The auth token to decode.
+        :return: dict|string The token payload, or an error message if the token is invalid.
+        """
         try:
             payload = jwt.decode(auth_token, current_app.config['JWT_SECRET_KEY'], algorithms=['HS256'])
             is_blacklisted_token = BlacklistToken.check_blacklist(auth_token)
             if is_blacklisted_token:
                 return 'Token blacklisted. Please log in again.'
             else:
-                return payload['sub']
+                return payload
         except jwt.ExpiredSignatureError:
             return 'Signature expired. Please log in again.'
         except jwt.InvalidTokenError:
@@ -95,57 +130,113 @@ class BlacklistToken(db.Model):
     __tablename__ = 'blacklist_tokens'
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    token = db.Column(db.String(500), unique=True, nullable=False)
+    token_hash = db.Column(db.String(64), unique=True, index=True, nullable=False)  # SHA-256 hex digest of the token
     blacklisted_on = db.Column(db.DateTime, nullable=False)
+    expires_at = db.Column(db.DateTime, index=True, nullable=False)  # UTC expiry of the token
 
     def __init__(self, token):
-        self.token = token
+        """
+        Initializes a blacklist entry for the given token.
+
+        Only a digest of the token is stored. The entry expires together with the token,
+        after which ``flask purge-blacklist`` can delete it.
+
+        Parameters:
+            token (str): The auth token to blacklist.
+
+        Returns:
+            None
+        """
+        from app.revocation import token_expiry, token_fingerprint
+        default_ttl = current_app.config.get('REVOCATION_DEFAULT_TTL', 86400) if has_app_context() else 86400
+        self.token_hash = token_fingerprint(token)
         self.blacklisted_on = datetime.datetime.now()
+        self.expires_at = datetime.datetime.utcfromtimestamp(token_expiry(token, default_ttl))
     
     @staticmethod
     def check_blacklist(auth_token):
-        from app.database import get_db, close_db
+        """
+        Checks whether the given auth token has been blacklisted.
+
+        The in-memory revocation cache answers when the app has one; otherwise the
+        ``blacklist_tokens`` table is queried.
+
+        Parameters:
+            auth_token (str): The auth token to check.
+
+        Returns:
+            bool: True if the token is blacklisted, False otherwise.
+        """
+        from app.revocation import get_revocation_cache, token_fingerprint
+        cache = get_revocation_cache()
+        if cache is not None:
+            return cache.is_revoked(token_fingerprint(auth_token))
+        from app.database import get_db
         db_session = get_db()
         # check whether auth token has been blacklisted
-        res = db_session.query(BlacklistToken).filter_by(token=str(auth_token)).first()
-        close_db()
+        res = db_session.query(BlacklistToken).filter_by(token_hash=token_fingerprint(auth_token)).first()
         if res:
             return True  
         else:
             return False
 
     def __repr__(self):
-        return '<id: token: {}'.format(self.token)
+        return '<id: token: {}'.format(self.token_hash)
+
+# Association between movies and their genres
+movie_genres = db.Table(
+    'movie_genres',
+    db.Column('movie_id', db.Integer, db.ForeignKey('movies.id', ondelete='CASCADE'), primary_key=True),
+    db.Column('genre_id', db.Integer, db.ForeignKey('genres.id', ondelete='CASCADE'), primary_key=True),
+    db.Index('ix_movie_genres_genre_id_movie_id', 'genre_id', 'movie_id'),  # Covers genre filters in get_movies
+)
 
 class Movie(db.Model):
     __tablename__ = 'movies'
+    __table_args__ = (
+        # Keyset pagination in get_movies walks these in (sort column, id) order
+        db.Index('ix_movies_imdb_score_id', 'imdb_score', 'id'),
+        db.Index('ix_movies_popularity_id', 'popularity', 'id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     director = db.Column(db.String(100), nullable=False)
-    genre = db.Column(db.String(255), nullable=False)  # Store genres as JSON strings
     popularity = db.Column(db.Float, nullable=False)
     imdb_score = db.Column(db.Float, nullable=False)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.datetime.utcnow,
+                           onupdate=datetime.datetime.utcnow)  # UTC; drives the movie's ETag
+    genres = db.relationship('Genre', secondary=movie_genres, order_by='Genre.name',
+                             backref=db.backref('movies', lazy='dynamic'))
 
     def set_genre(self, genres):
         """
         Set the genre of the object.
 
+        Names are stripped and de-duplicated, see :func:`app.genres.normalise_genre_names`.
+        They are resolved to :class:`Genre` rows, created when missing, when the session
+        flushes, see :mod:`app.genres`.
+
         Args:
             genres (list): A list of genres to set.
 
         Returns:
             None
         """
-        self.genre = json.dumps(genres)  # Convert list to JSON string for storage
+        from app.genres import normalise_genre_names
+        self._genre_names = normalise_genre_names(genres)
+        self.updated_at = datetime.datetime.utcnow()  # Marks the movie dirty for the flush
     
     def get_genre(self):
         """
-        Parses a JSON string representing a genre list and returns the parsed list.
+        Returns the names of the movie's genres in alphabetical order.
 
         Returns:
-            list: The parsed genre list.
+            list: The genre names.
         """
-        return json.loads(self.genre) if self.genre else []  # Parse JSON string back to list
+        pending = getattr(self, '_genre_names', None)
+        if pending is not None:
+            return sorted(pending)
+        return [genre.name for genre in self.genres]
 
     def serialize(self):
         """
@@ -172,12 +263,14 @@ class Movie(db.Model):
             # Add other attributes as needed
         }
         
+# One row per distinct genre name with the number of movies that have it, kept
+# up to date on movie writes by app.genres
 class Genre(db.Model):
     __tablename__ = 'genres'
+
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(50), nullable=False)
-    movie_id = db.Column(db.Integer, db.ForeignKey('movies.id'), nullable=False)
-    movie = db.relationship('Movie', backref='genres')
+    name = db.Column(db.String(50), unique=True, nullable=False)
+    movie_count = db.Column(db.Integer, nullable=False, default=0)
 
     def serialize(self):
         """
@@ -187,20 +280,26 @@ class Genre(db.Model):
             dict: A dictionary representation of the object with the following keys:
                   - 'id' (int): The ID of the object.
                   - 'name' (str): The name of the object.
-                  - 'movie_id' (int): The ID of the movie associated with the object.
-                  - 'movie' (dict or None): A dictionary representation of the associated movie
-                                            if it exists, otherwise None.
+                  - 'movie_count' (int): The number of movies with the genre.
         """
         return {
             'id': self.id,
             'name': self.name,
-            'movie_id': self.movie_id,
-            'movie': self.movie.serialize() if self.movie else None,
+            'movie_count': self.movie_count,
             # Add other attributes as needed
         }
 
 class MoviesLog(db.Model):
     __tablename__ = 'movies_logs'
+    __table_args__ = (
+        # Keyset pagination of /api/movie_logs, overall and per filter
+        db.Index('ix_movies_logs_timestamp_id', 'timestamp', 'id'),
+        db.Index('ix_movies_logs_movie_id_timestamp_id', 'movie_id', 'timestamp', 'id'),
+        db.Index('ix_movies_logs_action_timestamp_id', 'action', 'timestamp', 'id'),
+        # Ids are never reused once archive-movie-logs empties the table, so the log
+        # feed's since_id and the archive stay unambiguous
+        {'sqlite_autoincrement': True},
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     movie_id = db.Column(db.Integer)
@@ -224,5 +323,23 @@ class MoviesLog(db.Model):
         self.movie_name = movie_name
         self.action = action
 
+# Daily counts of archived movie logs, kept after the logs move to the archive files
+class MovieLogRollup(db.Model):
+    __tablename__ = 'movies_logs_daily'
+    __table_args__ = (
+        db.Index('ix_movies_logs_daily_movie_id_day', 'movie_id', 'day'),
+    )
 
+    day = db.Column(db.Date, primary_key=True)  # UTC day of the logs
+    movie_id = db.Column(db.Integer, primary_key=True)
+    added = db.Column(db.Integer, nullable=False, default=0)
+    updated = db.Column(db.Integer, nullable=False, default=0)
+    deleted = db.Column(db.Integer, nullable=False, default=0)
 
+# Single-row counter of changes to the movie catalogue, shared by every worker
+class CatalogueVersion(db.Model):
+    __tablename__ = 'catalogue_version'
+
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.datetime.utcnow)  # UTC time of the last change
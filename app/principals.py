@@ -0,0 +1,89 @@
+from collections import namedtuple
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from app.cache import TTLCache
+from app.models import User
+
+# The part of a User that authenticated routes need, detached from any session
+Principal = namedtuple('Principal', ['id', 'name', 'email', 'admin'])
+
+def init_app(app):
+    """
+    Creates the principal cache for the application.
+
+    Args:
+        app: The Flask application object.
+
+    Returns:
+        TTLCache: The principal cache.
+    """
+    cache = TTLCache(maxsize=app.config.get('PRINCIPAL_CACHE_SIZE', 1024),
+                     ttl=app.config.get('PRINCIPAL_CACHE_TTL', 60))
+    app.extensions['principal_cache'] = cache
+    return cache
+
+def get_principal_cache():
+    """
+    Returns the principal cache of the current application, if there is one.
+
+    :return: The principal cache or None.
+    """
+    if not has_app_context():
+        return None
+    return current_app.extensions.get('principal_cache')
+
+def load_principal(claims, db_session):
+    """
+    Returns the principal described by decoded token claims.
+
+    In claims-only mode (``AUTH_CLAIMS_ONLY``) the principal is built from the ``name``
+    and ``admin`` claims without touching the database. Otherwise it is read from the
+    principal cache, falling back to a single ``users`` lookup on a miss.
+
+    Args:
+        claims (dict): The decoded token payload.
+        db_session: The database session used on a cache miss.
+
+    Returns:
+        Principal: The principal, or None if the user does not exist.
+    """
+    user_id = claims.get('sub')
+    if current_app.config.get('AUTH_CLAIMS_ONLY') and 'name' in claims and 'admin' in claims:
+        return Principal(id=user_id, name=claims['name'], email=None, admin=claims['admin'])
+
+    cache = get_principal_cache()
+    principal = cache.get(user_id) if cache is not None else None
+    if principal is None:
+        user = db_session.query(User).filter_by(id=user_id).first()
+        if not user:
+            return None
+        principal = Principal(id=user.id, name=user.name, email=user.email, admin=user.admin)
+        if cache is not None:
+            cache.set(user_id, principal)
+    return principal
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _collect_changed_principal(mapper, connection, target):
+    """
+    Remembers each changed or deleted user on its session until the transaction commits.
+    """
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault('changed_principals', set()).add(target.id)
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_after_commit(session):
+    """
+    Drops the cached principals of the users changed or deleted by a committed transaction.
+    """
+    changed = session.info.pop('changed_principals', None)
+    cache = get_principal_cache() if changed else None
+    if cache is not None:
+        for user_id in changed:
+            cache.pop(user_id)
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_rolled_back_principals(session):
+    session.info.pop('changed_principals', None)
@@ -0,0 +1,282 @@
+import calendar
+import datetime
+import hashlib
+import heapq
+import os
+import sqlite3
+import threading
+import time
+import jwt
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from app.models import BlacklistToken
+
+def token_fingerprint(auth_token):
+    """
+    Returns a fixed-width fingerprint of an authentication token.
+
+    Args:
+        auth_token (str): The authentication token.
+
+    Returns:
+        str: The hex SHA-256 digest of the token.
+    """
+    return hashlib.sha256(str(auth_token).encode('utf-8')).hexdigest()
+
+def token_expiry(auth_token, default_ttl):
+    """
+    Reads the expiry time of a token without verifying it.
+
+    Tokens without a readable ``exp`` claim are kept for ``default_ttl`` seconds,
+    which should be at least the longest lifetime a token can be issued with.
+
+    Args:
+        auth_token (str): The authentication token.
+        default_ttl (int): The fallback lifetime in seconds.
+
+    Returns:
+        float: The expiry time as a UNIX timestamp.
+    """
+    try:
+        payload = jwt.decode(str(auth_token), options={'verify_signature': False, 'verify_exp': False})
+        return float(payload['exp'])
+    except (jwt.InvalidTokenError, KeyError, TypeError, ValueError):
+        return time.time() + default_ttl
+
+class MemoryRevocationBackend:
+    """
+    Process-local backend. Revocations are not shared with other workers.
+    """
+    name = 'memory'
+
+    def add(self, fingerprint, expires_at):
+        pass
+
+    def changes_since(self, cursor):
+        return [], cursor
+
+class SQLiteRevocationBackend:
+    """
+    Shares revocations between workers on the same host through a local SQLite file.
+
+    Each worker appends its revocations to the file and periodically reads the rows
+    written by the others since its last read, so only the delta crosses the process
+    boundary. Rows are removed once their token has expired.
+    """
+    name = 'sqlite'
+
+    def __init__(self, path):
+        self.path = path
+        connection = self._connect()
+        try:
+            with connection:
+                connection.execute(
+                    'CREATE TABLE IF NOT EXISTS revocations ('
+                    'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+                    'fingerprint TEXT NOT NULL UNIQUE, '
+                    'expires_at REAL NOT NULL)'
+                )
+                connection.execute('CREATE INDEX IF NOT EXISTS ix_revocations_expires_at ON revocations (expires_at)')
+        finally:
+            connection.close()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=5)
+
+    def add(self, fingerprint, expires_at):
+        connection = self._connect()
+        try:
+            with connection:
+                connection.execute(
+                    'INSERT OR IGNORE INTO revocations (fingerprint, expires_at) VALUES (?, ?)',
+                    (fingerprint, expires_at)
+                )
+                connection.execute('DELETE FROM revocations WHERE expires_at <= ?', (time.time(),))
+        finally:
+            connection.close()
+
+    def changes_since(self, cursor):
+        connection = self._connect()
+        try:
+            rows = connection.execute(
+                'SELECT id, fingerprint, expires_at FROM revocations WHERE id > ? AND expires_at > ? ORDER BY id',
+                (cursor, time.time())
+            ).fetchall()
+        finally:
+            connection.close()
+        if rows:
+            cursor = rows[-1][0]
+        return [(fingerprint, expires_at) for _, fingerprint, expires_at in rows], cursor
+
+class RevocationCache:
+    """
+    In-memory set of revoked token fingerprints with expiry-based eviction.
+
+    Lookups are a dictionary access. Entries are dropped once the token they describe
+    has expired, because an expired token is rejected before the revocation check runs.
+    """
+
+    def __init__(self, backend=None, sync_interval=1.0, clock=time.time):
+        self.backend = backend or MemoryRevocationBackend()
+        self.sync_interval = sync_interval
+        self.clock = clock
+        self._entries = {}
+        self._expiries = []
+        self._lock = threading.Lock()
+        self._cursor = 0
+        self._next_sync = 0.0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remember(self, fingerprint, expires_at, now):
+        if expires_at <= now or self._entries.get(fingerprint, 0) >= expires_at:
+            return
+        self._entries[fingerprint] = expires_at
+        heapq.heappush(self._expiries, (expires_at, fingerprint))
+
+    def _evict(self, now):
+        while self._expiries and self._expiries[0][0] <= now:
+            expires_at, fingerprint = heapq.heappop(self._expiries)
+            if self._entries.get(fingerprint) == expires_at:
+                del self._entries[fingerprint]
+
+    def _sync(self, now):
+        if now < self._next_sync:
+            return
+        self._next_sync = now + self.sync_interval
+        entries, self._cursor = self.backend.changes_since(self._cursor)
+        for fingerprint, expires_at in entries:
+            self._remember(fingerprint, expires_at, now)
+
+    def revoke(self, fingerprint, expires_at, share=True):
+        """
+        Marks a token fingerprint as revoked until the token expires.
+
+        Args:
+            fingerprint (str): The token fingerprint.
+            expires_at (float): The token expiry as a UNIX timestamp.
+            share (bool, optional): Whether to publish the revocation to the backend. Defaults to True.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._remember(fingerprint, expires_at, self.clock())
+        if share:
+            self.backend.add(fingerprint, expires_at)
+
+    def is_revoked(self, fingerprint):
+        """
+        Checks whether a token fingerprint has been revoked.
+
+        Args:
+            fingerprint (str): The token fingerprint.
+
+        Returns:
+            bool: True if the token is revoked, False otherwise.
+        """
+        now = self.clock()
+        if now >= self._next_sync or (self._expiries and self._expiries[0][0] <= now):
+            with self._lock:
+                self._evict(now)
+                self._sync(now)
+        expires_at = self._entries.get(fingerprint)
+        return expires_at is not None and expires_at > now
+
+    def stats(self):
+        """
+        Returns the size of the cache and the backend in use.
+
+        Returns:
+            dict: The cache statistics.
+        """
+        return {'entries': len(self._entries), 'backend': self.backend.name}
+
+def make_backend(app):
+    """
+    Builds the revocation backend selected by ``REVOCATION_BACKEND``.
+
+    Args:
+        app: The Flask application object.
+
+    Returns:
+        The revocation backend.
+    """
+    backend = app.config.get('REVOCATION_BACKEND', 'memory')
+    if backend == 'sqlite':
+        path = app.config.get('REVOCATION_SQLITE_PATH') or os.path.join(app.instance_path, 'revocations.db')
+        return SQLiteRevocationBackend(path)
+    if backend == 'memory':
+        return MemoryRevocationBackend()
+    raise ValueError(f'Unknown revocation backend: {backend}')
+
+def preload(app, db_session):
+    """
+    Loads the unexpired tokens of the ``blacklist_tokens`` table into the app's cache.
+
+    Args:
+        app: The Flask application object.
+        db_session: The database session to read from.
+
+    Returns:
+        int: The number of tokens loaded.
+    """
+    cache = app.extensions['revocation_cache']
+    query = (db_session.query(BlacklistToken.token_hash, BlacklistToken.expires_at)
+             .filter(BlacklistToken.expires_at > datetime.datetime.utcnow()))
+    count = 0
+    for token_hash, expires_at in query.yield_per(1000):
+        cache.revoke(token_hash, calendar.timegm(expires_at.utctimetuple()), share=False)
+        count += 1
+    return count
+
+def init_app(app):
+    """
+    Creates the revocation cache for the application.
+
+    Args:
+        app: The Flask application object.
+
+    Returns:
+        RevocationCache: The revocation cache.
+    """
+    cache = RevocationCache(make_backend(app), sync_interval=app.config.get('REVOCATION_SYNC_INTERVAL', 1.0))
+    app.extensions['revocation_cache'] = cache
+    return cache
+
+def get_revocation_cache():
+    """
+    Returns the revocation cache of the current application, if there is one.
+
+    :return: The revocation cache or None.
+    """
+    if not has_app_context():
+        return None
+    return current_app.extensions.get('revocation_cache')
+
+@event.listens_for(BlacklistToken, 'after_insert')
+def _collect_revoked_token(mapper, connection, target):
+    """
+    Remembers each blacklisted token on its session until the transaction commits.
+    """
+    session = object_session(target)
+    if session is not None:
+        expires_at = calendar.timegm(target.expires_at.utctimetuple())
+        session.info.setdefault('revoked_tokens', []).append((target.token_hash, expires_at))
+
+@event.listens_for(Session, 'after_commit')
+def _revoke_after_commit(session):
+    """
+    Adds the tokens blacklisted by a committed transaction to the revocation cache.
+    """
+    revoked = session.info.pop('revoked_tokens', None)
+    cache = get_revocation_cache() if revoked else None
+    if cache is not None:
+        for token_hash, expires_at in revoked:
+            cache.revoke(token_hash, expires_at)
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_rolled_back_tokens(session):
+    session.info.pop('revoked_tokens', None)
@@ -1,8 +1,11 @@
+import math
 from flask import Blueprint, current_app, make_response, request, jsonify, render_template
 from app.decorators import token_required
 from app.mail_utils import validate_email
 from app.models import BlacklistToken, User
 from app.database import get_db
+from app.hashing import PasswordHasherBusy
+from app.throttle import get_login_throttle
 auth_bp = Blueprint('auth', __name__, url_prefix='/auth')
 
 db_session = get_db()
@@ -64,6 +67,13 @@ def register():
                 }
                 return make_response(jsonify(responseObject)), 400
 
+        except PasswordHasherBusy as e:
+            db_session.rollback()
+            responseObject = {
+                'status': 'fail',
+                'message': str(e)
+            }
+            return make_response(jsonify(responseObject), 503, {'Retry-After': '1'})
         except Exception as e:
             db_session.rollback()  # Rollback the transaction
             print(str(e))  # Print the exception details for debugging
@@ -94,10 +104,18 @@ def login():
         If the user does not exist:
             - A response object with status code 404 and a failure message.
 
+        If too many attempts were made from the client IP, or too many failed attempts for the email address:
+            - A response object with status code 429 and a Retry-After header.
+
+        If the password hashing pool is saturated:
+            - A response object with status code 503 and a Retry-After header.
+
         If an error occurs during the login process:
             - A response object with status code 500 and an error message.
 
     Note: The authentication token has a default expiry time of 24 hours (86400 seconds).
+    Passwords stored with a bcrypt cost other than ``BCRYPT_LOG_ROUNDS`` are rehashed on a successful login,
+    unless the hashing pool is saturated, in which case the login still succeeds.
     """
     if request.method == 'POST':
         # get the post data
@@ -105,10 +123,27 @@ def login():
             post_data = request.get_json()
         else:
             post_data = request.form
+        # reject throttled attempts before touching the database or bcrypt
+        throttle = get_login_throttle()
+        if throttle is not None and current_app.config.get('LOGIN_THROTTLE_ENABLED', True):
+            retry_after = throttle.check(post_data.get('email'), request.remote_addr)
+            if retry_after:
+                responseObject = {
+                    'status': 'fail',
+                    'message': 'Too many login attempts. Please try again later.'
+                }
+                return make_response(jsonify(responseObject), 429, {'Retry-After': str(math.ceil(retry_after))})
         try:
             # fetch the user data
             user = db_session.query(User).filter_by(email=post_data.get('email')).first()
             if user and user.check_password(post_data.get('password')):
+                if user.needs_rehash():
+                    # Move the stored hash to the configured cost while we know the password
+                    try:
+                        user.password = user._hash_password(post_data.get('password'))
+                        db_session.commit()
+                    except PasswordHasherBusy:
+                        db_session.rollback()  # The upgrade is optional; retry it on a later login
                 # generate the auth token
                 if(current_app.testing):
                     auth_token = user.encode_auth_token(expires_in=5)
@@ -125,17 +160,28 @@ def login():
                     response.set_cookie('auth_token', auth_token, secure=True, httponly=True)
                     return response
             elif user:
+                if throttle is not None:
+                    throttle.record_failure(post_data.get('email'))  # Only failures count against the email
                 responseObject = {
                     'status': 'fail',
                     'message': 'Incorrect password.'
                 }
                 return make_response(jsonify(responseObject)), 400
             else:
+                if throttle is not None:
+                    throttle.record_failure(post_data.get('email'))
                 responseObject = {
                     'status': 'fail',
                     'message': 'User does not exist.'
                 }
                 return make_response(jsonify(responseObject)), 404
+        except PasswordHasherBusy as e:
+            db_session.rollback()
+            responseObject = {
+                'status': 'fail',
+                'message': str(e)
+            }
+            return make_response(jsonify(responseObject), 503, {'Retry-After': '1'})
         except Exception as e:
             db_session.rollback()  # Rollback the transaction
             print(str(e))  # Print the exception details for debugging
@@ -195,6 +241,9 @@ def blacklist_token(auth_token):
     """
     Blacklists the given authentication token.
 
+    The insert also adds the token to the in-memory revocation cache (see
+    :mod:`app.revocation`), which shares it with the other workers.
+
     Parameters:
         auth_token (str): The authentication token to be blacklisted.
 
@@ -1,6 +1,14 @@
 from flask import Blueprint, g, jsonify, render_template, request
 from app.decorators import token_required
-from app.database import get_db
+from app.catalogue import get_catalogue
+from app.database import get_db, get_pool_stats
+from app.hashing import PasswordHasherBusy, get_password_hasher
+from app.mail_utils import get_email_validator
+from app.models import User
+from app.principals import get_principal_cache
+from app.revocation import get_revocation_cache
+from app.suggest import get_suggest_index
+from app.throttle import get_login_throttle
 
 db_session = get_db()
 
@@ -50,6 +58,30 @@ def dashboard():
     else:
         return render_template('user_dashboard.html',  user_name=g.user.name), 200
     
+@core_bp.route('/stats')
+@token_required
+def stats():
+    """
+    Report runtime statistics used to size the service (only admin can access).
+
+    Returns:
+        A JSON response containing the connection pool, revocation cache, principal cache,
+        password hashing, login throttle, email validation, suggest index and movie listing cache statistics and a 200 status code,
+        or a 403 status code if the user is not an admin.
+    """
+    if not g.user.admin:
+        return jsonify(message='Admin privilege required'), 403
+    return jsonify({
+        'db_pool': get_pool_stats(),
+        'revocations': get_revocation_cache().stats(),
+        'principals': get_principal_cache().stats(),
+        'password_hashing': get_password_hasher().stats(),
+        'login_throttle': get_login_throttle().stats(),
+        'email_validation': get_email_validator().stats(),
+        'suggest': get_suggest_index().stats(),
+        'movies_cache': get_catalogue().stats(),
+    }), 200
+
 @core_bp.route('/edit-account', methods=['GET', 'PUT'], endpoint = 'edit-account')
 @token_required
 def edit_account():
@@ -74,11 +106,12 @@ def edit_account():
         - Returns a JSON response with a success or fail status and a message
         - Returns a 200 status code for a successful update
         - Returns a 400 status code if a new password is required but not provided
+        - Returns a 503 status code if the password hashing pool is saturated
         - Returns a 500 status code for any other exception during the update process
     """
     if request.method == 'GET':
         # Retrieve user's name and email for display
-        user = g.user
+        user = db_session.get(User, g.user.id)
         data = {
             'name': user.name,
             'email': user.email
@@ -86,7 +119,7 @@ def edit_account():
         return render_template('edit_account.html', data=data), 200
     elif request.method == 'PUT':
         try:
-            user = g.user  # Get the authenticated user from the token
+            user = db_session.get(User, g.user.id)  # Load the authenticated user for updating
             data = request.get_json()
             new_password = data.get('new_password')
             print(new_password)
@@ -105,6 +138,13 @@ def edit_account():
                 }
                 return jsonify(responseObject), 400
 
+        except PasswordHasherBusy as e:
+            db_session.rollback()
+            responseObject = {
+                'status': 'fail',
+                'message': str(e)
+            }
+            return jsonify(responseObject), 503, {'Retry-After': '1'}
         except Exception as e:
             db_session.rollback()
             responseObject = {
@@ -1,13 +1,152 @@
-from flask import Blueprint, g, jsonify, request
-from app.models import Movie, Genre, MoviesLog
+import base64
+import binascii
+import json
+from flask import Blueprint, current_app, g, jsonify, request, stream_with_context
+from app.models import Movie, Genre, movie_genres
+from app.archive import archive_dir, history_page, read_archive
+from app.audit import (InvalidLogQuery, export_logs, latest_log_id, log_events, logs_page, parse_log_filters,
+                       serialize_log, wait_for_logs)
 from app.database import get_db
 from app.decorators import token_required
-from sqlalchemy import or_
+from app.catalogue import bump_catalogue_version, get_catalogue
+from app.conditional import add_validators, not_modified
+from app.facets import InvalidFacet, compute_facets, parse_facets
+from app.genres import genre_snapshot, normalise_genre_names
+from app.search import apply_search
+from app.suggest import get_suggest_index, sync as sync_suggest_index
+from sqlalchemy import and_, exists, func, or_, select, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
 
 db_session = get_db()
 
 api_bp = Blueprint('api', __name__, url_prefix='/api')
 
+GENRE_MODES = ('any', 'all')
+MOVIE_CACHE_CONTROL = 'private, no-cache'  # Movie details are admin-only
+SORT_COLUMNS = {'imdb_score': Movie.imdb_score, 'popularity': Movie.popularity}
+# Columns read by the listing fast path, as plain rows instead of Movie objects
+LISTING_COLUMNS = (Movie.id, Movie.name, Movie.director, Movie.popularity, Movie.imdb_score)
+
+class InvalidCursor(ValueError):
+    """
+    Raised when a pagination cursor cannot be decoded or does not match the request.
+    """
+
+def encode_cursor(sort_by, order, movie):
+    """
+    Encodes the position after ``movie`` as an opaque pagination cursor.
+
+    Parameters:
+    - sort_by (str): The sort field of the listing.
+    - order (str): The sort order of the listing.
+    - movie: The last movie of the current page, a Movie or a listing row.
+
+    Returns:
+    - str: A URL-safe cursor.
+    """
+    position = [sort_by, order, getattr(movie, sort_by), movie.id]
+    return base64.urlsafe_b64encode(json.dumps(position, separators=(',', ':')).encode('utf-8')).decode('ascii')
+
+def decode_cursor(cursor, sort_by, order):
+    """
+    Decodes a pagination cursor made by :func:`encode_cursor`.
+
+    Parameters:
+    - cursor (str): The cursor sent by the client.
+    - sort_by (str): The sort field of the request.
+    - order (str): The sort order of the request.
+
+    Returns:
+    - tuple: The sort value and id of the last movie of the previous page.
+
+    Raises:
+    - InvalidCursor: If the cursor is malformed or was made for another sort.
+    """
+    try:
+        cursor_sort, cursor_order, value, movie_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        value, movie_id = float(value), int(movie_id)
+    except (binascii.Error, UnicodeError, TypeError, ValueError) as e:
+        raise InvalidCursor('Invalid cursor') from e
+    if (cursor_sort, cursor_order) != (sort_by, order):
+        raise InvalidCursor('Cursor does not match the sort order')
+    return value, movie_id
+
+def serialize_movie_rows(rows):
+    """
+    Serializes listing rows like :meth:`Movie.serialize`, without loading Movie objects.
+
+    The genres of all the rows are read with one query on ``movie_genres``.
+
+    Parameters:
+    - rows (list): Rows of :data:`LISTING_COLUMNS`.
+
+    Returns:
+    - list: The serialized movies, in the order of the rows.
+    """
+    genres = {row.id: [] for row in rows}
+    if genres:
+        links = db_session.execute(
+            select(movie_genres.c.movie_id, Genre.name)
+            .join(Genre, Genre.id == movie_genres.c.genre_id)
+            .where(movie_genres.c.movie_id.in_(list(genres)))
+            .order_by(Genre.name)
+        )
+        for movie_id, name in links:
+            genres[movie_id].append(name)
+    return [{
+        'id': movie_id,
+        'name': name,
+        'director': director,
+        'genre': genres[movie_id],
+        'popularity': popularity,
+        'imdb_score': imdb_score,
+    } for movie_id, name, director, popularity, imdb_score in rows]
+
+def parse_genres(args):
+    """
+    Reads the genre filter from the query string.
+
+    Genres may be given as repeated ``genre`` parameters, as a comma-separated list,
+    or both. Names are stripped and duplicates dropped.
+
+    Parameters:
+    - args: The request arguments.
+
+    Returns:
+    - list: The requested genre names, in order.
+    """
+    genres = []
+    for value in args.getlist('genre'):
+        for name in value.split(','):
+            name = name.strip()
+            if name and name not in genres:
+                genres.append(name)
+    return genres
+
+def genre_filter_clause(genres, mode='any'):
+    """
+    Builds a filter on movies that have the given genres.
+
+    Each genre becomes an EXISTS subquery on ``movie_genres``, probed through its primary
+    key with the genre id looked up from the unique genre name, so the whole filter runs
+    inside the movies query instead of shipping movie ids back and forth.
+
+    Parameters:
+    - genres (list): The genre names.
+    - mode (str): 'any' to match movies with at least one of the genres, 'all' to
+      match movies with every one of them.
+
+    Returns:
+    - The SQL filter clause.
+    """
+    if mode == 'all':
+        return and_(*(exists().where(movie_genres.c.movie_id == Movie.id,
+                                     movie_genres.c.genre_id == select(Genre.id).where(Genre.name == name).scalar_subquery())
+                      for name in genres))
+    return exists().where(movie_genres.c.movie_id == Movie.id,
+                          movie_genres.c.genre_id.in_(select(Genre.id).where(Genre.name.in_(genres))))
+
 # both and user can access 
 @api_bp.route('/get_movies', methods=['GET'])
 @token_required
@@ -17,64 +156,212 @@ def get_movies():
 
     Parameters:
     - page (int): The page number of the movie list to retrieve (default: 1).
-    - genre (str): The genre of the movies to filter by (default: '').
+    - genre (str): The genre of the movies to filter by (default: ''). Repeat the parameter or
+      separate names with commas to filter by several genres.
+    - genre_mode (str): 'any' to match movies with at least one of the genres, 'all' to match
+      movies with every one of them (default: 'any').
     - sort (str): The field to sort the movies by ('imdb_score' or 'popularity', default: 'imdb_score').
+      With a search, 'relevance' orders the best matches first.
     - order (str): The order to sort the movies in ('asc' or 'desc', default: 'asc').
-    - search (str): The search query to filter movies by name or director (default: '').
+    - search (str): The search query to filter movies by name or director (default: ''). Every
+      word must prefix-match a word of the name or director.
+    - per_page (int): The number of movies per page (default: 10, at most MOVIES_MAX_PER_PAGE).
+    - cursor (str): Switches to keyset pagination. Send it empty for the first page, then
+      pass back the returned next_cursor. 'page' is ignored in this mode.
+    - count (bool): In cursor mode, also return the total number of movies (default: false).
+    - facets (str): Comma-separated facets to compute over the filtered movies: 'genre',
+      'imdb_score', 'popularity', or 'all' (default: none).
 
     Returns:
     - response (json): A JSON object containing the list of movies and the total number of pages.
         - movies (list): A list of movie objects, each containing the movie details.
         - total_pages (int): The total number of pages in the movie list.
+      In cursor mode the object contains 'movies', 'next_cursor' (None on the last page)
+      and, when requested, 'total'. With 'facets', a 'facets' object holds the genre counts
+      and the score and popularity histograms of all the filtered movies, not just the page.
 
     Example Usage:
     GET /get_movies?page=1&genre=action&sort=imdb_score&order=desc&search=matrix
+    GET /get_movies?genre=Action,Adventure&genre_mode=all
+    GET /get_movies?cursor=&per_page=50&sort=popularity&order=desc
+    GET /get_movies?genre=Drama&facets=genre,imdb_score
     
     """
     page = request.args.get('page', 1, type=int)
-    genre_filter = request.args.get('genre', '', type=str)
+    per_page = request.args.get('per_page', current_app.config.get('MOVIES_PER_PAGE', 10), type=int)
+    per_page = max(1, min(per_page, current_app.config.get('MOVIES_MAX_PER_PAGE', 100)))
+    cursor = request.args.get('cursor', type=str)
+    with_count = request.args.get('count', '', type=str).lower() in ('1', 'true', 'yes')
+    genres = parse_genres(request.args)
+    genre_mode = request.args.get('genre_mode', 'any', type=str)
     sort_by = request.args.get('sort', 'imdb_score', type=str)
     order = request.args.get('order', 'asc', type=str)
     search_query = request.args.get('search', '', type=str)
 
-    movies_query = Movie.query
+    try:
+        facets = parse_facets(request.args.get('facets', '', type=str))
+    except InvalidFacet as e:
+        return jsonify(message=str(e)), 400
+    if genre_mode not in GENRE_MODES:
+        return jsonify(message="genre_mode must be 'any' or 'all'"), 400
+    if cursor is not None and sort_by not in SORT_COLUMNS:
+        return jsonify(message="sort must be 'imdb_score' or 'popularity' with a cursor"), 400
+
+    # Responses are cached per normalised parameters until the catalogue changes
+    key = (page if cursor is None else None, per_page, cursor, with_count and cursor is not None,
+           tuple(genres), genre_mode if genres else None, sort_by, order, search_query.strip().lower(), facets)
+    catalogue = get_catalogue()
+    catalogue.sync(db_session)
+    etag = f'catalogue-{catalogue.version}'
+    unchanged = not_modified(etag, catalogue.modified_at)
+    if unchanged is not None:
+        return unchanged
+
+    version, response = catalogue.lookup(key)
+    if response is None:
+        try:
+            response = query_movies(page, per_page, cursor, with_count, genres, genre_mode,
+                                    sort_by, order, search_query.strip(), facets)
+        except InvalidCursor as e:
+            return jsonify(message=str(e)), 400
+        catalogue.store(version, key, response)
+    return add_validators(jsonify(response), f'catalogue-{version}', catalogue.modified_at), 200
+
+def query_movies(page, per_page, cursor, with_count, genres, genre_mode, sort_by, order, search_query, facets=()):
+    """
+    Runs a movie listing query for :func:`get_movies`.
 
-    if genre_filter:
-        genre_movies = db_session.query(Genre.movie_id).filter_by(name=genre_filter).all()
-        movie_ids = [movie_id for movie_id, in genre_movies]
-        movies_query = movies_query.filter(Movie.id.in_(movie_ids))
+    Parameters:
+    - page (int): The page number, ignored in cursor mode.
+    - per_page (int): The number of movies per page.
+    - cursor (str): The keyset cursor, or None for page-number pagination.
+    - with_count (bool): In cursor mode, whether to include the total number of movies.
+    - genres (list): The genre names to filter by.
+    - genre_mode (str): 'any' or 'all'.
+    - sort_by (str): The sort field.
+    - order (str): 'asc' or 'desc'.
+    - search_query (str): The search text, or ''.
+    - facets (tuple): The facets to add to the response, see :func:`app.facets.parse_facets`.
 
-    if sort_by == 'imdb_score':
-        if order == 'asc':
-            movies_query = movies_query.order_by(Movie.imdb_score.asc())
-        else:
-            movies_query = movies_query.order_by(Movie.imdb_score.desc())
-    elif sort_by == 'popularity':
-        if order == 'asc':
-            movies_query = movies_query.order_by(Movie.popularity.asc())
-        else:
-            movies_query = movies_query.order_by(Movie.popularity.desc())
+    Returns:
+    - dict: The response body.
+
+    Raises:
+    - InvalidCursor: If the cursor is malformed or was made for another sort.
+    """
+    movies_query = Movie.query
+
+    if genres:
+        movies_query = movies_query.filter(genre_filter_clause(genres, genre_mode))
 
     if search_query:
         # Check if search query is a numeric value (ID search)
         if search_query.isdigit():
             movies_query = movies_query.filter(or_(Movie.id == int(search_query)))
         else:
-            movies_query = movies_query.filter(or_(Movie.name.ilike(f'%{search_query}%'),
-                                                   Movie.director.ilike(f'%{search_query}%')))
+            movies_query = apply_search(movies_query, search_query, ranked=(sort_by == 'relevance'))
 
+    # Facets cover every filtered movie, so they are counted before ordering and paging
+    facet_counts = None
+    if facets:
+        facet_counts = compute_facets(db_session, movies_query, facets, filtered=bool(genres or search_query))
 
-    per_page = 10
-    movies = movies_query.paginate(page=page, per_page=per_page, error_out=False)
+    # Pages are read as column tuples, skipping the identity map, and their genres batched
+    movies_query = movies_query.with_entities(*LISTING_COLUMNS)
 
-    movies_list = []
-    for movie in movies.items:
-        movies_list.append(movie.serialize())
+    # Ties are broken by id so that every page boundary is well defined
+    sort_column = SORT_COLUMNS.get(sort_by)
+    if sort_column is not None:
+        if order == 'asc':
+            movies_query = movies_query.order_by(sort_column.asc(), Movie.id.asc())
+        else:
+            movies_query = movies_query.order_by(sort_column.desc(), Movie.id.desc())
+
+    if cursor is not None:
+        response = get_movies_page(movies_query, sort_by, order, cursor, per_page, with_count)
+    else:
+        movies = movies_query.paginate(page=page, per_page=per_page, error_out=False)
+
+        response = {
+            'movies': serialize_movie_rows(movies.items),
+            'total_pages': movies.pages
+        }
+    if facet_counts is not None:
+        response['facets'] = facet_counts
+    return response
+
+def get_movies_page(movies_query, sort_by, order, cursor, per_page, with_count=False):
+    """
+    Returns one page of a keyset-paginated movie listing.
+
+    The page starts right after the ``(sort value, id)`` position held by the cursor, so
+    the database seeks into the ``(sort column, id)`` index instead of skipping rows, and
+    no COUNT(*) is run unless ``with_count`` is set.
 
-    return jsonify({
-        'movies': movies_list,
-        'total_pages': movies.pages
-    }), 200
+    Parameters:
+    - movies_query: The filtered and ordered movies query.
+    - sort_by (str): 'imdb_score' or 'popularity'.
+    - order (str): 'asc' or 'desc'.
+    - cursor (str): The cursor sent by the client, empty for the first page.
+    - per_page (int): The number of movies per page.
+    - with_count (bool): Whether to include the total number of matching movies.
+
+    Returns:
+    - dict: The movies and the next cursor, plus the total when requested.
+
+    Raises:
+    - InvalidCursor: If the cursor is malformed or was made for another sort.
+    """
+    total = movies_query.order_by(None).count() if with_count else None
+    if cursor:
+        value, movie_id = decode_cursor(cursor, sort_by, order)
+        position = tuple_(SORT_COLUMNS[sort_by], Movie.id)
+        if order == 'asc':
+            movies_query = movies_query.filter(position > tuple_(value, movie_id))
+        else:
+            movies_query = movies_query.filter(position < tuple_(value, movie_id))
+
+    movies = movies_query.limit(per_page + 1).all()
+    next_cursor = encode_cursor(sort_by, order, movies[per_page - 1]) if len(movies) > per_page else None
+
+    response = {
+        'movies': serialize_movie_rows(movies[:per_page]),
+        'next_cursor': next_cursor
+    }
+    if with_count:
+        response['total'] = total
+    return response
+
+# both admin and user can access
+@api_bp.route('/suggest', methods=['GET'])
+@token_required
+def suggest():
+    """
+    Suggests movies for a search box as the user types.
+
+    Served from the in-memory prefix index over movie and director names. The database
+    is only read to check the shared catalogue version, at most every
+    CATALOGUE_SYNC_INTERVAL seconds, and to read the movies another worker changed
+    since the index was last brought up to date.
+
+    Parameters:
+    - q (str): The text typed so far. Any word of the name or director may start with it.
+    - limit (int): The number of suggestions (default: 10, at most 50).
+
+    Returns:
+    - response (json): A JSON object with 'suggestions', the most popular matches first, each
+      with the movie 'id', 'name', 'director', 'popularity' and the 'field' that matched.
+
+    Example Usage:
+    GET /suggest?q=star%20wa&limit=5
+    """
+    prefix = request.args.get('q', '', type=str)
+    limit = max(1, min(request.args.get('limit', 10, type=int), 50))
+    index = get_suggest_index()
+    if index is None:
+        return jsonify({'suggestions': []}), 200
+    sync_suggest_index(current_app, db_session)  # Pick up changes made by other workers
+    return jsonify({'suggestions': index.suggest(prefix, limit)}), 200
 
 # both admin and user can access
 @api_bp.route('/get_genres', methods=['GET'])
@@ -83,12 +370,23 @@ def get_genres():
     """
     Get the list of all genres.
 
+    Served from the in-process snapshot of the movie counts kept on ``genres``, which movie writes
+    keep up to date, so no query runs while the catalogue is unchanged.
+
     Returns:
-        A JSON response containing the list of unique genres and HTTP status code 200.
+        A JSON response containing the list of unique genres, the number of movies per
+        genre and HTTP status code 200.
     """
-    genres = db_session.query(Genre.name.distinct()).all()
-    unique_genres = [genre[0] for genre in genres]
-    return jsonify({'genres': unique_genres}), 200
+    catalogue = get_catalogue()
+    catalogue.sync(db_session)
+    etag = f'genres-{catalogue.version}'
+    unchanged = not_modified(etag, catalogue.modified_at)
+    if unchanged is not None:
+        return unchanged
+
+    snapshot = genre_snapshot(db_session)
+    response = {'genres': [name for name, _ in snapshot], 'counts': dict(snapshot)}
+    return add_validators(jsonify(response), etag, catalogue.modified_at), 200
 
 # only admin can access
 @api_bp.route('/movies', methods=['POST'])
@@ -109,7 +407,7 @@ def add_movie():
 
     Side Effects:
     - Creates a new movie record in the database.
-    - Creates a new log entry in the MoviesLog table.
+    - Creates a new log entry in the MoviesLog table, in the same transaction (see :mod:`app.audit`).
 
     Example Usage:
     ```
@@ -143,13 +441,9 @@ def add_movie():
     new_movie.set_genre(genre_list)
 
     db_session.add(new_movie)
-    db_session.commit()
+    bump_catalogue_version(db_session)
+    db_session.commit()  # The audit hook logs the addition in the same transaction
 
-    # Log the movie addition here (if needed)
-    log = MoviesLog(movie_id=new_movie.id, movie_name=new_movie.name, action='ADDED')
-    db_session.add(log)
-    db_session.commit()
-    
     return jsonify(message='Movie added successfully!'), 201
 
 # only admin can access
@@ -177,12 +471,23 @@ def manage_movie(movie_id):
     if not g.user.admin:
         return jsonify(message='Admin privilege required'), 403
     
-    movie = db_session.get(Movie, movie_id)
-    movieID = movie.id
-    movieName = movie.name
     if request.method == 'GET':
-        if movie:
-            return jsonify(movie.serialize())
+        # Validate against updated_at before loading and serialising the movie
+        updated_at = db_session.query(Movie.updated_at).filter(Movie.id == movie_id).scalar()
+        if updated_at is None:
+            return jsonify(message='Movie not found'), 404
+        etag = f'movie-{movie_id}-{updated_at:%Y%m%d%H%M%S%f}'
+        unchanged = not_modified(etag, updated_at, MOVIE_CACHE_CONTROL)
+        if unchanged is not None:
+            return unchanged
+        movie = db_session.get(Movie, movie_id)
+        return add_validators(jsonify(movie.serialize()), etag, updated_at, MOVIE_CACHE_CONTROL)
+
+    movie = db_session.get(Movie, movie_id)
+    if movie is None:
+        return jsonify(message='Movie not found'), 404
+
+    # Each write is one transaction; the audit hook adds its MoviesLog row
 
     if request.method == 'PUT':
         data = request.get_json()
@@ -192,54 +497,291 @@ def manage_movie(movie_id):
         movie.imdb_score = data.get('imdb_score', movie.imdb_score)
         genre_list = data.get('genre', [])
         movie.set_genre(genre_list)
-        db_session.commit()
-        # Log the movie update here (if needed)
-        log = MoviesLog(movie_id=movie.id, movie_name=movie.name, action='UPDATED')
-        db_session.add(log)
+        bump_catalogue_version(db_session)
         db_session.commit()
         return jsonify(message='Movie updated successfully!'), 200
 
     if request.method == 'DELETE':
-        db_session.query(Genre).filter(Genre.movie_id == movie_id).delete()
-        db_session.commit()
-        db_session.query(Movie).filter(Movie.id == movie_id).delete()
-        db_session.commit()
-        # Log the movie deletion here (if needed)
-        log = MoviesLog(movie_id=movieID, movie_name=movieName, action='DELETED')
-        db_session.add(log)
+        db_session.delete(movie)  # Through the ORM so the genre links and the suggest index follow
+        bump_catalogue_version(db_session)
         db_session.commit()
         return jsonify(message='Movie deleted successfully!'), 200
 
+BATCH_OPERATIONS = ('upsert', 'delete')
+MOVIE_FIELDS = ('name', 'director', 'popularity', 'imdb_score', 'genre')
+
+def parse_batch_operation(item):
+    """
+    Validates one operation of a batch request.
+
+    Parameters:
+    - item (dict): ``{"op": "upsert", "id": ..., <movie fields>}`` or ``{"op": "delete", "id": ...}``.
+      The id of an upsert is optional; without it a new movie is created.
+
+    Returns:
+    - tuple: The operation, the movie id or None, and the given movie fields with genre
+      names cleaned up.
+
+    Raises:
+    - ValueError: If the operation is malformed.
+    """
+    if not isinstance(item, dict):
+        raise ValueError('Operation must be an object')
+    op = item.get('op')
+    if op not in BATCH_OPERATIONS:
+        raise ValueError("op must be 'upsert' or 'delete'")
+    movie_id = item.get('id')
+    if movie_id is not None and (isinstance(movie_id, bool) or not isinstance(movie_id, int) or movie_id < 1):
+        raise ValueError('id must be a positive integer')
+    if op == 'delete':
+        if movie_id is None:
+            raise ValueError('delete requires an id')
+        return op, movie_id, {}
+
+    fields = {}
+    for field in ('name', 'director'):
+        if field in item:
+            if not isinstance(item[field], str) or not item[field].strip():
+                raise ValueError(f'{field} must be a non-empty string')
+            fields[field] = item[field].strip()
+    for field in ('popularity', 'imdb_score'):
+        if field in item:
+            if isinstance(item[field], bool) or not isinstance(item[field], (int, float)):
+                raise ValueError(f'{field} must be a number')
+            fields[field] = float(item[field])
+    if 'genre' in item:
+        if not isinstance(item['genre'], list) or not all(isinstance(name, str) for name in item['genre']):
+            raise ValueError('genre must be a list of names')
+        fields['genre'] = normalise_genre_names(item['genre'])
+    return op, movie_id, fields
+
+# only admin can access
+@api_bp.route('/movies/batch', methods=['POST'])
+@token_required
+def batch_movies():
+    """
+    Applies a batch of movie upserts and deletes in a single transaction.
+
+    The movies touched by the batch are loaded with one query and the writes are flushed
+    together, so the ORM batches the INSERT, UPDATE and DELETE statements and the audit
+    hook inserts the MoviesLog rows with one statement. Either every operation is
+    applied or none is.
+
+    Request Body:
+    - operations (list): The operations, applied in order. A bare list is accepted too.
+        - op (str): 'upsert' or 'delete'.
+        - id (int): The movie id. Required for 'delete'. For 'upsert', an existing movie is
+          updated with the given fields; otherwise a movie is created with every field.
+          Each id may appear once per batch.
+        - name, director, popularity, imdb_score, genre: The movie fields of an upsert.
+
+    Returns:
+    - response (json): ``{"results": [...]}`` with one entry per operation, holding its
+      'index', 'op', 'id' and 'status' ('created', 'updated', 'deleted' or 'not_found').
+      Invalid batches get a 400 response whose results carry the 'error' of each
+      invalid operation; nothing is written then.
+
+    Example Usage:
+    POST /api/movies/batch
+    {"operations": [{"op": "upsert", "name": "Movie", "director": "Director", "popularity": 80,
+                     "imdb_score": 8.1, "genre": ["Drama"]},
+                    {"op": "upsert", "id": 12, "imdb_score": 7.9},
+                    {"op": "delete", "id": 13}]}
+    """
+    if not g.user.admin:
+        return jsonify(message='Admin privilege required'), 403
+
+    data = request.get_json(silent=True)
+    items = data.get('operations') if isinstance(data, dict) else data
+    if not isinstance(items, list) or not items:
+        return jsonify(message='Expected a non-empty list of operations'), 400
+    max_operations = current_app.config.get('MOVIES_BATCH_MAX', 1000)
+    if len(items) > max_operations:
+        return jsonify(message=f'At most {max_operations} operations per batch'), 400
+
+    operations = []
+    errors = []
+    seen = set()
+    for index, item in enumerate(items):
+        try:
+            operation = parse_batch_operation(item)
+            if operation[1] in seen:
+                raise ValueError('Each id may appear once per batch')
+        except ValueError as e:
+            errors.append({'index': index, 'error': str(e)})
+            continue
+        operations.append(operation)
+        if operation[1] is not None:
+            seen.add(operation[1])
+    if errors:
+        return jsonify(message='Invalid operations; nothing was applied', results=errors), 400
+
+    # Bumping the version first takes SQLite's write lock, so the ids handed out below stay
+    # free until the commit, and new movies can be inserted with one executemany
+    bump_catalogue_version(db_session)
+    ids = {movie_id for _, movie_id, _ in operations if movie_id is not None}
+    next_id = max([db_session.query(func.max(Movie.id)).scalar() or 0, *ids]) + 1
+    movies = {}
+    if ids:
+        # Genres are loaded up front so re-genring and deleting need no lazy loads
+        movies = {movie.id: movie for movie in
+                  Movie.query.filter(Movie.id.in_(ids)).options(selectinload(Movie.genres))}
+
+    results = []
+    for index, (op, movie_id, fields) in enumerate(operations):
+        movie = movies.get(movie_id)
+        result = {'index': index, 'op': op, 'id': movie_id}
+        if op == 'delete':
+            if movie is None:
+                result['status'] = 'not_found'
+            else:
+                db_session.delete(movie)
+                result['status'] = 'deleted'
+        else:
+            if movie is None:
+                missing = [field for field in MOVIE_FIELDS if field not in fields and field != 'genre']
+                if missing:
+                    db_session.rollback()
+                    return jsonify(message='Invalid operations; nothing was applied',
+                                   results=[{'index': index, 'error': f"Missing fields: {', '.join(missing)}"}]), 400
+                if movie_id is None:
+                    movie_id, next_id = next_id, next_id + 1
+                movie = Movie(id=movie_id)
+                db_session.add(movie)
+                result.update(id=movie_id, status='created')
+            else:
+                result['status'] = 'updated'
+            for field, value in fields.items():
+                if field == 'genre':
+                    movie.set_genre(value)
+                else:
+                    setattr(movie, field, value)
+        results.append(result)
+
+    try:
+        db_session.commit()
+    except IntegrityError as e:
+        db_session.rollback()
+        return jsonify(message=f'The batch could not be applied: {e.orig}'), 409
+    return jsonify(results=results), 200
+
 # Flask route to get movie logs(only admin can access)
 @api_bp.route('/movie_logs', methods=['GET'])
 @token_required
 def get_movie_logs():
     """
-    Get movie logs from the database and serialize them.
+    Get a page of movie logs, or export every matching log as a stream.
+
+    Parameters:
+    - limit (int): The number of logs per page (default: 100, at most MOVIE_LOGS_MAX_PER_PAGE).
+    - cursor (str): The next_cursor of the previous page.
+    - order (str): 'desc' for the newest logs first, or 'asc' (default: 'desc').
+    - action (str): Only return these actions ('ADDED', 'UPDATED', 'DELETED'). Repeat the
+      parameter or separate actions with commas.
+    - movie_id (int): Only return the logs of this movie.
+    - since (str): Only return logs at or after this ISO 8601 time (UTC unless given).
+    - until (str): Only return logs before this ISO 8601 time.
+    - format (str): 'ndjson' or 'csv' to stream every matching log, oldest first, instead
+      of returning a page.
+    - history (bool): 'true' to include the logs moved to the archive files by the
+      archive-movie-logs command. Slower, as the archive files are read.
 
     Returns:
-        A JSON response containing a list of serialized movie logs.
+        A JSON response with the serialized movie logs and 'next_cursor', which is None
+        on the last page; or the streamed export.
 
     Raises:
         403 Forbidden: If the user is not an admin.
 
     Example Usage:
-        response = get_movie_logs()
+        GET /api/movie_logs?action=DELETED&since=2023-10-01&limit=50
+        GET /api/movie_logs?movie_id=12&format=csv
+        GET /api/movie_logs?movie_id=12&history=true
     """
     if not g.user.admin:
         return jsonify(message='Admin privilege required'), 403
-    # Query movie logs from the database
-    logs = db_session.query(MoviesLog).all()
-
-    # Serialize the logs
-    logs_list = []
-    for log in logs:
-        logs_list.append({
-            'id': log.id,
-            'movie_id': log.movie_id,
-            'movie_name': log.movie_name,
-            'action': log.action,
-            'timestamp': log.timestamp.strftime('%Y-%m-%d %H:%M:%S')
+
+    order = request.args.get('order', 'desc', type=str)
+    file_format = request.args.get('format', type=str)
+    limit = request.args.get('limit', 100, type=int)
+    limit = max(1, min(limit, current_app.config.get('MOVIE_LOGS_MAX_PER_PAGE', 1000)))
+    if order not in ('asc', 'desc'):
+        return jsonify(message="order must be 'asc' or 'desc'"), 400
+    if file_format not in (None, 'ndjson', 'csv'):
+        return jsonify(message="format must be 'ndjson' or 'csv'"), 400
+    history = request.args.get('history', '').lower() in ('1', 'true', 'yes')
+    try:
+        filters = parse_log_filters(request.args)
+        if file_format is None and history:
+            return jsonify(history_page(db_session, archive_dir(), filters, order, request.args.get('cursor'),
+                                        limit)), 200
+        if file_format is None:
+            return jsonify(logs_page(db_session, filters, order, request.args.get('cursor'), limit)), 200
+    except InvalidLogQuery as e:
+        return jsonify(message=str(e)), 400
+
+    archived = read_archive(archive_dir(), filters) if history else ()
+    chunks = export_logs(db_session, filters, file_format, dumps=current_app.json.dumps, archived=archived)
+    mimetype = 'application/x-ndjson' if file_format == 'ndjson' else 'text/csv'
+    return current_app.response_class(stream_with_context(chunks), mimetype=mimetype, headers={
+        'Content-Disposition': f'attachment; filename=movie_logs.{file_format}'
+    })
+
+@api_bp.route('/movie_logs/feed', methods=['GET'])
+@token_required
+def get_movie_log_feed():
+    """
+    Get the movie logs written after a given log, waiting for new ones if there are none.
+
+    Parameters:
+    - since_id (int): The id of the newest log the client has (default: the newest log,
+      so only logs written from now on are returned). The Last-Event-ID header of a
+      reconnecting event stream takes precedence.
+    - wait (float): Seconds to wait for a new log before returning an empty list
+      (default: 0, at most MOVIE_LOG_FEED_MAX_WAIT).
+    - limit (int): The most logs to return (default: 100, at most MOVIE_LOGS_MAX_PER_PAGE).
+    - stream (str): 'sse' to receive logs as Server-Sent Events, as does an
+      'Accept: text/event-stream' header. The stream sends keep-alive comments and
+      closes after MOVIE_LOG_FEED_STREAM_DURATION seconds.
+
+    Returns:
+        A JSON response with the new logs, oldest first, and 'last_id' to pass as
+        since_id next time; or the event stream.
+
+    Raises:
+        403 Forbidden: If the user is not an admin.
+
+    Example Usage:
+        GET /api/movie_logs/feed?since_id=120&wait=25
+        GET /api/movie_logs/feed?since_id=120&stream=sse
+    """
+    if not g.user.admin:
+        return jsonify(message='Admin privilege required'), 403
+
+    config = current_app.config
+    stream = request.args.get('stream', type=str)
+    if stream not in (None, 'sse'):
+        return jsonify(message="stream must be 'sse'"), 400
+    stream = stream == 'sse' or request.accept_mimetypes.best == 'text/event-stream'
+    since_id = request.headers.get('Last-Event-ID', type=int) if stream else None
+    if since_id is None:
+        since_id = request.args.get('since_id', type=int)
+    if since_id is None:
+        since_id = latest_log_id(db_session)
+    limit = request.args.get('limit', 100, type=int)
+    limit = max(1, min(limit, config.get('MOVIE_LOGS_MAX_PER_PAGE', 1000)))
+    poll_interval = config.get('MOVIE_LOG_FEED_POLL_INTERVAL', 1.0)
+
+    if stream:
+        events = log_events(db_session, since_id, config.get('MOVIE_LOG_FEED_STREAM_DURATION', 300),
+                            config.get('MOVIE_LOG_FEED_KEEPALIVE', 15), limit, poll_interval,
+                            dumps=current_app.json.dumps)
+        return current_app.response_class(stream_with_context(events), mimetype='text/event-stream', headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'  # Keep reverse proxies from holding events back
         })
 
-    return jsonify({'logs': logs_list}), 200
+    wait = request.args.get('wait', 0.0, type=float)
+    wait = max(0.0, min(wait, config.get('MOVIE_LOG_FEED_MAX_WAIT', 25)))
+    rows = wait_for_logs(db_session, since_id, limit, wait, poll_interval)
+    return jsonify(logs=[serialize_log(row) for row in rows], last_id=rows[-1].id if rows else since_id), 200
@@ -0,0 +1,136 @@
+import re
+from flask import current_app, has_app_context
+from sqlalchemy import column, event, literal_column, or_, select, table, text
+from sqlalchemy.exc import OperationalError
+from app.database import db
+from app.models import Movie
+
+FTS_TABLE = 'movies_fts'
+
+# External-content FTS5 index over movies; the triggers keep it in step with every write,
+# including the bulk core inserts of the importers
+FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS movies_fts USING fts5("
+    "name, director, content='movies', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "CREATE TRIGGER IF NOT EXISTS movies_fts_ai AFTER INSERT ON movies BEGIN "
+    "INSERT INTO movies_fts(rowid, name, director) VALUES (new.id, new.name, new.director); END",
+    "CREATE TRIGGER IF NOT EXISTS movies_fts_ad AFTER DELETE ON movies BEGIN "
+    "INSERT INTO movies_fts(movies_fts, rowid, name, director) VALUES ('delete', old.id, old.name, old.director); END",
+    "CREATE TRIGGER IF NOT EXISTS movies_fts_au AFTER UPDATE OF name, director ON movies BEGIN "
+    "INSERT INTO movies_fts(movies_fts, rowid, name, director) VALUES ('delete', old.id, old.name, old.director); "
+    "INSERT INTO movies_fts(rowid, name, director) VALUES (new.id, new.name, new.director); END",
+]
+FTS_OBJECTS = {FTS_TABLE, 'movies_fts_ai', 'movies_fts_ad', 'movies_fts_au'}
+
+movies_fts = table(FTS_TABLE, column('rowid'), column('rank'))
+
+def install_fts(engine):
+    """
+    Creates the FTS5 index and its triggers if they are missing.
+
+    When anything had to be created, e.g. after the ``movies`` table was recreated,
+    the index is rebuilt from ``movies``.
+
+    Args:
+        engine: The SQLAlchemy engine of the application.
+
+    Returns:
+        bool: True if full-text search is available, False if the database lacks FTS5.
+    """
+    if engine.dialect.name != 'sqlite':
+        return False
+    try:
+        with engine.begin() as connection:
+            existing = {name for name, in connection.execute(text(
+                "SELECT name FROM sqlite_master WHERE name IN ('movies_fts', 'movies_fts_ai', "
+                "'movies_fts_ad', 'movies_fts_au')"))}
+            if existing != FTS_OBJECTS:
+                for statement in FTS_DDL:
+                    connection.execute(text(statement))
+                connection.execute(text("INSERT INTO movies_fts(movies_fts) VALUES ('rebuild')"))
+    except OperationalError as e:
+        print("Full-text search unavailable, falling back to LIKE: " + str(e))
+        return False
+    return True
+
+@event.listens_for(Movie.__table__, 'after_drop')
+def drop_fts(target, connection, **kw):
+    """
+    Drops the FTS5 index together with the ``movies`` table it indexes.
+    """
+    if connection.dialect.name == 'sqlite':
+        connection.execute(text(f'DROP TABLE IF EXISTS {FTS_TABLE}'))
+
+def init_app(app):
+    """
+    Sets up full-text search for the application.
+
+    Must run inside an application context, after the tables have been created.
+    ``SEARCH_FTS_ENABLED`` turns the FTS5 index off, leaving the LIKE fallback.
+
+    Args:
+        app: The Flask application object.
+
+    Returns:
+        bool: True if searches use the FTS5 index.
+    """
+    enabled = app.config.get('SEARCH_FTS_ENABLED', True) and install_fts(db.engine)
+    app.extensions['movie_search'] = {'fts': enabled}
+    return enabled
+
+def fts_enabled():
+    """
+    Checks whether the current application searches with the FTS5 index.
+
+    :return: True if the FTS5 index is installed and enabled.
+    """
+    if not has_app_context():
+        return False
+    return current_app.extensions.get('movie_search', {}).get('fts', False)
+
+def match_expression(query):
+    """
+    Turns free text into an FTS5 query matching every word as a prefix.
+
+    Each word is quoted, so FTS5 operators and punctuation in the input are inert.
+
+    Args:
+        query (str): The text typed by the user, e.g. ``"dark kni"``.
+
+    Returns:
+        str: The MATCH expression, e.g. ``'"dark"* "kni"*'``, or None if there are no words.
+    """
+    words = re.findall(r'\w+', query)
+    if not words:
+        return None
+    return ' '.join(f'"{word}"*' for word in words)
+
+def apply_search(movies_query, query, ranked=False):
+    """
+    Restricts a movies query to the movies whose name or director match ``query``.
+
+    With the FTS5 index every word of ``query`` must prefix-match a word of the name or
+    director, and ``ranked`` orders the results by bm25 relevance. Without it the query
+    falls back to a substring match on name or director, and ``ranked`` has no effect.
+
+    Args:
+        movies_query: The movies query to restrict.
+        query (str): The text typed by the user.
+        ranked (bool, optional): Whether to order the results by relevance. Defaults to False.
+
+    Returns:
+        The restricted query.
+    """
+    expression = match_expression(query) if fts_enabled() else None
+    if expression is None:
+        return movies_query.filter(or_(Movie.name.ilike(f'%{query}%'),
+                                       Movie.director.ilike(f'%{query}%')))
+
+    matches = select(movies_fts.c.rowid.label('movie_id'), movies_fts.c.rank.label('rank')) \
+        .where(literal_column(FTS_TABLE).op('MATCH')(expression)) \
+        .subquery()
+    movies_query = movies_query.join(matches, matches.c.movie_id == Movie.id)
+    if ranked:
+        movies_query = movies_query.order_by(matches.c.rank, Movie.id)
+    return movies_query
@@ -28,7 +28,7 @@ document.addEventListener('DOMContentLoaded', () => {
             if (response.status === 201) {
                 // After successful addition, add a new row to the table
                 alert('Movie added successfully!');
-                fetchMovieLogs();
+                // The log feed adds the new log row
                 document.getElementById('addMovieForm').reset();
             }
         })
@@ -139,8 +139,7 @@ document.addEventListener('DOMContentLoaded', () => {
                 alert('Movie updated successfully!');
                 const movieInfo = document.getElementById('movieInfo');
                 searchMovieInput.value = '';
-                // Update the logs
-                fetchMovieLogs();
+                // The log feed adds the new log row
             }
         })
         .catch(error => {
@@ -174,8 +173,7 @@ document.addEventListener('DOMContentLoaded', () => {
                 // Clear previous movie info
                 movieInfo.innerHTML = '';
                 searchMovieInput.value = '';
-                // Update the logs
-                fetchMovieLogs();
+                // The log feed adds the new log row
             }
         })
         .catch(error => {
@@ -183,6 +181,9 @@ document.addEventListener('DOMContentLoaded', () => {
         });
     }
 
+    // Id of the newest log in the table, where the log feed resumes
+    let lastLogId = 0;
+
     // Function to fetch movie logs from the API and display them in the table
     function fetchMovieLogs() {
         axios.get('/api/movie_logs', {
@@ -195,15 +196,33 @@ document.addEventListener('DOMContentLoaded', () => {
             logs.forEach(log => {
                 // Add a new row to the table for each log
                 addRowToTable(log);
+                lastLogId = Math.max(lastLogId, log.id);
             });
+            followMovieLogs();
         })
         .catch(error => {
             console.error(error);
         });
     }
 
+    // Function to receive new movie logs as they are written, from any admin
+    function followMovieLogs() {
+        // The browser reconnects on its own and resumes after the last event id
+        const feed = new EventSource(`/api/movie_logs/feed?stream=sse&since_id=${lastLogId}`, {
+            withCredentials: true
+        });
+        feed.addEventListener('log', event => {
+            const log = JSON.parse(event.data);
+            if (log.id > lastLogId) {
+                // Newest logs are at the top of the table
+                addRowToTable(log, true);
+                lastLogId = log.id;
+            }
+        });
+    }
+
     // Function to add a new row to the table with movie log info
-    function addRowToTable(log) {
+    function addRowToTable(log, prepend = false) {
         const row = document.createElement('tr');
     // Convert UTC timestamp to local time
     const utcDate = new Date(log.timestamp);
@@ -228,8 +247,12 @@ document.addEventListener('DOMContentLoaded', () => {
         <td>${localDate}</td>
     `;
 
-        // Append the row to the table
-        movieLogsTableBody.appendChild(row);
+        // Append the row to the table, or put it first
+        if (prepend) {
+            movieLogsTableBody.prepend(row);
+        } else {
+            movieLogsTableBody.appendChild(row);
+        }
     }
 
     // Fetch movie logs when the page loads
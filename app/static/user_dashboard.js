@@ -100,6 +100,31 @@ document.addEventListener('DOMContentLoaded', function () {
         }
     });
 
+    // Typeahead suggestions from the in-memory index, fetched once typing pauses
+    let suggestTimer = null;
+    document.getElementById('searchInput').addEventListener('input', event => {
+        clearTimeout(suggestTimer);
+        const prefix = event.target.value.trim();
+        if (!prefix || /^\d+$/.test(prefix)) {
+            return;
+        }
+        suggestTimer = setTimeout(() => {
+            fetch(`/api/suggest?q=${encodeURIComponent(prefix)}&limit=8`)
+                .then(response => response.json())
+                .then(data => {
+                    const suggestions = document.getElementById('searchSuggestions');
+                    suggestions.innerHTML = '';
+                    data.suggestions.forEach(suggestion => {
+                        const option = document.createElement('option');
+                        option.value = suggestion.field === 'director' ? suggestion.director : suggestion.name;
+                        option.label = `${suggestion.name} (${suggestion.director})`;
+                        suggestions.appendChild(option);
+                    });
+                })
+                .catch(error => console.error('Error loading suggestions:', error));
+        }, 150);
+    });
+
     // Function to reset page and load movies
     function resetAndLoadMovies() {
         page = 1;
@@ -0,0 +1,370 @@
+import datetime
+import heapq
+import re
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from flask import current_app, has_app_context
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session, object_session
+from app.models import CatalogueVersion, Movie, MoviesLog
+
+WORD = re.compile(r'\w+')
+
+def index_keys(text):
+    """
+    Returns the keys under which ``text`` is indexed: the text from each word start on.
+
+    Args:
+        text (str): A movie or director name, e.g. ``"George Lucas"``.
+
+    Returns:
+        list: The case-folded keys, e.g. ``['george lucas', 'lucas']``.
+    """
+    folded = (text or '').casefold()
+    return [folded[match.start():] for match in WORD.finditer(folded)]
+
+class SuggestIndex:
+    """
+    In-memory prefix index over movie names and director names.
+
+    Keys are kept in one sorted list with the matching movie ids in a parallel
+    ``array``, so a prefix lookup is two bisections and a slice. Every word start of a
+    name is indexed, so "wars" finds "Star Wars". Results for one- and two-character
+    prefixes, whose ranges are the widest, are memoised until the next change.
+
+    :attr:`version` is the catalogue version the index reflects and :attr:`modified_at`
+    the time that version was written. Committed writes of this worker are applied as
+    they happen; :func:`sync` catches up with changes made elsewhere.
+    """
+    short_prefix = 2
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._keys = []
+        self._ids = array('l')
+        self._fields = bytearray()  # 0 for a name key, 1 for a director key
+        self._movies = {}
+        self._memo = {}
+        self._sync_lock = threading.Lock()  # Held by the one thread catching up, see sync
+        self.version = None
+        self.modified_at = None
+
+    def build(self, rows, version=None, modified_at=None):
+        """
+        Replaces the index contents.
+
+        Args:
+            rows (iterable): ``(id, name, director, popularity)`` tuples.
+            version (int, optional): The catalogue version the rows were read at.
+            modified_at (datetime, optional): The time that version was written.
+        """
+        movies = {}
+        entries = []
+        for movie_id, name, director, popularity in rows:
+            movies[movie_id] = (name, director, popularity)
+            entries.extend((key, movie_id, 0) for key in index_keys(name))
+            entries.extend((key, movie_id, 1) for key in index_keys(director))
+        entries.sort()
+        with self._lock:
+            self._keys = [key for key, _, _ in entries]
+            self._ids = array('l', (movie_id for _, movie_id, _ in entries))
+            self._fields = bytearray(field for _, _, field in entries)
+            self._movies = movies
+            self._memo.clear()
+            self.version = version
+            self.modified_at = modified_at
+
+    def merge(self, changes, version, modified_at):
+        """
+        Applies movie changes read from the database and moves the index to ``version``.
+
+        Args:
+            changes (dict): ``(name, director, popularity)`` per changed movie id, or None
+                for a deleted movie.
+            version (int): The catalogue version the changes were read at.
+            modified_at (datetime): The time that version was written.
+        """
+        with self._lock:
+            for movie_id, movie in changes.items():
+                if movie is None:
+                    self.remove(movie_id)
+                else:
+                    self.add(movie_id, *movie)
+            self.version = version
+            self.modified_at = modified_at
+
+    def apply(self, changes, version=None):
+        """
+        Applies the movie changes of a committed transaction.
+
+        Args:
+            changes (dict): ``(name, director, popularity)`` per added or changed movie id,
+                or None for a deleted movie.
+            version (int, optional): The catalogue version the transaction committed, if
+                it bumped it. The index moves to it when it was current just before;
+                otherwise the next :func:`sync` catches up. Writes to the movies through
+                Core bypass the ORM hooks and must be followed by :func:`rebuild`.
+        """
+        with self._lock:
+            for movie_id, movie in changes.items():
+                if movie is None:
+                    self.remove(movie_id)
+                else:
+                    self.add(movie_id, *movie)
+            if changes and version is not None and self.version == version - 1:
+                self.version = version
+
+    def _insert(self, key, movie_id, field):
+        position = bisect_right(self._keys, key)
+        self._keys.insert(position, key)
+        self._ids.insert(position, movie_id)
+        self._fields.insert(position, field)
+
+    def _remove(self, key, movie_id):
+        position = bisect_left(self._keys, key)
+        while position < len(self._keys) and self._keys[position] == key:
+            if self._ids[position] == movie_id:
+                del self._keys[position]
+                del self._ids[position]
+                del self._fields[position]
+                return
+            position += 1
+
+    def add(self, movie_id, name, director, popularity):
+        """
+        Adds a movie, or replaces it if it is already indexed.
+        """
+        with self._lock:
+            self.remove(movie_id)
+            self._movies[movie_id] = (name, director, popularity)
+            for key in index_keys(name):
+                self._insert(key, movie_id, 0)
+            for key in index_keys(director):
+                self._insert(key, movie_id, 1)
+            self._memo.clear()
+
+    def remove(self, movie_id):
+        """
+        Removes a movie from the index if it is there.
+        """
+        with self._lock:
+            movie = self._movies.pop(movie_id, None)
+            if movie is None:
+                return
+            name, director, _ = movie
+            for key in index_keys(name) + index_keys(director):
+                self._remove(key, movie_id)
+            self._memo.clear()
+
+    def suggest(self, prefix, limit=10):
+        """
+        Returns the most popular movies whose name or director has a word starting with ``prefix``.
+
+        Args:
+            prefix (str): The text typed so far.
+            limit (int, optional): The number of suggestions. Defaults to 10.
+
+        Returns:
+            list: Dicts with the movie 'id', 'name', 'director', 'popularity' and the
+            'field' ('name' or 'director') that matched, most popular first.
+        """
+        prefix = ' '.join(prefix.casefold().split())
+        if not prefix:
+            return []
+        with self._lock:
+            memo_key = (prefix, limit)
+            if memo_key in self._memo:
+                return self._memo[memo_key]
+            start = bisect_left(self._keys, prefix)
+            end = bisect_left(self._keys, prefix + '\U0010ffff', start)
+            matches = {}
+            for position in range(start, end):
+                movie_id = self._ids[position]
+                if movie_id not in matches or self._fields[position] == 0:
+                    matches[movie_id] = self._fields[position]
+            top = heapq.nlargest(limit, matches, key=lambda movie_id: (self._movies[movie_id][2], -movie_id))
+            suggestions = []
+            for movie_id in top:
+                name, director, popularity = self._movies[movie_id]
+                suggestions.append({'id': movie_id, 'name': name, 'director': director, 'popularity': popularity,
+                                    'field': 'director' if matches[movie_id] else 'name'})
+            if len(prefix) <= self.short_prefix:
+                self._memo[memo_key] = suggestions
+            return suggestions
+
+    def stats(self):
+        """
+        Returns the index size.
+
+        Returns:
+            dict: The number of indexed movies, keys and memoised results.
+        """
+        with self._lock:
+            return {'movies': len(self._movies), 'keys': len(self._keys), 'memoised': len(self._memo)}
+
+def rebuild(app, db_session):
+    """
+    Rebuilds the suggest index of ``app`` from the ``movies`` table.
+
+    Args:
+        app: The Flask application object.
+        db_session: The database session to read with.
+
+    Returns:
+        int: The number of movies indexed.
+    """
+    index = app.extensions.get('suggest_index')
+    if index is None:
+        return 0
+    # Read the version and the movies in one transaction, so they agree
+    version, modified_at = _read_version(db_session)
+    rows = db_session.execute(select(Movie.id, Movie.name, Movie.director, Movie.popularity))
+    index.build(rows, version, modified_at)
+    return index.stats()['movies']
+
+def _read_version(db_session):
+    row = db_session.execute(
+        select(CatalogueVersion.version, CatalogueVersion.updated_at).where(CatalogueVersion.id == 1)
+    ).first()
+    return tuple(row) if row is not None else (0, None)
+
+def catch_up(app, db_session):
+    """
+    Applies the movie changes committed since the suggest index was last read.
+
+    Movies whose ``updated_at`` is at most ``SUGGEST_SYNC_OVERLAP`` seconds older than
+    the version the index reflects are re-read, together with the movies that
+    ``movies_logs`` records as deleted since then, so writers that stamped their rows
+    just before that version but committed after it are not missed. Re-applying a
+    movie is harmless. The index is rebuilt instead when it has no version time to
+    start from, or when its size then disagrees with the ``movies`` table, as after
+    deletes that left no log (``empty_database``) or whose logs were archived.
+
+    Args:
+        app: The Flask application object.
+        db_session: The database session to read with.
+
+    Returns:
+        int: The number of movies re-read, or None if the index was rebuilt.
+    """
+    index = app.extensions.get('suggest_index')
+    if index is None:
+        return 0
+    if index.modified_at is None:
+        rebuild(app, db_session)
+        return None
+    since = index.modified_at - datetime.timedelta(seconds=app.config.get('SUGGEST_SYNC_OVERLAP', 30))
+    # Read the version first, in the same transaction; changes committed after it are
+    # picked up again by the next catch-up
+    version, modified_at = _read_version(db_session)
+    deleted = db_session.execute(
+        select(MoviesLog.movie_id).distinct()
+        .where(MoviesLog.action == 'DELETED', MoviesLog.timestamp >= since,
+               MoviesLog.movie_id.not_in(select(Movie.id)))
+    ).scalars()
+    changes = dict.fromkeys(deleted)
+    rows = db_session.execute(
+        select(Movie.id, Movie.name, Movie.director, Movie.popularity).where(Movie.updated_at >= since)
+    )
+    for movie_id, name, director, popularity in rows:
+        changes[movie_id] = (name, director, popularity)
+    index.merge(changes, version, modified_at)
+    if index.stats()['movies'] != db_session.execute(select(func.count()).select_from(Movie)).scalar():
+        rebuild(app, db_session)
+        return None
+    return len(changes)
+
+def sync(app, db_session):
+    """
+    Catches the suggest index up when the shared catalogue version has moved past it.
+
+    Changes committed by other workers or by the importer only reach this worker's
+    index this way, within the catalogue's ``sync_interval``. Only one thread catches
+    up at a time; requests arriving meanwhile are answered from the index as it is.
+
+    Args:
+        app: The Flask application object.
+        db_session: The database session to read with.
+
+    Returns:
+        bool: True if the index was brought up to date by this call.
+    """
+    index = app.extensions.get('suggest_index')
+    catalogue = app.extensions.get('catalogue')
+    if index is None or catalogue is None or catalogue.sync(db_session) == index.version:
+        return False
+    if not index._sync_lock.acquire(blocking=False):
+        return False
+    try:
+        if catalogue.version == index.version:  # Another thread caught up meanwhile
+            return False
+        catch_up(app, db_session)
+        return True
+    finally:
+        index._sync_lock.release()
+
+def init_app(app, db_session):
+    """
+    Creates the suggest index for the application and fills it from the ``movies`` table.
+
+    Args:
+        app: The Flask application object.
+        db_session: The database session to read with.
+
+    Returns:
+        SuggestIndex: The suggest index.
+    """
+    index = SuggestIndex()
+    app.extensions['suggest_index'] = index
+    rebuild(app, db_session)
+    return index
+
+def get_suggest_index():
+    """
+    Returns the suggest index of the current application, if there is one.
+
+    :return: The suggest index or None.
+    """
+    if not has_app_context():
+        return None
+    return current_app.extensions.get('suggest_index')
+
+def _pending_changes(target):
+    session = object_session(target)
+    return session.info.setdefault('suggest_changes', {}) if session is not None else None
+
+@event.listens_for(Movie, 'after_insert')
+@event.listens_for(Movie, 'after_update')
+def _collect_indexed_movie(mapper, connection, target):
+    """
+    Remembers each movie added or changed through the ORM until the transaction commits.
+    """
+    changes = _pending_changes(target)
+    if changes is not None:
+        changes[target.id] = (target.name, target.director, target.popularity)
+
+@event.listens_for(Movie, 'after_delete')
+def _collect_unindexed_movie(mapper, connection, target):
+    """
+    Remembers each movie deleted through the ORM until the transaction commits.
+    """
+    changes = _pending_changes(target)
+    if changes is not None:
+        changes[target.id] = None
+
+@event.listens_for(Session, 'after_commit')
+def _index_after_commit(session):
+    """
+    Applies the movie changes of a committed transaction to this worker's index.
+    """
+    changes = session.info.pop('suggest_changes', None)
+    version = session.info.pop('catalogue_version', None)
+    index = get_suggest_index()
+    if index is not None and changes:
+        index.apply(changes, version)
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_rolled_back_movies(session):
+    session.info.pop('suggest_changes', None)
+    session.info.pop('catalogue_version', None)
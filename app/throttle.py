@@ -0,0 +1,295 @@
+import os
+import sqlite3
+import time
+from collections import deque
+from flask import current_app, has_app_context
+
+class SlidingWindowLimiter:
+    """
+    In-process sliding-window rate limiter.
+
+    Each key keeps the timestamps of its last ``limit`` attempts in a bounded deque, so
+    a key is rejected while its oldest remembered attempt is still inside the window.
+    The hot path only uses ``dict.setdefault``, ``deque.append`` and indexing, which are
+    atomic under the GIL, so no lock is taken; concurrent attempts on one key may at
+    worst let a single extra request through.
+    """
+    name = 'memory'
+
+    def __init__(self, limit, window, clock=time.monotonic, prune_every=1024):
+        self.limit = limit
+        self.window = window
+        self.clock = clock
+        self.prune_every = prune_every
+        self._hits = {}
+        self._calls = 0
+        self.allowed = 0
+        self.rejected = 0
+
+    def _prune(self, now):
+        for key, hits in list(self._hits.items()):
+            if not hits or now - hits[-1] >= self.window:
+                self._hits.pop(key, None)
+
+    def peek(self, key):
+        """
+        Checks whether ``key`` is over its limit without recording an attempt.
+
+        Args:
+            key (str): The throttled key, e.g. an email address or client IP.
+
+        Returns:
+            float: 0 if an attempt would be allowed, otherwise the seconds until it would be.
+        """
+        hits = self._hits.get(key)
+        if hits is not None and len(hits) >= self.limit:
+            retry_after = hits[0] + self.window - self.clock()
+            if retry_after > 0:
+                self.rejected += 1
+                return retry_after
+        return 0
+
+    def record(self, key):
+        """
+        Records an attempt for ``key`` without checking its limit.
+
+        Args:
+            key (str): The throttled key.
+
+        Returns:
+            None
+        """
+        now = self.clock()
+        self._calls += 1
+        if self._calls % self.prune_every == 0:
+            self._prune(now)
+        self._hits.setdefault(key, deque(maxlen=self.limit)).append(now)
+
+    def hit(self, key):
+        """
+        Records an attempt for ``key`` unless the key is over its limit.
+
+        Args:
+            key (str): The throttled key, e.g. an email address or client IP.
+
+        Returns:
+            float: 0 if the attempt is allowed, otherwise the seconds until it would be.
+        """
+        retry_after = self.peek(key)
+        if retry_after:
+            return retry_after
+        self.record(key)
+        self.allowed += 1
+        return 0
+
+    def stats(self):
+        """
+        Returns the limiter counters.
+
+        Returns:
+            dict: The backend, limit, window, tracked keys and allowed/rejected counts.
+        """
+        return {'backend': self.name, 'limit': self.limit, 'window': self.window,
+                'keys': len(self._hits), 'allowed': self.allowed, 'rejected': self.rejected}
+
+class SQLiteSlidingWindowLimiter:
+    """
+    Sliding-window rate limiter whose counters live in a SQLite file shared by the
+    workers of one host. It stands in for a shared store such as Redis.
+    """
+    name = 'sqlite'
+
+    def __init__(self, path, limit, window, clock=time.time):
+        self.path = path
+        self.limit = limit
+        self.window = window
+        self.clock = clock
+        self.allowed = 0
+        self.rejected = 0
+        connection = self._connect()
+        try:
+            with connection:
+                connection.execute('CREATE TABLE IF NOT EXISTS attempts (key TEXT NOT NULL, ts REAL NOT NULL)')
+                connection.execute('CREATE INDEX IF NOT EXISTS ix_attempts_key_ts ON attempts (key, ts)')
+                connection.execute('CREATE INDEX IF NOT EXISTS ix_attempts_ts ON attempts (ts)')
+        finally:
+            connection.close()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=5, isolation_level=None)
+
+    def hit(self, key):
+        """
+        Records an attempt for ``key`` unless the key is over its limit.
+
+        Args:
+            key (str): The throttled key, e.g. an email address or client IP.
+
+        Returns:
+            float: 0 if the attempt is allowed, otherwise the seconds until it would be.
+        """
+        now = self.clock()
+        connection = self._connect()
+        try:
+            connection.execute('BEGIN IMMEDIATE')
+            connection.execute('DELETE FROM attempts WHERE ts <= ?', (now - self.window,))
+            count, oldest = connection.execute(
+                'SELECT COUNT(*), MIN(ts) FROM attempts WHERE key = ?', (key,)
+            ).fetchone()
+            if count >= self.limit:
+                connection.execute('COMMIT')
+                self.rejected += 1
+                return oldest + self.window - now
+            connection.execute('INSERT INTO attempts (key, ts) VALUES (?, ?)', (key, now))
+            connection.execute('COMMIT')
+        finally:
+            connection.close()
+        self.allowed += 1
+        return 0
+
+    def peek(self, key):
+        """
+        Checks whether ``key`` is over its limit without recording an attempt.
+
+        Args:
+            key (str): The throttled key.
+
+        Returns:
+            float: 0 if an attempt would be allowed, otherwise the seconds until it would be.
+        """
+        now = self.clock()
+        connection = self._connect()
+        try:
+            count, oldest = connection.execute(
+                'SELECT COUNT(*), MIN(ts) FROM attempts WHERE key = ? AND ts > ?', (key, now - self.window)
+            ).fetchone()
+        finally:
+            connection.close()
+        if count >= self.limit:
+            self.rejected += 1
+            return oldest + self.window - now
+        return 0
+
+    def record(self, key):
+        """
+        Records an attempt for ``key`` without checking its limit.
+
+        Args:
+            key (str): The throttled key.
+
+        Returns:
+            None
+        """
+        connection = self._connect()
+        try:
+            connection.execute('INSERT INTO attempts (key, ts) VALUES (?, ?)', (key, self.clock()))
+        finally:
+            connection.close()
+
+    def stats(self):
+        """
+        Returns the limiter counters.
+
+        Returns:
+            dict: The backend, limit, window and allowed/rejected counts of this worker.
+        """
+        return {'backend': self.name, 'limit': self.limit, 'window': self.window,
+                'allowed': self.allowed, 'rejected': self.rejected}
+
+class LoginThrottle:
+    """
+    Throttles login attempts per client IP and failed logins per email address.
+
+    Every attempt counts against the client IP, while only failed attempts count against
+    the email, so a user who logs in often is never locked out of their own account.
+    """
+
+    def __init__(self, by_ip, by_email):
+        self.by_ip = by_ip
+        self.by_email = by_email
+
+    def check(self, email, ip):
+        """
+        Records a login attempt, or rejects it if the IP or the email is over its limit.
+
+        Args:
+            email (str): The email address the client is trying to log in as.
+            ip (str): The client IP address.
+
+        Returns:
+            float: 0 if the attempt is allowed, otherwise the seconds until it would be.
+        """
+        retry_after = self.by_ip.hit(f'ip:{ip}')
+        if retry_after:
+            return retry_after
+        return self.by_email.peek(self._email_key(email))
+
+    def record_failure(self, email):
+        """
+        Counts a failed login against the email address.
+
+        Args:
+            email (str): The email address the client tried to log in as.
+
+        Returns:
+            None
+        """
+        self.by_email.record(self._email_key(email))
+
+    @staticmethod
+    def _email_key(email):
+        return f'email:{(email or "").strip().lower()}'
+
+    def stats(self):
+        """
+        Returns the counters of both limiters.
+
+        Returns:
+            dict: The per-IP and per-email limiter statistics.
+        """
+        return {'ip': self.by_ip.stats(), 'email': self.by_email.stats()}
+
+def make_limiter(app, limit):
+    """
+    Builds a limiter of the type selected by ``LOGIN_THROTTLE_BACKEND``.
+
+    Args:
+        app: The Flask application object.
+        limit (int): The number of attempts allowed per window.
+
+    Returns:
+        The rate limiter.
+    """
+    backend = app.config.get('LOGIN_THROTTLE_BACKEND', 'memory')
+    window = app.config.get('LOGIN_THROTTLE_WINDOW', 60)
+    if backend == 'sqlite':
+        path = app.config.get('LOGIN_THROTTLE_SQLITE_PATH') or os.path.join(app.instance_path, 'login_throttle.db')
+        return SQLiteSlidingWindowLimiter(path, limit, window)
+    if backend == 'memory':
+        return SlidingWindowLimiter(limit, window)
+    raise ValueError(f'Unknown login throttle backend: {backend}')
+
+def init_app(app):
+    """
+    Creates the login throttle for the application.
+
+    Args:
+        app: The Flask application object.
+
+    Returns:
+        LoginThrottle: The login throttle.
+    """
+    throttle = LoginThrottle(by_ip=make_limiter(app, app.config.get('LOGIN_THROTTLE_IP_LIMIT', 50)),
+                             by_email=make_limiter(app, app.config.get('LOGIN_THROTTLE_EMAIL_LIMIT', 10)))
+    app.extensions['login_throttle'] = throttle
+    return throttle
+
+def get_login_throttle():
+    """
+    Returns the login throttle of the current application, if there is one.
+
+    :return: The login throttle or None.
+    """
+    if not has_app_context():
+        return None
+    return current_app.extensions.get('login_throttle')
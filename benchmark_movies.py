@@ -0,0 +1,96 @@
+import argparse
+import time
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy.orm import selectinload
+from app import create_app
+from app.database import drop_db, get_db, init_db
+from app.encoding import FastJSONProvider
+from app.models import Movie
+from app.routes.movies import query_movies
+from db_utils import bulk_load_movies
+
+def parse_args():
+    """
+    Parses the command line options of the benchmark script.
+
+    Returns:
+        argparse.Namespace: The parsed options.
+    """
+    parser = argparse.ArgumentParser(
+        description='Compare the ORM and the column-tuple serialisation of movie listings. '
+                    'Uses the testing database, which is emptied afterwards.')
+    parser.add_argument('--movies', type=int, default=20000, help='Synthetic movies to load (default: 20000).')
+    parser.add_argument('--per-page', type=int, default=100, help='Movies per listing page (default: 100).')
+    parser.add_argument('--repeat', type=int, default=3, help='Passes over all the pages; the best is kept (default: 3).')
+    return parser.parse_args()
+
+def synthetic_movies(count):
+    """
+    Generates movie records with a few genres each.
+
+    Args:
+        count (int): The number of records.
+
+    Returns:
+        generator: Normalised movie records, see :func:`db_utils.normalise_movie`.
+    """
+    genres = ['Action', 'Adventure', 'Comedy', 'Drama', 'Family', 'Fantasy', 'Horror', 'Sci-Fi', 'Thriller']
+    for i in range(count):
+        yield {'name': f'Benchmark Movie {i}', 'director': f'Director {i % 997}',
+               'genre': [genres[i % 9], genres[(i % 9 + 1 + i % 7) % 9]],
+               'popularity': float(i % 100), 'imdb_score': (i % 100) / 10}
+
+def orm_page(encoder, page, per_page):
+    """
+    Serialises a page from Movie objects, as get_movies did before the fast path.
+    """
+    movies = (Movie.query.options(selectinload(Movie.genres))
+              .order_by(Movie.imdb_score.asc(), Movie.id.asc())
+              .paginate(page=page, per_page=per_page, error_out=False))
+    return encoder.dumps({'movies': [movie.serialize() for movie in movies.items], 'total_pages': movies.pages})
+
+def tuple_page(encoder, page, per_page):
+    """
+    Serialises a page through the column-tuple path used by get_movies.
+    """
+    return encoder.dumps(query_movies(page, per_page, None, False, [], 'any', 'imdb_score', 'asc', ''))
+
+def measure(label, serialise, encoder, pages, per_page, repeat):
+    """
+    Times full passes over every page and prints the best rate.
+
+    Returns:
+        float: The rows per second of the best pass.
+    """
+    db_session = get_db()
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for page in range(1, pages + 1):
+            serialise(encoder, page, per_page)
+            db_session.expunge_all()  # Start every page with an empty identity map
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    rate = pages * per_page / best
+    print(f'{label:<36} {rate:>10.0f} rows/s')
+    return rate
+
+if __name__ == '__main__':
+    args = parse_args()
+    app = create_app(test_config='testing')
+    with app.app_context():
+        init_db()
+        db_session = get_db()
+        bulk_load_movies(db_session, synthetic_movies(args.movies))
+        db_session.commit()
+        try:
+            pages = args.movies // args.per_page
+            stdlib, fast = DefaultJSONProvider(app), FastJSONProvider(app)
+            baseline = measure('ORM objects + json', orm_page, stdlib, pages, args.per_page, args.repeat)
+            measure('column tuples + json', tuple_page, stdlib, pages, args.per_page, args.repeat)
+            if fast.encoder is not None:
+                rate = measure('column tuples + orjson', tuple_page, fast, pages, args.per_page, args.repeat)
+                print(f'Speed-up: {rate / baseline:.1f}x')
+        finally:
+            db_session.rollback()
+            drop_db()
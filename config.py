@@ -12,9 +12,61 @@ class Config:
     JWT_COOKIE_SECURE = False
     JWT_COOKIE_SAMESITE = 'strict'
     BCRYPT_LOG_ROUNDS = 14
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', os.cpu_count() or 2))  # Concurrent bcrypt calls
+    PASSWORD_HASH_QUEUE = int(os.getenv('PASSWORD_HASH_QUEUE', 16))  # Calls allowed to wait before 503
+    PASSWORD_HASH_TIMEOUT = 10  # Seconds a request waits for its hash
+    # Connection pool settings for the single engine shared by every request
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 10))
+    DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', 30))  # Seconds to wait for a free connection
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', 1800))  # Seconds before a connection is replaced
+    DB_POOL_PRE_PING = True
+    # Token revocation cache: 'memory' (one worker) or 'sqlite' (shared by the workers of one host)
+    REVOCATION_BACKEND = os.getenv('REVOCATION_BACKEND', 'sqlite')
+    REVOCATION_SQLITE_PATH = os.getenv('REVOCATION_SQLITE_PATH')  # Defaults to instance/revocations.db
+    REVOCATION_SYNC_INTERVAL = 1.0  # Seconds between reads of revocations made by other workers
+    REVOCATION_DEFAULT_TTL = 86400  # Lifetime assumed for tokens without a readable expiry
+    # Cache of authenticated user principals used by token_required
+    PRINCIPAL_CACHE_SIZE = 1024
+    PRINCIPAL_CACHE_TTL = 60
+    # Sliding-window throttle applied to /auth/login before any database or bcrypt work
+    LOGIN_THROTTLE_ENABLED = True
+    LOGIN_THROTTLE_BACKEND = os.getenv('LOGIN_THROTTLE_BACKEND', 'memory')  # 'memory' or 'sqlite'
+    LOGIN_THROTTLE_SQLITE_PATH = os.getenv('LOGIN_THROTTLE_SQLITE_PATH')  # Defaults to instance/login_throttle.db
+    LOGIN_THROTTLE_WINDOW = 60  # Seconds
+    LOGIN_THROTTLE_IP_LIMIT = 50  # Attempts per window and client IP
+    LOGIN_THROTTLE_EMAIL_LIMIT = 10  # Failed attempts per window and email address
+    TRUSTED_PROXIES = int(os.getenv('TRUSTED_PROXIES', 0))  # Reverse proxies whose X-Forwarded-For/-Proto are trusted
+    # Email validation for /auth/register
+    ZEROBOUNCE_API_KEY = os.getenv('ZEROBOUNCE_API_KEY')  # Without a key only local checks run
+    EMAIL_REMOTE_VALIDATOR = None  # Callable overriding ZeroBounce, e.g. a local fake in tests
+    EMAIL_VALIDATION_TIMEOUT = 1.0  # Seconds registration waits for the remote verdict
+    EMAIL_VALIDATION_CACHE_TTL = 86400
+    EMAIL_VALIDATION_FAILURE_THRESHOLD = 5  # Consecutive remote failures that open the circuit
+    EMAIL_VALIDATION_RESET_TIMEOUT = 30  # Seconds before a trial call after the circuit opens
+    AUTH_CLAIMS_ONLY = os.getenv('AUTH_CLAIMS_ONLY', '').lower() in ('1', 'true', 'yes')  # Trust name/admin claims in the token
+
+    MOVIES_PER_PAGE = 10
+    MOVIES_MAX_PER_PAGE = 100  # Upper bound for the per_page parameter
+    MOVIES_BATCH_MAX = 1000  # Operations accepted by one /api/movies/batch request
+    MOVIE_LOGS_MAX_PER_PAGE = 1000  # Upper bound for the limit parameter of /api/movie_logs
+    MOVIE_LOG_FEED_MAX_WAIT = 25  # Longest long-poll of /api/movie_logs/feed, in seconds
+    MOVIE_LOG_FEED_POLL_INTERVAL = 1.0  # Seconds between reads picking up other workers' logs
+    MOVIE_LOG_FEED_KEEPALIVE = 15  # Longest silence on the event stream, in seconds
+    MOVIE_LOG_FEED_STREAM_DURATION = 300  # Seconds before the event stream closes and clients reconnect
+    MOVIE_LOG_RETENTION_DAYS = int(os.getenv('MOVIE_LOG_RETENTION_DAYS', 90))  # Age at which archive-movie-logs moves logs out
+    MOVIE_LOG_ARCHIVE_DIR = os.getenv('MOVIE_LOG_ARCHIVE_DIR')  # Defaults to instance/movie_log_archive
+    SEARCH_FTS_ENABLED = True  # Falls back to LIKE when SQLite lacks FTS5
+    MOVIES_CACHE_SIZE = 512  # Cached get_movies responses
+    MOVIES_CACHE_TTL = 30  # Seconds
+    CATALOGUE_SYNC_INTERVAL = 1.0  # Seconds between reads of the shared catalogue version
+    SUGGEST_SYNC_OVERLAP = 30  # Seconds of movie changes the suggest index re-reads when catching up
+    CATALOGUE_CACHE_CONTROL = 'public, no-cache'  # Proxies may store listings but must revalidate
+    JSON_FAST_ENCODER = True  # Encode responses with orjson when it is installed
     
 class DevelopmentConfig(Config):
     DEBUG = True
+    REVOCATION_BACKEND = os.getenv('REVOCATION_BACKEND', 'memory')  # The dev server runs a single worker
     SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(Config.BASE_DIR, 'instance', 'movies.db')
     
 class ProductionConfig(Config):
@@ -27,3 +79,5 @@ class TestingConfig(Config):
     BCRYPT_LOG_ROUNDS = 4
     WTF_CSRF_ENABLED = False
     JWT_ACCESS_TOKEN_EXPIRES = 5
+    REVOCATION_BACKEND = 'memory'
+    ZEROBOUNCE_API_KEY = None
@@ -1,10 +1,21 @@
 import json
+import multiprocessing
+import os
+import queue
+import re
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from sqlalchemy import func, insert
+from app import suggest
+from app.catalogue import bump_catalogue_version
+from app.genres import apply_genre_counts, genre_ids, normalise_genre_names
 from app.database import get_db, close_db
-from app.models import Movie, Genre, User, BlacklistToken
+from app.models import Movie, Genre, User, BlacklistToken, movie_genres
 
 def empty_database():
     """
-    Empties the entire database by deleting all records from the Movie, Genre, User, and BlacklistToken tables.
+    Empties the entire database by deleting all records from the Movie, Genre, movie_genres, User, and BlacklistToken tables.
     This function does not take any parameters.
     It does not return anything.
 
@@ -12,20 +23,291 @@ def empty_database():
     empty_database()
     """
     db_session = get_db()
+    db_session.execute(movie_genres.delete())
     db_session.query(Movie).delete()
     db_session.query(Genre).delete()
     db_session.query(User).delete()
     db_session.query(BlacklistToken).delete()
+    bump_catalogue_version(db_session)
     db_session.commit()
     db_session.close()
 
-def load_data_from_json(filename, app):
+def normalise_movie(movie_data):
+    """
+    Validates a movie record and returns it in the shape used by the database.
+
+    Genre names are stripped of surrounding whitespace (``imdb.json`` stores most of
+    them with a leading space, e.g. ``" Family"``), empty names are dropped and
+    duplicates are removed while keeping their order.
+
+    Parameters:
+        movie_data (dict): A movie record as found in 'imdb.json'.
+
+    Returns:
+        dict: The record with 'name', 'director', 'genre', 'popularity' and 'imdb_score' keys.
+
+    Raises:
+        ValueError: If a required field is missing or has the wrong type.
+    """
+    try:
+        name = str(movie_data['name']).strip()
+        director = str(movie_data['director']).strip()
+        popularity = float(movie_data.get('99popularity', movie_data.get('popularity')))
+        imdb_score = float(movie_data['imdb_score'])
+        genres = movie_data.get('genre') or []
+        if not isinstance(genres, list):
+            raise TypeError('genre must be a list')
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError(f'Invalid movie record {movie_data!r}: {e}') from e
+    if not name or not director:
+        raise ValueError(f'Invalid movie record {movie_data!r}: name and director are required')
+    return {'name': name, 'director': director, 'genre': normalise_genre_names(genres),
+            'popularity': popularity, 'imdb_score': imdb_score}
+
+JSON_LITERALS = ('true', 'false', 'null', 'NaN', 'Infinity', '-Infinity')
+NUMBER_TAIL = re.compile(r'[0-9.eE+-]+')
+
+def _is_truncated(buffer, error):
+    """
+    Tells whether a decode error can be caused by the buffer ending inside an element.
+    """
+    if error.pos >= len(buffer) or error.msg.startswith('Unterminated string'):
+        return True
+    rest = buffer[error.pos:]
+    if error.msg.startswith('Invalid \\uXXXX escape'):
+        return len(rest) < 6
+    if error.msg.startswith('Expecting') and NUMBER_TAIL.fullmatch(rest):
+        return True  # A nested number cut short, e.g. '1.' of '1.5'
+    return error.msg == 'Expecting value' and any(literal.startswith(rest) for literal in JSON_LITERALS)
+
+def iter_json_array(file, chunk_size=65536, max_element_size=16 * 1024 * 1024):
+    """
+    Yields the elements of a top-level JSON array one at a time.
+
+    The file is read in chunks of ``chunk_size`` characters and each element is decoded
+    as soon as it is complete, so memory use is bounded by the largest element rather
+    than by the size of the file. More data is only read when an element runs to the end
+    of the buffer; a malformed element fails at once.
+
+    Parameters:
+        file: A text file object positioned at the start of a JSON array.
+        chunk_size (int, optional): The number of characters read at a time. Defaults to 65536.
+        max_element_size (int, optional): The largest element accepted, in characters.
+            Defaults to 16 MiB.
+
+    Yields:
+        The decoded array elements.
+
+    Raises:
+        ValueError: If the document is not a JSON array, an element is malformed or too
+            large, or elements are not separated by exactly one comma. The message gives
+            the character offset of the element.
+    """
+    decoder = json.JSONDecoder()
+    buffer, pos, offset, eof = '', 0, 0, False  # offset is the file position of buffer[0]
+
+    def read_more():
+        nonlocal buffer, pos, offset, eof
+        chunk = file.read(chunk_size)
+        eof = not chunk
+        offset += pos
+        buffer, pos = buffer[pos:] + chunk, 0
+
+    def next_char():
+        # Skips whitespace, across chunks, and returns the next character or '' at the end
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos].isspace():
+                pos += 1
+            if pos < len(buffer):
+                return buffer[pos]
+            if eof:
+                return ''
+            read_more()
+
+    def close():
+        nonlocal pos
+        pos += 1
+        if next_char():
+            raise ValueError(f'Unexpected data after the JSON array at offset {offset + pos}')
+
+    if next_char() != '[':
+        raise ValueError('Expected a JSON array')
+    pos += 1
+    if next_char() == ']':
+        close()
+        return
+    while True:
+        next_char()
+        while True:
+            try:
+                element, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError as e:
+                if eof or not _is_truncated(buffer, e):
+                    raise ValueError(f'Invalid JSON array element at offset {offset + pos}: {e.msg}') from e
+            else:
+                # A number at the end of the buffer may continue in the next chunk
+                if eof or (end < len(buffer) and not NUMBER_TAIL.fullmatch(buffer, end)):
+                    break
+            if len(buffer) - pos > max_element_size:
+                raise ValueError(f'JSON array element at offset {offset + pos} is larger than '
+                                 f'{max_element_size} characters')
+            read_more()
+        pos = end
+        yield element
+        delimiter = next_char()
+        if delimiter == ']':
+            close()
+            return
+        if delimiter != ',':
+            raise ValueError(f"Expected ',' or ']' at offset {offset + pos}" if delimiter
+                             else 'Unexpected end of JSON array')
+        pos += 1
+
+def iter_json_lines(file):
+    """
+    Yields the records of a JSON-Lines file one at a time, skipping blank lines.
+
+    Parameters:
+        file: A text file object.
+
+    Yields:
+        dict: The decoded records.
+    """
+    for line in file:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+class RecordErrors:
+    """
+    Tally of the records skipped during an import.
+
+    Only the number of invalid records and the first message are kept, so a badly
+    formed catalogue does not grow memory with its number of bad records.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.first = None
+
+    def __bool__(self):
+        return self.count > 0
+
+    def add(self, message):
+        """
+        Records an invalid record.
+
+        Parameters:
+            message (str): Why the record was rejected.
+        """
+        if self.first is None:
+            self.first = message
+        self.count += 1
+
+    def merge(self, other):
+        """
+        Adds the tally of another import, e.g. of a parsed shard.
+
+        Parameters:
+            other (RecordErrors): The tally to add.
+        """
+        if self.first is None:
+            self.first = other.first
+        self.count += other.count
+
+def iter_movies(filename, file_format=None, errors=None):
+    """
+    Streams normalised movie records from a JSON array or JSON-Lines file.
+
+    Parameters:
+        filename (str): The path to the catalogue file.
+        file_format (str, optional): 'json' or 'jsonl'. Defaults to guessing from the extension.
+        errors (RecordErrors, optional): Counts the records that failed validation;
+            when omitted an invalid record raises ValueError.
+
+    Yields:
+        dict: Normalised movie records, see :func:`normalise_movie`.
+    """
+    if file_format is None:
+        file_format = 'jsonl' if filename.endswith(('.jsonl', '.ndjson')) else 'json'
+    with open(filename, 'r') as file:
+        records = iter_json_lines(file) if file_format == 'jsonl' else iter_json_array(file)
+        for movie_data in records:
+            try:
+                yield normalise_movie(movie_data)
+            except ValueError as e:
+                if errors is None:
+                    raise
+                errors.add(str(e))
+
+def bulk_load_movies(db_session, records, batch_size=1000):
+    """
+    Inserts movies and their genres with batched, executemany-style core inserts.
+
+    Movie ids are assigned up front from the current maximum id, so genre links can be
+    built without reading movie ids back. Each batch costs one INSERT of movies, one
+    upsert of its per-genre movie counts into ``genres`` (which also creates new genres),
+    one SELECT of the genre ids and one INSERT into ``movie_genres``. Records
+    are consumed lazily, so at most one batch is held in memory. The caller owns the
+    transaction; nothing is committed here. No other writer may insert movies while
+    the load is running.
+
+    Parameters:
+        db_session: The database session to insert with.
+        records (iterable): Normalised movie records, see :func:`normalise_movie`.
+        batch_size (int, optional): The number of movies per INSERT batch. Defaults to 1000.
+
+    Returns:
+        int: The number of movies inserted.
+    """
+    next_id = (db_session.query(func.max(Movie.id)).scalar() or 0) + 1
+    movie_rows = []
+    links = []
+    genre_counts = Counter()
+    count = 0
+
+    def flush():
+        if movie_rows:
+            db_session.execute(insert(Movie.__table__), movie_rows)
+        connection = db_session.connection()
+        apply_genre_counts(connection, genre_counts)
+        if links:
+            ids = genre_ids(connection, genre_counts)
+            db_session.execute(insert(movie_genres), [{'movie_id': movie_id, 'genre_id': ids[genre_name]}
+                                                      for movie_id, genre_name in links])
+        movie_rows.clear()
+        links.clear()
+        genre_counts.clear()
+
+    for movie_data in records:
+        movie_rows.append({
+            'id': next_id,
+            'name': movie_data['name'],
+            'director': movie_data['director'],
+            'popularity': movie_data['popularity'],
+            'imdb_score': movie_data['imdb_score'],
+        })
+        links.extend((next_id, genre_name) for genre_name in movie_data['genre'])
+        genre_counts.update(movie_data['genre'])
+        next_id += 1
+        count += 1
+        if len(movie_rows) >= batch_size:
+            flush()
+    flush()
+    return count
+
+def load_data_from_json(filename, app, batch_size=1000):
     """
     Loads data from a JSON file and populates the database with movie and genre information.
 
+    All movies are normalised with :func:`normalise_movie` and inserted in a single
+    transaction using :func:`bulk_load_movies`.
+
     Parameters:
         filename (str): The path to the JSON file containing the movie data.
         app (Flask): The Flask application object.
+        batch_size (int, optional): The number of movies per INSERT batch. Defaults to 1000.
 
     Returns:
         None
@@ -33,23 +315,17 @@ def load_data_from_json(filename, app):
     with app.app_context():
         db_session = get_db()
         try:
+            start = time.perf_counter()
             with open(filename, 'r') as file:
                 data = json.load(file)
-                for movie_data in data:
-                    movie = Movie(
-                        name=movie_data['name'],
-                        director=movie_data['director'],
-                        popularity=movie_data['99popularity'],
-                        imdb_score=movie_data['imdb_score'],
-                    )
-                    movie.set_genre(movie_data['genre'])  # Set genres using the set_genre method
-                    db_session.add(movie)
-                    db_session.flush()  # This ensures that movie.id is populated before creating genres
-                    for genre_name in movie_data['genre']:
-                        genre = Genre(name=genre_name, movie_id=movie.id)
-                        db_session.add(genre)
-                db_session.commit()
+            count = bulk_load_movies(db_session, (normalise_movie(movie_data) for movie_data in data),
+                                     batch_size=batch_size)
+            bump_catalogue_version(db_session)
+            db_session.commit()
+            suggest.rebuild(app, db_session)  # Core inserts bypass the ORM hooks
+            elapsed = time.perf_counter() - start
             print("Data has been successfully populated into the database.")
+            print(f"Loaded {count} movies in {elapsed:.2f}s ({count / elapsed if elapsed else count:.0f} rows/s).")
         except FileNotFoundError as e:
             print(f"Error: {e}. Please provide the correct path to 'imdb.json'.")
         except Exception as e:
@@ -57,3 +333,155 @@ def load_data_from_json(filename, app):
             print(f"An error occurred while populating the database: {e}")
         finally:
             close_db()
+
+def stream_data_from_file(filename, app, file_format=None, batch_size=1000):
+    """
+    Streams a JSON array or JSON-Lines catalogue into the database.
+
+    Records are parsed incrementally, validated and normalised, and inserted in
+    batches of ``batch_size`` within a single transaction, so memory use stays
+    bounded whatever the size of the file. Invalid records are skipped and reported.
+
+    Parameters:
+        filename (str): The path to the catalogue file.
+        app (Flask): The Flask application object.
+        file_format (str, optional): 'json' or 'jsonl'. Defaults to guessing from the extension.
+        batch_size (int, optional): The number of movies per INSERT batch. Defaults to 1000.
+
+    Returns:
+        int: The number of movies loaded.
+    """
+    with app.app_context():
+        db_session = get_db()
+        errors = RecordErrors()
+        count = 0
+        try:
+            start = time.perf_counter()
+            count = bulk_load_movies(db_session, iter_movies(filename, file_format, errors), batch_size=batch_size)
+            bump_catalogue_version(db_session)
+            db_session.commit()
+            suggest.rebuild(app, db_session)  # Core inserts bypass the ORM hooks
+            elapsed = time.perf_counter() - start
+            print(f"Loaded {count} movies in {elapsed:.2f}s ({count / elapsed if elapsed else count:.0f} rows/s).")
+            if errors:
+                print(f"Skipped {errors.count} invalid records, first: {errors.first}")
+        except FileNotFoundError as e:
+            print(f"Error: {e}. Please provide the correct path to the catalogue file.")
+        except Exception as e:
+            db_session.rollback()
+            count = 0
+            print(f"An error occurred while populating the database: {e}")
+        finally:
+            close_db()
+        return count
+
+_SHARD_DONE = '__shard_done__'
+
+def _parse_shard(filename, file_format, batch_size, batches):
+    """
+    Parses one shard in a worker process and puts its normalised records on ``batches``.
+
+    ``batches`` is bounded, so a worker blocks whenever the writer falls behind. A
+    ``(_SHARD_DONE, filename)`` marker is always put last, even when parsing fails.
+
+    Returns:
+        tuple: The number of records parsed and the :class:`RecordErrors` of the invalid ones.
+    """
+    errors = RecordErrors()
+    batch = []
+    count = 0
+    try:
+        for record in iter_movies(filename, file_format, errors):
+            batch.append(record)
+            if len(batch) >= batch_size:
+                batches.put(batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            batches.put(batch)
+            count += len(batch)
+    finally:
+        batches.put((_SHARD_DONE, filename))
+    return count, errors
+
+def pipeline_load_files(filenames, app, file_format=None, batch_size=1000, workers=None, max_pending=None,
+                        progress_every=5.0, report=print):
+    """
+    Loads many catalogue shards, parsing them in parallel and writing from one place.
+
+    Shards are parsed and validated by a pool of ``workers`` processes, which hand
+    batches of normalised records to this process through a queue holding at most
+    ``max_pending`` batches. The calling process is the only writer, since SQLite
+    allows a single one, and inserts every batch with :func:`bulk_load_movies` in one
+    transaction. When the writer falls behind, the queue fills up and the parsers
+    block, so memory stays bounded by ``max_pending`` batches.
+
+    Parameters:
+        filenames (list): The paths of the shard files.
+        app (Flask): The Flask application object.
+        file_format (str, optional): 'json' or 'jsonl'. Defaults to guessing from each extension.
+        batch_size (int, optional): The number of movies per batch. Defaults to 1000.
+        workers (int, optional): The number of parser processes. Defaults to the CPU count.
+        max_pending (int, optional): The number of batches that may wait for the writer.
+            Defaults to twice the number of workers.
+        progress_every (float, optional): Seconds between progress reports. Defaults to 5.
+        report (callable, optional): Receives the progress and summary lines. Defaults to print.
+
+    Returns:
+        int: The number of movies loaded, 0 if the load failed and was rolled back.
+    """
+    workers = max(1, min(workers or os.cpu_count() or 1, len(filenames)))
+    max_pending = max_pending or 2 * workers
+    with app.app_context(), multiprocessing.Manager() as manager, \
+            ProcessPoolExecutor(max_workers=workers) as executor:
+        db_session = get_db()
+        batches = manager.Queue(maxsize=max_pending)
+        futures = [executor.submit(_parse_shard, filename, file_format, batch_size, batches)
+                   for filename in filenames]
+        start = last_report = time.perf_counter()
+        count = 0
+        shards_done = 0
+        try:
+            while shards_done < len(filenames):
+                try:
+                    batch = batches.get(timeout=1)
+                except queue.Empty:
+                    for future in futures:
+                        if future.done() and future.exception() is not None:
+                            raise future.exception()  # A worker died without reaching its marker
+                    continue
+                if isinstance(batch, tuple) and batch[0] == _SHARD_DONE:
+                    shards_done += 1
+                    continue
+                count += bulk_load_movies(db_session, batch, batch_size=batch_size)
+                now = time.perf_counter()
+                if now - last_report >= progress_every:
+                    last_report = now
+                    report(f"{count} movies written, {shards_done}/{len(filenames)} shards parsed "
+                           f"({count / (now - start):.0f} rows/s).")
+            errors = RecordErrors()
+            for future in futures:
+                errors.merge(future.result()[1])
+            bump_catalogue_version(db_session)
+            db_session.commit()
+            suggest.rebuild(app, db_session)  # Core inserts bypass the ORM hooks
+            elapsed = time.perf_counter() - start
+            report(f"Loaded {count} movies from {len(filenames)} shards with {workers} workers "
+                   f"in {elapsed:.2f}s ({count / elapsed if elapsed else count:.0f} rows/s).")
+            if errors:
+                report(f"Skipped {errors.count} invalid records, first: {errors.first}")
+        except Exception as e:
+            db_session.rollback()
+            count = 0
+            report(f"An error occurred while populating the database: {e}")
+            # Unblock the parsers still waiting on the queue so the pool can shut down
+            for future in futures:
+                future.cancel()
+            while not all(future.done() for future in futures):
+                try:
+                    batches.get(timeout=1)
+                except queue.Empty:
+                    pass
+        finally:
+            close_db()
+        return count
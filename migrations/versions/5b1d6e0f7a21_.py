@@ -0,0 +1,58 @@
+"""store blacklisted tokens as digests with an expiry
+
+Revision ID: 5b1d6e0f7a21
+Revises: 29028c03d307
+Create Date: 2026-10-18 09:12:40.118203
+
+"""
+import datetime
+import hashlib
+from alembic import op
+import sqlalchemy as sa
+import jwt
+
+
+# revision identifiers, used by Alembic.
+revision = '5b1d6e0f7a21'
+down_revision = '29028c03d307'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('blacklist_tokens') as batch_op:
+        batch_op.add_column(sa.Column('token_hash', sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column('expires_at', sa.DateTime(), nullable=True))
+
+    # Replace every stored token by its digest and expiry
+    connection = op.get_bind()
+    rows = connection.execute(sa.text('SELECT id, token, blacklisted_on FROM blacklist_tokens')).fetchall()
+    for row_id, token, blacklisted_on in rows:
+        try:
+            payload = jwt.decode(token, options={'verify_signature': False, 'verify_exp': False})
+            expires_at = datetime.datetime.utcfromtimestamp(payload['exp'])
+        except (jwt.InvalidTokenError, KeyError):
+            expires_at = datetime.datetime.utcnow() + datetime.timedelta(days=1)
+        connection.execute(
+            sa.text('UPDATE blacklist_tokens SET token_hash = :token_hash, expires_at = :expires_at WHERE id = :id'),
+            {'token_hash': hashlib.sha256(token.encode('utf-8')).hexdigest(), 'expires_at': expires_at, 'id': row_id}
+        )
+
+    with op.batch_alter_table('blacklist_tokens') as batch_op:
+        batch_op.drop_column('token')
+        batch_op.alter_column('token_hash', nullable=False)
+        batch_op.alter_column('expires_at', nullable=False)
+        batch_op.create_index('ix_blacklist_tokens_token_hash', ['token_hash'], unique=True)
+        batch_op.create_index('ix_blacklist_tokens_expires_at', ['expires_at'], unique=False)
+
+
+def downgrade():
+    # The raw tokens cannot be recovered, so expired and revoked tokens are simply forgotten
+    op.execute('DELETE FROM blacklist_tokens')
+    with op.batch_alter_table('blacklist_tokens') as batch_op:
+        batch_op.drop_index('ix_blacklist_tokens_expires_at')
+        batch_op.drop_index('ix_blacklist_tokens_token_hash')
+        batch_op.add_column(sa.Column('token', sa.VARCHAR(length=500), nullable=False))
+        batch_op.create_unique_constraint('uq_blacklist_tokens_token', ['token'])
+        batch_op.drop_column('expires_at')
+        batch_op.drop_column('token_hash')
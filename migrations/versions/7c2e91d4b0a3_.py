@@ -0,0 +1,24 @@
+"""index genres by name and movie
+
+Revision ID: 7c2e91d4b0a3
+Revises: 5b1d6e0f7a21
+Create Date: 2026-10-18 11:02:17.542981
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c2e91d4b0a3'
+down_revision = '5b1d6e0f7a21'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_genres_name_movie_id', 'genres', ['name', 'movie_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_genres_name_movie_id', table_name='genres')
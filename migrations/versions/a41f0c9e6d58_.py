@@ -0,0 +1,26 @@
+"""index movies by sort column and id
+
+Revision ID: a41f0c9e6d58
+Revises: 7c2e91d4b0a3
+Create Date: 2026-10-18 12:20:51.903417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a41f0c9e6d58'
+down_revision = '7c2e91d4b0a3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_movies_imdb_score_id', 'movies', ['imdb_score', 'id'], unique=False)
+    op.create_index('ix_movies_popularity_id', 'movies', ['popularity', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_movies_popularity_id', table_name='movies')
+    op.drop_index('ix_movies_imdb_score_id', table_name='movies')
@@ -0,0 +1,33 @@
+"""daily rollups of archived movie logs
+
+Revision ID: b6d1f8e3a527
+Revises: f4a9d2c6b813
+Create Date: 2026-10-18 18:05:41.372910
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6d1f8e3a527'
+down_revision = 'f4a9d2c6b813'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('movies_logs_daily',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('movie_id', sa.Integer(), nullable=False),
+    sa.Column('added', sa.Integer(), nullable=False),
+    sa.Column('updated', sa.Integer(), nullable=False),
+    sa.Column('deleted', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'movie_id')
+    )
+    op.create_index('ix_movies_logs_daily_movie_id_day', 'movies_logs_daily', ['movie_id', 'day'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_movies_logs_daily_movie_id_day', table_name='movies_logs_daily')
+    op.drop_table('movies_logs_daily')
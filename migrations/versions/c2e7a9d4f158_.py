@@ -0,0 +1,30 @@
+"""never reuse movie log ids
+
+Revision ID: c2e7a9d4f158
+Revises: b6d1f8e3a527
+Create Date: 2026-10-18 19:12:27.530614
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2e7a9d4f158'
+down_revision = 'b6d1f8e3a527'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # SQLite only honours AUTOINCREMENT when the table is created, so rebuild it; the
+    # copied rows seed sqlite_sequence with the highest id in use
+    with op.batch_alter_table('movies_logs', recreate='always',
+                              table_kwargs={'sqlite_autoincrement': True}) as batch_op:
+        pass
+
+
+def downgrade():
+    with op.batch_alter_table('movies_logs', recreate='always',
+                              table_kwargs={'sqlite_autoincrement': False}) as batch_op:
+        pass
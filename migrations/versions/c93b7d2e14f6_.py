@@ -0,0 +1,36 @@
+"""track catalogue changes for conditional requests
+
+Revision ID: c93b7d2e14f6
+Revises: a41f0c9e6d58
+Create Date: 2026-10-18 14:05:33.271846
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c93b7d2e14f6'
+down_revision = 'a41f0c9e6d58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('movies') as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=False,
+                                      server_default=sa.text('CURRENT_TIMESTAMP')))
+
+    op.create_table('catalogue_version',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.execute("INSERT INTO catalogue_version (id, version, updated_at) VALUES (1, 1, CURRENT_TIMESTAMP)")
+
+
+def downgrade():
+    op.drop_table('catalogue_version')
+    with op.batch_alter_table('movies') as batch_op:
+        batch_op.drop_column('updated_at')
@@ -0,0 +1,54 @@
+"""normalise genre names and count movies per genre
+
+Revision ID: d5e8a1f3c720
+Revises: c93b7d2e14f6
+Create Date: 2026-10-18 15:12:48.630114
+
+"""
+import json
+from collections import Counter
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5e8a1f3c720'
+down_revision = 'c93b7d2e14f6'
+branch_labels = None
+depends_on = None
+
+
+def normalise(genres):
+    names = []
+    for name in genres or []:
+        name = str(name).strip()
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def upgrade():
+    genre_counts = op.create_table('genre_counts',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('movie_count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+
+    # Strip the leading spaces imported from imdb.json and count the movies per genre
+    connection = op.get_bind()
+    counts = Counter()
+    for movie_id, stored in connection.execute(sa.text('SELECT id, genre FROM movies')).fetchall():
+        genres = normalise(json.loads(stored) if stored else [])
+        counts.update(genres)
+        connection.execute(sa.text('UPDATE movies SET genre = :genre WHERE id = :id'),
+                           {'genre': json.dumps(genres), 'id': movie_id})
+    op.execute('UPDATE genres SET name = TRIM(name)')
+    op.execute('DELETE FROM genres WHERE id NOT IN (SELECT MIN(id) FROM genres GROUP BY name, movie_id)')
+    if counts:
+        op.bulk_insert(genre_counts, [{'name': name, 'movie_count': count} for name, count in counts.items()])
+
+
+def downgrade():
+    op.drop_table('genre_counts')
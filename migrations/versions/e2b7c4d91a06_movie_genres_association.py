@@ -0,0 +1,104 @@
+"""replace the genre JSON column with a movie_genres association
+
+Revision ID: e2b7c4d91a06
+Revises: d5e8a1f3c720
+Create Date: 2026-10-18 16:40:12.905337
+
+"""
+import json
+from collections import Counter
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2b7c4d91a06'
+down_revision = 'd5e8a1f3c720'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # One row per genre name, carrying the movie counts that used to live in genre_counts
+    unique_genres = op.create_table('unique_genres',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('movie_count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+
+    # The JSON column is the source of truth; the old genres rows went stale on edits
+    connection = op.get_bind()
+    links = []
+    counts = Counter()
+    for movie_id, stored in connection.execute(sa.text('SELECT id, genre FROM movies')).fetchall():
+        names = []
+        for name in json.loads(stored) if stored else []:
+            name = str(name).strip()
+            if name and name not in names:
+                names.append(name)
+        links.extend((movie_id, name) for name in names)
+        counts.update(names)
+    ids = {name: genre_id for genre_id, name in enumerate(sorted(counts), start=1)}
+    if counts:
+        op.bulk_insert(unique_genres, [{'id': ids[name], 'name': name, 'movie_count': counts[name]}
+                                       for name in sorted(counts)])
+
+    op.drop_index('ix_genres_name_movie_id', table_name='genres')
+    op.drop_table('genres')
+    op.drop_table('genre_counts')
+    op.rename_table('unique_genres', 'genres')
+
+    movie_genres = op.create_table('movie_genres',
+    sa.Column('movie_id', sa.Integer(), nullable=False),
+    sa.Column('genre_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['genre_id'], ['genres.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['movie_id'], ['movies.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('movie_id', 'genre_id')
+    )
+    op.create_index('ix_movie_genres_genre_id_movie_id', 'movie_genres', ['genre_id', 'movie_id'], unique=False)
+    if links:
+        op.bulk_insert(movie_genres, [{'movie_id': movie_id, 'genre_id': ids[name]} for movie_id, name in links])
+
+    with op.batch_alter_table('movies') as batch_op:
+        batch_op.drop_column('genre')
+
+
+def downgrade():
+    with op.batch_alter_table('movies') as batch_op:
+        batch_op.add_column(sa.Column('genre', sa.String(length=255), nullable=False, server_default='[]'))
+
+    connection = op.get_bind()
+    names = {}
+    for movie_id, name in connection.execute(sa.text(
+            'SELECT movie_genres.movie_id, genres.name FROM movie_genres '
+            'JOIN genres ON genres.id = movie_genres.genre_id ORDER BY genres.name')).fetchall():
+        names.setdefault(movie_id, []).append(name)
+    for movie_id, genres in names.items():
+        connection.execute(sa.text('UPDATE movies SET genre = :genre WHERE id = :id'),
+                           {'genre': json.dumps(genres), 'id': movie_id})
+
+    op.create_table('genre_counts',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('movie_count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+    op.execute('INSERT INTO genre_counts (name, movie_count) SELECT name, movie_count FROM genres')
+
+    op.create_table('movie_genre_rows',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('movie_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['movie_id'], ['movies.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.execute('INSERT INTO movie_genre_rows (name, movie_id) SELECT genres.name, movie_genres.movie_id '
+               'FROM movie_genres JOIN genres ON genres.id = movie_genres.genre_id')
+    op.drop_index('ix_movie_genres_genre_id_movie_id', table_name='movie_genres')
+    op.drop_table('movie_genres')
+    op.drop_table('genres')
+    op.rename_table('movie_genre_rows', 'genres')
+    op.create_index('ix_genres_name_movie_id', 'genres', ['name', 'movie_id'], unique=False)
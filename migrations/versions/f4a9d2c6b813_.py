@@ -0,0 +1,28 @@
+"""index movie logs for keyset pagination
+
+Revision ID: f4a9d2c6b813
+Revises: e2b7c4d91a06
+Create Date: 2026-10-18 17:22:05.184923
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4a9d2c6b813'
+down_revision = 'e2b7c4d91a06'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_movies_logs_timestamp_id', 'movies_logs', ['timestamp', 'id'], unique=False)
+    op.create_index('ix_movies_logs_movie_id_timestamp_id', 'movies_logs', ['movie_id', 'timestamp', 'id'], unique=False)
+    op.create_index('ix_movies_logs_action_timestamp_id', 'movies_logs', ['action', 'timestamp', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_movies_logs_action_timestamp_id', table_name='movies_logs')
+    op.drop_index('ix_movies_logs_movie_id_timestamp_id', table_name='movies_logs')
+    op.drop_index('ix_movies_logs_timestamp_id', table_name='movies_logs')
@@ -1,9 +1,36 @@
+import argparse
 from app import create_app
-from db_utils import load_data_from_json, empty_database
+from db_utils import load_data_from_json, empty_database, stream_data_from_file, pipeline_load_files
+
+def parse_args():
+    """
+    Parses the command line options of the populate script.
+
+    Returns:
+        argparse.Namespace: The parsed options.
+    """
+    parser = argparse.ArgumentParser(description='Empty the database and load a movie catalogue.')
+    parser.add_argument('paths', nargs='*', default=['imdb.json'],
+                        help='Catalogue file, or several shard files (default: imdb.json).')
+    parser.add_argument('--stream', action='store_true',
+                        help='Parse the file incrementally so memory stays bounded for large catalogues.')
+    parser.add_argument('--format', choices=['json', 'jsonl'], default=None,
+                        help='Catalogue format; implies --stream. Guessed from the extension by default.')
+    parser.add_argument('--batch-size', type=int, default=1000, help='Movies per INSERT batch (default: 1000).')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Parse shards in this many processes with a single writer. '
+                             'Implied when several files are given (default: the CPU count).')
+    return parser.parse_args()
 
 if __name__ == "__main__":
-    json_file_path = 'imdb.json'
+    args = parse_args()
     app = create_app(test_config='production')  # Create an app instance without specifying a test config
     with app.app_context():
         empty_database()  # Empty the database first
-        load_data_from_json(json_file_path, app)
\ No newline at end of file
+        if args.workers or len(args.paths) > 1:
+            pipeline_load_files(args.paths, app, file_format=args.format, batch_size=args.batch_size,
+                                workers=args.workers)
+        elif args.stream or args.format or args.paths[0].endswith(('.jsonl', '.ndjson')):
+            stream_data_from_file(args.paths[0], app, file_format=args.format, batch_size=args.batch_size)
+        else:
+            load_data_from_json(args.paths[0], app, batch_size=args.batch_size)
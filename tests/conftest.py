@@ -13,6 +13,25 @@ TEST_EMAIL = 'kunal.vbu@gmail.com'
 TEST_PASSWORD = '123456'
 
 
+class FakeClock:
+    """
+    A controllable replacement for time.time() and time.monotonic().
+    """
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock():
+    """
+    Provide a clock that only moves when a test sets its ``now`` attribute.
+
+    :return: The fake clock, starting at 0.
+    """
+    return FakeClock()
+
 @pytest.fixture(scope="function")
 def app():
     """
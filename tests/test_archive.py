@@ -0,0 +1,143 @@
+import datetime
+import gzip
+import json
+import os
+from app.archive import (ArchivedLog, archive_logs, archive_path, archived_months, read_archive, read_month,
+                         write_archive)
+from app.database import get_db
+from app.models import MovieLogRollup, MoviesLog
+
+def add_logs(db_session, start, count, step=datetime.timedelta(days=10)):
+    """
+    Adds movie logs ``step`` apart, cycling through the actions of two movies.
+    """
+    for i in range(count):
+        log = MoviesLog(movie_id=i % 2 + 1, movie_name=f'Movie {i % 2 + 1}', action=('ADDED', 'UPDATED', 'DELETED')[i % 3])
+        log.timestamp = start + i * step
+        db_session.add(log)
+    db_session.commit()
+
+def test_archive_movie_logs_command(app, runner, tmp_path):
+    """
+    Test that old logs move to monthly archive files and daily rollups, and recent ones stay.
+
+    Args:
+        app: The Flask app object.
+        runner: The test runner object.
+        tmp_path: A temporary archive directory.
+    """
+    app.config['MOVIE_LOG_ARCHIVE_DIR'] = str(tmp_path)
+    db_session = get_db()
+    add_logs(db_session, datetime.datetime(2023, 1, 5, 12), 6)
+    add_logs(db_session, datetime.datetime.utcnow() - datetime.timedelta(days=1), 2, datetime.timedelta(hours=1))
+
+    result = runner.invoke(args=['archive-movie-logs', '--days', '30', '--batch-size', '4'])
+    assert 'Archived 6 movie logs older than 30 days' in result.output
+    assert db_session.query(MoviesLog).count() == 2
+    assert archived_months(str(tmp_path)) == ['2023-01', '2023-02']
+    with gzip.open(archive_path(str(tmp_path), '2023-01'), 'rt') as archive:
+        entries = [json.loads(line) for line in archive]
+    assert [entry['timestamp'] for entry in entries] == ['2023-01-05T12:00:00', '2023-01-15T12:00:00', '2023-01-25T12:00:00']
+
+    rollups = {(row.day, row.movie_id): (row.added, row.updated, row.deleted)
+               for row in db_session.query(MovieLogRollup).all()}
+    assert rollups[datetime.date(2023, 1, 5), 1] == (1, 0, 0)
+    assert rollups[datetime.date(2023, 1, 15), 2] == (0, 1, 0)
+    assert sum(sum(counts) for counts in rollups.values()) == 6
+
+    # Later runs append to the month files and rollups; entries written twice are read once
+    add_logs(db_session, datetime.datetime(2023, 1, 5, 12), 1)
+    assert archive_logs(db_session, str(tmp_path), datetime.datetime(2023, 2, 1)) == 1
+    assert db_session.get(MovieLogRollup, (datetime.date(2023, 1, 5), 1)).added == 2
+    january = read_month(str(tmp_path), '2023-01')
+    write_archive(str(tmp_path), january)
+    assert read_month(str(tmp_path), '2023-01') == january and len(january) == 4
+    assert len(os.listdir(tmp_path)) == 2
+
+def test_archive_files_stay_sorted(tmp_path):
+    """
+    Test that repeated and late entries are merged into place, so month files can be streamed.
+
+    Args:
+        tmp_path: A temporary archive directory.
+    """
+    logs = [ArchivedLog(i, 1, 'Movie 1', 'ADDED', datetime.datetime(2023, 1, i + 1)) for i in range(1, 6)]
+    write_archive(str(tmp_path), logs[:3])
+    write_archive(str(tmp_path), logs[3:])
+    write_archive(str(tmp_path), logs[2:4])  # A run interrupted before deleting its batch
+    write_archive(str(tmp_path), [ArchivedLog(99, 2, 'Movie 2', 'UPDATED', datetime.datetime(2023, 1, 2))])
+    with gzip.open(archive_path(str(tmp_path), '2023-01'), 'rt') as archive:
+        assert [json.loads(line)['id'] for line in archive] == [1, 99, 2, 3, 4, 5]
+    assert os.listdir(tmp_path) == ['movies_logs-2023-01.jsonl.gz']
+
+    assert [entry.id for entry in read_archive(str(tmp_path), {}, 'desc', limit=2)] == [5, 4]
+    position = (datetime.datetime(2023, 1, 3), 2)
+    assert [entry.id for entry in read_archive(str(tmp_path), {}, 'asc', position, limit=2)] == [3, 4]
+    assert [entry.id for entry in read_archive(str(tmp_path), {'movie_id': 2}, 'desc')] == [99]
+
+def test_movie_logs_history(app, client, admin_token, tmp_path):
+    """
+    Test that the logs API includes the archive only when history is requested.
+
+    Args:
+        app: The Flask app object.
+        client: The test client.
+        admin_token: The token of an admin user.
+        tmp_path: A temporary archive directory.
+    """
+    app.config['MOVIE_LOG_ARCHIVE_DIR'] = str(tmp_path)
+    db_session = get_db()
+    add_logs(db_session, datetime.datetime(2023, 1, 5, 12), 9)
+    add_logs(db_session, datetime.datetime(2023, 6, 1), 3, datetime.timedelta(hours=1))
+    archive_logs(db_session, str(tmp_path), datetime.datetime(2023, 5, 1), batch_size=5)
+    headers = {'Authorization': f'Bearer {admin_token}'}
+
+    def walk(query):
+        seen, cursor = [], ''
+        while cursor is not None:
+            response = client.get(f'/api/movie_logs?{query}&cursor={cursor}', headers=headers)
+            assert response.status_code == 200
+            data = response.get_json()
+            seen.extend(data['logs'])
+            cursor = data['next_cursor']
+        return seen
+
+    assert len(walk('limit=2')) == 3
+    newest_first = walk('limit=2&history=true')
+    assert len(newest_first) == 12
+    keys = [(log['timestamp'], log['id']) for log in newest_first]
+    assert keys == sorted(keys, reverse=True)
+    assert walk('limit=4&history=true&order=asc') == newest_first[::-1]
+    movie = walk('limit=3&history=true&movie_id=2&action=UPDATED&until=2023-04-01')
+    assert [(log['movie_id'], log['action']) for log in movie] == [(2, 'UPDATED')] * 2
+
+    response = client.get('/api/movie_logs?format=ndjson&history=true&since=2023-02-01', headers=headers)
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [line['timestamp'] for line in lines] == sorted(log['timestamp'] for log in newest_first)[3:]
+
+def test_log_ids_are_not_reused_after_archive(app, client, admin_token, tmp_path):
+    """
+    Test that logs written after the archive empties the table get new ids.
+
+    Args:
+        app: The Flask app object.
+        client: The test client.
+        admin_token: The token of an admin user.
+        tmp_path: A temporary archive directory.
+    """
+    app.config['MOVIE_LOG_ARCHIVE_DIR'] = str(tmp_path)
+    db_session = get_db()
+    add_logs(db_session, datetime.datetime(2023, 1, 5, 12), 3)
+    last_id = db_session.query(MoviesLog.id).order_by(MoviesLog.id.desc()).first().id
+    assert archive_logs(db_session, str(tmp_path), datetime.datetime.utcnow() + datetime.timedelta(days=1)) == 3
+    assert db_session.query(MoviesLog).count() == 0
+    headers = {'Authorization': f'Bearer {admin_token}'}
+
+    movie_data = {'name': 'After Archive', 'director': 'Director Name', 'popularity': 1.0, 'imdb_score': 5.0}
+    assert client.post('/api/movies', json=movie_data, headers=headers).status_code == 201
+    data = client.get(f'/api/movie_logs/feed?since_id={last_id}', headers=headers).get_json()
+    assert [log['movie_name'] for log in data['logs']] == ['After Archive']
+    assert data['last_id'] > last_id
+
+    logs = client.get('/api/movie_logs?history=true', headers=headers).get_json()['logs']
+    assert len(logs) == 4 and len({log['id'] for log in logs}) == 4
@@ -0,0 +1,58 @@
+from app.cache import TTLCache
+
+def test_lru_eviction():
+    """
+    Test that the least recently used entry is evicted when the cache is full.
+
+    Returns:
+        None
+    """
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1  # 'a' is now the most recently used entry
+    cache.set('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert cache.stats()['evictions'] == 1
+
+def test_entries_expire(clock):
+    """
+    Test that entries are no longer returned once their TTL has passed.
+
+    Args:
+        clock: A clock that only moves when told to.
+
+    Returns:
+        None
+    """
+    cache = TTLCache(maxsize=10, ttl=5, clock=clock)
+    cache.set('a', 1)
+    clock.now = 4.9
+    assert cache.get('a') == 1
+    clock.now = 5.0
+    assert cache.get('a', 'missing') == 'missing'
+
+    stats = cache.stats()
+    assert stats['hits'] == 1
+    assert stats['misses'] == 1
+    assert stats['expirations'] == 1
+    assert stats['size'] == 0
+
+def test_pop_and_clear():
+    """
+    Test that entries can be invalidated individually or all at once.
+
+    Returns:
+        None
+    """
+    cache = TTLCache()
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.pop('a')
+    cache.pop('missing')
+    assert cache.get('a') is None
+    cache.clear()
+    assert len(cache) == 0
@@ -0,0 +1,145 @@
+from sqlalchemy import event
+from app.catalogue import Catalogue, bump_catalogue_version, get_catalogue
+from app.database import db, get_db
+
+def test_catalogue_versions(app):
+    """
+    Test that a committed bump hides cached results and that results computed across it are not stored.
+
+    Args:
+        app: The Flask app object.
+    """
+    with app.app_context():
+        db_session = get_db()
+        catalogue = get_catalogue()
+        start = catalogue.sync(db_session)
+        version, result = catalogue.lookup(('page', 1))
+        assert result is None
+        catalogue.store(version, ('page', 1), {'movies': []})
+        assert catalogue.lookup(('page', 1)) == (version, {'movies': []})
+
+        stale_version, _ = catalogue.lookup(('page', 2))
+        bump_catalogue_version(db_session)
+        db_session.commit()
+        catalogue.store(stale_version, ('page', 2), {'movies': ['stale']})
+        assert catalogue.sync(db_session) == start + 1
+        assert catalogue.lookup(('page', 1))[1] is None
+        assert catalogue.lookup(('page', 2))[1] is None
+
+def test_catalogue_sees_other_workers_after_sync_interval(app, clock):
+    """
+    Test that a worker picks up a version bumped elsewhere once its sync interval has passed.
+
+    Args:
+        app: The Flask app object.
+        clock: A clock that only moves when told to.
+    """
+    worker = Catalogue(sync_interval=1.0, clock=clock)
+    with app.app_context():
+        db_session = get_db()
+        start = worker.sync(db_session)
+        version, _ = worker.lookup('key')
+        worker.store(version, 'key', 'cached')
+
+        bump_catalogue_version(db_session)
+        db_session.commit()
+        assert worker.sync(db_session) == start
+        assert worker.lookup('key')[1] == 'cached'
+
+        clock.now += 1.0
+        assert worker.sync(db_session) == start + 1
+        assert worker.lookup('key')[1] is None
+        assert worker.stats()['version'] == start + 1
+
+def count_movie_queries(app):
+    """
+    Records the SELECT statements run against the movies table.
+
+    Args:
+        app: The Flask app object.
+
+    Returns:
+        list: The recorded statements, appended to as queries run.
+    """
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith('SELECT') and 'FROM movies' in statement:
+            statements.append(statement)
+
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', record)
+    return statements
+
+def test_get_movies_is_cached_until_a_write(app, client, admin_token):
+    """
+    Test that repeated listings are served from the cache and that add_movie invalidates them.
+
+    Args:
+        app: The Flask app object.
+        client: The test client.
+        admin_token: The token of an admin user.
+    """
+    headers = {'Authorization': f'Bearer {admin_token}'}
+    url = '/api/get_movies?sort=popularity&order=desc&per_page=5'
+    statements = count_movie_queries(app)
+    first = client.get(url, headers=headers).get_json()
+    queries = len(statements)
+    assert queries > 0
+    assert client.get(url + '&search=', headers=headers).get_json() == first
+    assert len(statements) == queries
+
+    movie_data = {'name': 'Cache Buster', 'director': 'Director Name', 'popularity': 1000.0,
+                  'imdb_score': 5.0, 'genre': ['Drama']}
+    assert client.post('/api/movies', json=movie_data, headers=headers).status_code == 201
+    assert client.get(url, headers=headers).get_json()['movies'][0]['name'] == 'Cache Buster'
+
+    stats = client.get('/stats', headers=headers).get_json()['movies_cache']
+    assert stats['hits'] >= 1 and stats['version'] >= 1
+
+def test_conditional_listing_requests(client, admin_token):
+    """
+    Test ETag and Last-Modified revalidation of listings and their invalidation by a write.
+
+    Args:
+        client: The test client.
+        admin_token: The token of an admin user.
+    """
+    headers = {'Authorization': f'Bearer {admin_token}'}
+    for url in ('/api/get_movies?page=2', '/api/get_genres'):
+        response = client.get(url, headers=headers)
+        assert response.status_code == 200
+        assert response.headers['Cache-Control'] == 'public, no-cache'
+        etag = response.headers['ETag']
+        last_modified = response.headers['Last-Modified']
+
+        revalidated = client.get(url, headers=dict(headers, **{'If-None-Match': etag}))
+        assert revalidated.status_code == 304 and revalidated.data == b''
+        assert revalidated.headers['ETag'] == etag
+        assert client.get(url, headers=dict(headers, **{'If-Modified-Since': last_modified})).status_code == 304
+
+    movie_data = {'name': 'Etag Buster', 'director': 'Director Name', 'popularity': 1.0,
+                  'imdb_score': 5.0, 'genre': ['Drama']}
+    client.post('/api/movies', json=movie_data, headers=headers)
+    response = client.get('/api/get_genres', headers=dict(headers, **{'If-None-Match': etag}))
+    assert response.status_code == 200 and response.headers['ETag'] != etag
+
+def test_conditional_movie_requests(client, admin_token):
+    """
+    Test that a movie's ETag follows its updated_at and that a 304 skips loading the movie.
+
+    Args:
+        client: The test client.
+        admin_token: The token of an admin user.
+    """
+    headers = {'Authorization': f'Bearer {admin_token}'}
+    response = client.get('/api/movies/1', headers=headers)
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == 'private, no-cache'
+    etag = response.headers['ETag']
+    assert client.get('/api/movies/1', headers=dict(headers, **{'If-None-Match': etag})).status_code == 304
+    assert client.get('/api/movies/424242', headers=headers).status_code == 404
+
+    client.put('/api/movies/1', json={'name': 'Renamed'}, headers=headers)
+    response = client.get('/api/movies/1', headers=dict(headers, **{'If-None-Match': etag}))
+    assert response.status_code == 200 and response.get_json()['name'] == 'Renamed'
@@ -1,4 +1,25 @@
 import json
+from sqlalchemy import event
+from app.database import db
+from app.principals import get_principal_cache
+
+def count_user_queries(app):
+    """
+    Starts counting the statements that read the users table.
+
+    Parameters:
+    - app: The Flask app object.
+
+    Returns:
+    - list: A list that receives one entry per users query.
+    """
+    statements = []
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if 'FROM users' in statement:
+            statements.append(statement)
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    return statements
 
 def test_index_route(client):
     """
@@ -117,3 +138,123 @@ def test_edit_account_route_put_without_new_password(client, user_token):
                           headers={'Authorization': f'Bearer {user_token}'})
     assert response.status_code == 400
     assert b'fail' in response.data
+
+def test_stats_route_for_admin(client, admin_token):
+    """
+    Test that an admin can read the connection pool statistics.
+
+    Args:
+        client (object): The client object used to make the HTTP request.
+        admin_token (str): The admin token used for authentication.
+
+    Returns:
+        None
+    """
+    response = client.get('/stats', headers={'Authorization': f'Bearer {admin_token}'})
+    assert response.status_code == 200
+    assert 'checkouts' in response.json['db_pool']
+
+def test_stats_route_for_user(client, user_token):
+    """
+    Test that a regular user cannot read the runtime statistics.
+
+    Args:
+        client (object): The client object used to make the HTTP request.
+        user_token (str): The user token used for authentication.
+
+    Returns:
+        None
+    """
+    response = client.get('/stats', headers={'Authorization': f'Bearer {user_token}'})
+    assert response.status_code == 403
+
+def test_principal_is_cached(app, client, user_token):
+    """
+    Test that token_required looks the user up once and then serves it from the principal cache.
+
+    Args:
+        app (object): The Flask app object.
+        client (object): The client object used to make the HTTP request.
+        user_token (str): The user token used for authentication.
+
+    Returns:
+        None
+    """
+    headers = {'Authorization': f'Bearer {user_token}'}
+    statements = count_user_queries(app)
+    assert client.get('/api/get_movies', headers=headers).status_code == 200
+    assert client.get('/api/get_movies', headers=headers).status_code == 200
+    assert len(statements) <= 1
+
+def test_edit_account_invalidates_principal(app, client, user_token):
+    """
+    Test that updating the account drops the cached principal.
+
+    Args:
+        app (object): The Flask app object.
+        client (object): The client object used to make the HTTP request.
+        user_token (str): The user token used for authentication.
+
+    Returns:
+        None
+    """
+    headers = {'Authorization': f'Bearer {user_token}'}
+    client.get('/dashboard', headers=headers)
+    assert len(get_principal_cache()) == 1
+    response = client.put('/edit-account', data=json.dumps({'new_password': 'newpassword'}),
+                          content_type='application/json', headers=headers)
+    assert response.status_code == 200
+    assert len(get_principal_cache()) == 0
+
+def test_principal_dropped_only_on_commit(app, client, user_token):
+    """
+    Test that a changed user's cached principal is dropped on commit and kept after a rollback.
+
+    Args:
+        app (object): The Flask app object.
+        client (object): The client object used to make the HTTP request.
+        user_token (str): The user token used for authentication.
+
+    Returns:
+        None
+    """
+    from app.database import get_db
+    from app.models import User
+
+    headers = {'Authorization': f'Bearer {user_token}'}
+    client.get('/dashboard', headers=headers)
+    cache = get_principal_cache()
+    assert len(cache) == 1
+    db_session = get_db()
+    user = db_session.query(User).filter_by(email='kunal.vbu@gmail.com').one()
+    user.name = 'Renamed User'
+    db_session.flush()
+    assert len(cache) == 1
+    db_session.rollback()
+    assert len(cache) == 1
+
+    user = db_session.query(User).filter_by(email='kunal.vbu@gmail.com').one()
+    user.name = 'Renamed User'
+    db_session.commit()
+    assert len(cache) == 0
+
+def test_claims_only_mode_skips_user_lookup(app, client, user_token):
+    """
+    Test that in claims-only mode authenticated requests do not query the users table.
+
+    Args:
+        app (object): The Flask app object.
+        client (object): The client object used to make the HTTP request.
+        user_token (str): The user token used for authentication.
+
+    Returns:
+        None
+    """
+    app.config['AUTH_CLAIMS_ONLY'] = True
+    response = client.post('/auth/login', json={'email': 'kunal.vbu@gmail.com', 'password': '123456'})
+    auth_token = response.json['auth_token']
+
+    statements = count_user_queries(app)
+    response = client.get('/api/get_movies', headers={'Authorization': f'Bearer {auth_token}'})
+    assert response.status_code == 200
+    assert statements == []
@@ -1,6 +1,13 @@
+import datetime
 from sqlalchemy import inspect
 from app import create_app
-from app.database import get_db
+from app.database import InstrumentedQueuePool, db, get_db, get_pool_stats
+from app.models import BlacklistToken, Movie, movie_genres
+import io
+import json
+import pytest
+from db_utils import (RecordErrors, bulk_load_movies, iter_json_array, iter_movies, normalise_movie,
+                      pipeline_load_files, stream_data_from_file)
 def test_init_db_command(runner, monkeypatch):
     """
     Test the initialization of the database command.
@@ -29,8 +36,8 @@ def test_init_db_command(runner, monkeypatch):
 
     # Optionally, you can check if the necessary tables were created
     with app.app_context():
-        db = get_db()
-        inspector = inspect(db.bind)
+        db_session = get_db()
+        inspector = inspect(db_session.get_bind())
         tables = inspector.get_table_names()
         assert 'users' in tables  # Replace 'users' with the name of your user table
 
@@ -58,3 +65,238 @@ def test_db_session(db_session):
         None
     """
     assert db_session is not None
+
+def test_engine_is_pooled(app):
+    """
+    Verifies that the app uses a single pooled engine shared by get_db() and db.session.
+
+    Parameters:
+        app: The Flask app object.
+
+    Returns:
+        None
+    """
+    with app.app_context():
+        assert isinstance(db.engine.pool, InstrumentedQueuePool)
+        assert get_db() is db.session
+        assert get_db().get_bind() is db.engine
+
+def test_pool_stats(app):
+    """
+    Verifies that pool checkouts and waits are recorded.
+
+    Parameters:
+        app: The Flask app object.
+
+    Returns:
+        None
+    """
+    with app.app_context():
+        before = get_pool_stats()['checkouts']
+        with db.engine.connect() as connection:
+            connection.exec_driver_sql('SELECT 1')
+        stats = get_pool_stats()
+        assert stats['checkouts'] == before + 1
+        assert stats['wait_max_ms'] >= 0
+        assert stats['size'] == app.config['DB_POOL_SIZE']
+
+def test_purge_blacklist_command(app, runner, db_session):
+    """
+    Test that the purge-blacklist command deletes only expired blacklisted tokens.
+
+    Parameters:
+    - app: The Flask app object.
+    - runner: The test runner object.
+    - db_session: The database session object.
+
+    Returns:
+    None
+    """
+    with app.app_context():
+        expired = [BlacklistToken(token=f'expired_{i}') for i in range(5)]
+        for token in expired:
+            token.expires_at = datetime.datetime.utcnow() - datetime.timedelta(seconds=1)
+        db_session.add_all(expired + [BlacklistToken(token='valid')])
+        db_session.commit()
+
+        result = runner.invoke(args=['purge-blacklist', '--batch-size', '2'])
+        assert 'Purged 5 expired blacklisted tokens.' in result.output
+        remaining = [token.token_hash for token in db_session.query(BlacklistToken).all()]
+        assert remaining == [BlacklistToken(token='valid').token_hash]
+
+def test_bulk_load_movies(app, db_session):
+    """
+    Test that the bulk loader inserts movies and genres in batches with consecutive ids.
+
+    Parameters:
+    - app: The Flask app object.
+    - db_session: The database session object.
+
+    Returns:
+    None
+    """
+    records = [
+        normalise_movie({'name': f'Movie {i}', 'director': 'Director', 'genre': ['Drama', ' Comedy'],
+                         '99popularity': 50.0 + i, 'imdb_score': 5.0})
+        for i in range(5)
+    ]
+    with app.app_context():
+        first_id = db_session.query(Movie).count() + 1
+        assert bulk_load_movies(db_session, records, batch_size=2) == 5
+        db_session.commit()
+
+        movie = db_session.get(Movie, first_id + 4)
+        assert movie.name == 'Movie 4'
+        assert movie.get_genre() == ['Comedy', 'Drama']
+        assert db_session.query(movie_genres).filter(movie_genres.c.movie_id >= first_id).count() == 10
+
+def test_iter_json_array_reads_elements_across_chunks():
+    """
+    Test that the incremental parser yields every element when elements span chunk boundaries.
+    """
+    records = [{'name': f'Movie {i}', 'score': i * 1.5, 'tags': ['a', 'b]', '{c']} for i in range(50)]
+    document = ' \n' + json.dumps(records, indent=2) + '\n'
+    assert list(iter_json_array(io.StringIO(document), chunk_size=7)) == records
+    assert list(iter_json_array(io.StringIO('[1, 22, 333]'), chunk_size=2)) == [1, 22, 333]
+    assert list(iter_json_array(io.StringIO('[]'))) == []
+    with pytest.raises(ValueError):
+        list(iter_json_array(io.StringIO('{"name": "Movie"}')))
+    with pytest.raises(ValueError):
+        list(iter_json_array(io.StringIO('[{"name": "Mov'), chunk_size=4))
+    assert list(iter_json_array(io.StringIO('[true, null, "a\\u00e9", -1.5e3]'), chunk_size=1)) == [True, None, 'aé', -1500.0]
+
+def test_iter_json_array_rejects_malformed_documents():
+    """
+    Test that long leading whitespace is skipped, while stray commas and malformed elements fail at once.
+    """
+    assert list(iter_json_array(io.StringIO(' ' * 100 + '\n[1, 2]'), chunk_size=8)) == [1, 2]
+    for document in ('[1,,,2]', '[,1]', '[1,]', '[1 2]', '[1] 2'):
+        with pytest.raises(ValueError):
+            list(iter_json_array(io.StringIO(document), chunk_size=3))
+
+    # A malformed element is reported where it starts, without reading the rest of the file
+    document = io.StringIO('[{"a": 1}, {"a": 1 "b": 2}, ' + ', '.join(['{"a": 1}'] * 10000) + ']')
+    with pytest.raises(ValueError, match='offset 11'):
+        list(iter_json_array(document, chunk_size=64))
+    assert document.tell() <= 128
+    with pytest.raises(ValueError, match='larger than 100'):
+        list(iter_json_array(io.StringIO('["' + 'x' * 1000 + '"]'), chunk_size=16, max_element_size=100))
+
+def test_normalise_movie():
+    """
+    Test that records are validated and their genre names cleaned up.
+    """
+    movie = normalise_movie({'name': ' Movie ', 'director': 'Director', 'genre': [' Family', 'Drama', ' Drama', ' '],
+                             '99popularity': '83', 'imdb_score': 8.3})
+    assert movie == {'name': 'Movie', 'director': 'Director', 'genre': ['Family', 'Drama'],
+                     'popularity': 83.0, 'imdb_score': 8.3}
+    with pytest.raises(ValueError):
+        normalise_movie({'name': 'Movie', 'genre': [], '99popularity': 1, 'imdb_score': 1})
+    with pytest.raises(ValueError):
+        normalise_movie({'name': 'Movie', 'director': 'Director', 'genre': 'Drama', '99popularity': 1, 'imdb_score': 1})
+
+def test_iter_movies_counts_invalid_records(tmp_path):
+    """
+    Test that invalid records are counted, keeping only the first message.
+
+    Parameters:
+    - tmp_path: A temporary directory.
+
+    Returns:
+    None
+    """
+    records = [{'name': f'Broken {i}', 'genre': []} for i in range(1000)]
+    records.append({'name': 'Movie', 'director': 'Director', 'genre': ['Drama'], '99popularity': 1, 'imdb_score': 1})
+    path = tmp_path / 'catalogue.jsonl'
+    path.write_text('\n'.join(json.dumps(record) for record in records))
+    errors = RecordErrors()
+    assert [movie['name'] for movie in iter_movies(str(path), errors=errors)] == ['Movie']
+    assert errors.count == 1000 and errors.first is not None
+    other = RecordErrors()
+    other.add('Later message')
+    errors.merge(other)
+    assert errors.count == 1001 and errors.first != 'Later message'
+    with pytest.raises(ValueError):
+        list(iter_movies(str(path)))
+
+@pytest.mark.parametrize('file_format', ['json', 'jsonl'])
+def test_stream_data_from_file(app, db_session, tmp_path, file_format):
+    """
+    Test that the streaming importer loads JSON arrays and JSON-Lines files and skips invalid records.
+
+    Parameters:
+    - app: The Flask app object.
+    - db_session: The database session object.
+    - tmp_path: A temporary directory.
+    - file_format: The catalogue format under test.
+
+    Returns:
+    None
+    """
+    records = [{'name': f'Streamed {i}', 'director': 'Director', 'genre': [' Family'],
+                '99popularity': 70.0, 'imdb_score': 7.0} for i in range(7)]
+    records.insert(3, {'name': 'Broken', 'genre': []})
+    path = tmp_path / f'catalogue.{file_format}'
+    if file_format == 'jsonl':
+        path.write_text('\n'.join(json.dumps(record) for record in records) + '\n')
+    else:
+        path.write_text(json.dumps(records))
+
+    assert stream_data_from_file(str(path), app, batch_size=3) == 7
+    with app.app_context():
+        streamed = db_session.query(Movie).filter(Movie.name.like('Streamed %')).all()
+        assert len(streamed) == 7
+        assert all(movie.get_genre() == ['Family'] for movie in streamed)
+        assert db_session.query(Movie).filter_by(name='Broken').count() == 0
+
+def test_pipeline_load_files(app, db_session, tmp_path):
+    """
+    Test that shards parsed in worker processes are all written by the single writer.
+
+    Parameters:
+    - app: The Flask app object.
+    - db_session: The database session object.
+    - tmp_path: A temporary directory.
+
+    Returns:
+    None
+    """
+    paths = []
+    for shard in range(3):
+        records = [{'name': f'Shard {shard} movie {i}', 'director': 'Director', 'genre': [' Drama'],
+                    '99popularity': 60.0, 'imdb_score': 6.0} for i in range(10)]
+        if shard != 1:
+            records.append({'name': f'Broken {shard}', 'genre': []})
+        path = tmp_path / f'shard{shard}.jsonl'
+        path.write_text('\n'.join(json.dumps(record) for record in records))
+        paths.append(str(path))
+    lines = []
+
+    assert pipeline_load_files(paths, app, batch_size=4, workers=2, max_pending=1, report=lines.append) == 30
+    assert 'from 3 shards with 2 workers' in lines[-2]
+    assert lines[-1].startswith('Skipped 2 invalid records, first: ')
+    with app.app_context():
+        assert db_session.query(Movie).filter(Movie.name.like('Shard %')).count() == 30
+
+def test_pipeline_load_files_rolls_back_on_error(app, db_session, tmp_path):
+    """
+    Test that a shard that cannot be parsed rolls back the whole load.
+
+    Parameters:
+    - app: The Flask app object.
+    - db_session: The database session object.
+    - tmp_path: A temporary directory.
+
+    Returns:
+    None
+    """
+    good = tmp_path / 'good.jsonl'
+    good.write_text(json.dumps({'name': 'Pipeline good', 'director': 'Director', 'genre': [],
+                                '99popularity': 60.0, 'imdb_score': 6.0}))
+    lines = []
+
+    assert pipeline_load_files([str(good), str(tmp_path / 'missing.jsonl')], app, workers=2,
+                               report=lines.append) == 0
+    assert 'An error occurred' in lines[-1]
+    with app.app_context():
+        assert db_session.query(Movie).filter_by(name='Pipeline good').count() == 0
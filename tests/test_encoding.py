@@ -0,0 +1,56 @@
+import datetime
+import decimal
+import json
+from flask.json.provider import DefaultJSONProvider
+from app.encoding import FastJSONProvider
+
+def test_app_uses_fast_provider(app):
+    """
+    Test that the application encodes its responses with the fast provider.
+
+    Args:
+        app: The Flask app object.
+
+    Returns:
+        None
+    """
+    assert isinstance(app.json, FastJSONProvider)
+
+def test_fast_provider_matches_default_output(app):
+    """
+    Test that the fast provider produces the same documents as Flask's default one.
+
+    Args:
+        app: The Flask app object.
+
+    Returns:
+        None
+    """
+    fast, default = FastJSONProvider(app), DefaultJSONProvider(app)
+    data = {'b': [1, 2.5, None, True], 'a': {'z': 'text', 'y': 'ünï', 'counts': {3: 'int key'}},
+            'when': datetime.datetime(2023, 10, 1, 12, 30), 'price': decimal.Decimal('1.50')}
+    assert json.loads(fast.dumps(data)) == json.loads(default.dumps(data))
+    assert json.loads(fast.dumps(data))['when'] == 'Sun, 01 Oct 2023 12:30:00 GMT'
+    assert list(json.loads(fast.dumps(data))) == sorted(json.loads(default.dumps(data)))
+
+    with app.test_request_context():
+        response = fast.response(movies=[{'id': 1, 'name': 'Movie'}])
+        assert response.mimetype == 'application/json'
+        assert response.get_json() == {'movies': [{'id': 1, 'name': 'Movie'}]}
+
+def test_fast_provider_falls_back_to_stdlib(app):
+    """
+    Test that values orjson rejects and a missing orjson both use the standard library.
+
+    Args:
+        app: The Flask app object.
+
+    Returns:
+        None
+    """
+    assert json.loads(FastJSONProvider(app).dumps({'big': 2 ** 70})) == {'big': 2 ** 70}
+    provider = FastJSONProvider(app)
+    provider.encoder = None
+    assert provider.dumps({'b': 1, 'a': 2}) == DefaultJSONProvider(app).dumps({'b': 1, 'a': 2})
+    with app.test_request_context():
+        assert provider.response([1, 2]).get_json() == [1, 2]
@@ -0,0 +1,117 @@
+import json
+from collections import Counter
+from sqlalchemy import event
+from app.database import db, get_db
+from app.genres import normalise_genre_names, rebuild_genre_counts
+from app.models import Genre
+
+def expected_counts():
+    """
+    Counts the movies per normalised genre in 'imdb.json'.
+    """
+    with open('imdb.json') as file:
+        return Counter(name for movie in json.load(file) for name in normalise_genre_names(movie['genre']))
+
+def stored_counts():
+    """
+    Returns the non-zero movie counts stored on genres.
+    """
+    return {row.name: row.movie_count for row in get_db().query(Genre).all() if row.movie_count}
+
+def test_normalise_genre_names():
+    """
+    Test that genre names are stripped and de-duplicated in order.
+    """
+    assert normalise_genre_names([' Family', 'Drama', ' Drama', '', ' ']) == ['Family', 'Drama']
+    assert normalise_genre_names(None) == []
+
+def test_get_genres_returns_counts_without_near_duplicates(app, client, user_token):
+    """
+    Test that the endpoint lists each genre once with its movie count and serves repeats from memory.
+
+    Args:
+        app: The Flask app object.
+        client: The test client.
+        user_token: The token of a regular user.
+    """
+    headers = {'Authorization': f'Bearer {user_token}'}
+    data = client.get('/api/get_genres', headers=headers).get_json()
+    assert data['counts'] == dict(expected_counts())
+    assert data['genres'] == sorted(data['counts'])
+    assert all(name == name.strip() for name in data['genres'])
+
+    statements = []
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute',
+                     lambda conn, cursor, statement, *args: statements.append(statement))
+    client.get('/api/get_genres', headers=headers)
+    assert not any('genres' in statement for statement in statements)
+
+def test_counts_follow_movie_writes(client, admin_token):
+    """
+    Test that adding, re-genring and deleting movies adjusts the counts.
+
+    Args:
+        client: The test client.
+        admin_token: The token of an admin user.
+    """
+    headers = {'Authorization': f'Bearer {admin_token}'}
+    expected = expected_counts()
+    movie_data = {'name': 'Count Me', 'director': 'Director Name', 'popularity': 1.0,
+                  'imdb_score': 5.0, 'genre': [' Drama', 'Brand New']}
+    client.post('/api/movies', json=movie_data, headers=headers)
+    expected.update(['Drama', 'Brand New'])
+    assert client.get('/api/get_genres', headers=headers).get_json()['counts'] == dict(expected)
+
+    movie_id = client.get('/api/get_movies?search=Count%20Me', headers=headers).get_json()['movies'][0]['id']
+    client.put(f'/api/movies/{movie_id}', json={'genre': ['Drama', 'Comedy']}, headers=headers)
+    expected.subtract(['Brand New'])
+    expected.update(['Comedy'])
+    assert stored_counts() == {name: count for name, count in expected.items() if count}
+    assert client.get(f'/api/movies/{movie_id}', headers=headers).get_json()['genre'] == ['Comedy', 'Drama']
+    # Genre filters follow the edit, as both read the same links
+    assert client.get('/api/get_movies?genre=Brand%20New', headers=headers).get_json()['movies'] == []
+    comedies = client.get('/api/get_movies?genre=Comedy&search=Count%20Me', headers=headers).get_json()['movies']
+    assert [movie['id'] for movie in comedies] == [movie_id]
+
+    client.delete(f'/api/movies/{movie_id}', headers=headers)
+    expected.subtract(['Drama', 'Comedy'])
+    data = client.get('/api/get_genres', headers=headers).get_json()
+    assert data['counts'] == {name: count for name, count in expected.items() if count}
+    assert 'Brand New' not in data['genres']
+
+def test_rebuild_genre_counts(app, runner):
+    """
+    Test that the counts can be recomputed from the movies.
+
+    Args:
+        app: The Flask app object.
+        runner: The CLI runner.
+    """
+    with app.app_context():
+        db_session = get_db()
+        db_session.query(Genre).update({Genre.movie_count: 0})
+        db_session.commit()
+        assert stored_counts() == {}
+        result = runner.invoke(args=['rebuild-genre-counts'])
+        assert f'Counted movies for {len(expected_counts())} genres.' in result.output
+        assert stored_counts() == dict(expected_counts())
+        assert rebuild_genre_counts(db_session) == len(expected_counts())
+
+def test_page_genres_load_in_one_query(app, client, user_token):
+    """
+    Test that a page of movies loads the genres of all its movies with one batched query.
+
+    Args:
+        app: The Flask app object.
+        client: The test client.
+        user_token: The token of a regular user.
+    """
+    headers = {'Authorization': f'Bearer {user_token}'}
+    statements = []
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute',
+                     lambda conn, cursor, statement, *args: statements.append(statement))
+    movies = client.get('/api/get_movies?per_page=50', headers=headers).get_json()['movies']
+    assert len(movies) == 50 and all(movie['genre'] for movie in movies)
+    assert len([statement for statement in statements if 'movie_genres' in statement]) == 1
@@ -0,0 +1,125 @@
+import pytest
+from app.hashing import PasswordHasher, PasswordHasherBusy, get_password_hasher
+from app.models import User
+
+def test_hash_uses_configured_rounds(app):
+    """
+    Test that passwords are hashed with BCRYPT_LOG_ROUNDS.
+
+    Parameters:
+        app: The Flask app object.
+
+    Returns:
+        None
+    """
+    with app.app_context():
+        user = User(name='Test User', email='test@example.com', password='password')
+        assert user.password.startswith('$2b$04$')
+        assert user.check_password('password') is True
+        assert user.needs_rehash() is False
+
+def test_saturated_pool_rejects():
+    """
+    Test that calls are rejected immediately once the workers and queue are full.
+
+    Returns:
+        None
+    """
+    hasher = PasswordHasher(rounds=4, workers=1, max_queue=0)
+    hasher._slots.acquire()  # Occupy the only slot
+    with pytest.raises(PasswordHasherBusy):
+        hasher.hash('password')
+    hasher._slots.release()
+
+    assert hasher.check('password', hasher.hash('password')) is True
+    assert hasher.stats()['rejected'] == 1
+
+def test_timed_out_call_counts_as_busy():
+    """
+    Test that a call waiting longer than the timeout fails like a saturated pool.
+
+    Returns:
+        None
+    """
+    import threading
+
+    release = threading.Event()
+    hasher = PasswordHasher(rounds=4, workers=1, max_queue=1, timeout=0.05)
+    hasher._executor.submit(release.wait)  # Occupy the only worker
+    with pytest.raises(PasswordHasherBusy):
+        hasher.hash('password')
+    release.set()
+    assert hasher.stats()['rejected'] == 1
+
+    hasher.close()
+    with pytest.raises(RuntimeError):
+        hasher._executor.submit(release.wait)
+
+def test_login_returns_503_when_saturated(app, client, db_session, mocker):
+    """
+    Test that the login endpoint answers 503 when the hashing pool is saturated.
+
+    Parameters:
+        app: The Flask app object.
+        client: The test client object.
+        db_session: The database session object.
+        mocker: The mocker object.
+
+    Returns:
+        None
+    """
+    db_session.add(User(name='Test User', email='test@example.com', password='password'))
+    db_session.commit()
+    mocker.patch.object(PasswordHasher, 'check', side_effect=PasswordHasherBusy('busy'))
+
+    response = client.post('/auth/login', json={'email': 'test@example.com', 'password': 'password'})
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+
+def test_login_rehashes_outdated_cost(app, client, db_session):
+    """
+    Test that a successful login upgrades a password hashed with another cost.
+
+    Parameters:
+        app: The Flask app object.
+        client: The test client object.
+        db_session: The database session object.
+
+    Returns:
+        None
+    """
+    user = User(name='Test User', email='test@example.com', password='password')
+    user.password = PasswordHasher(rounds=5).hash('password')
+    db_session.add(user)
+    db_session.commit()
+
+    response = client.post('/auth/login', json={'email': 'test@example.com', 'password': 'password'})
+    assert response.status_code == 200
+    db_session.refresh(user)
+    assert user.password.startswith('$2b$04$')
+    assert get_password_hasher().check('password', user.password) is True
+
+def test_login_skips_rehash_when_saturated(app, client, db_session, mocker):
+    """
+    Test that a correct login still succeeds when the pool is too busy to upgrade the hash.
+
+    Parameters:
+        app: The Flask app object.
+        client: The test client object.
+        db_session: The database session object.
+        mocker: The mocker object.
+
+    Returns:
+        None
+    """
+    user = User(name='Test User', email='test@example.com', password='password')
+    user.password = outdated = PasswordHasher(rounds=5).hash('password')
+    db_session.add(user)
+    db_session.commit()
+    mocker.patch.object(PasswordHasher, 'hash', side_effect=PasswordHasherBusy('busy'))
+
+    response = client.post('/auth/login', json={'email': 'test@example.com', 'password': 'password'})
+    assert response.status_code == 200
+    assert response.get_json()['auth_token']
+    db_session.refresh(user)
+    assert user.password == outdated
@@ -0,0 +1,123 @@
+import threading
+from app.mail_utils import (INVALID, INVALID_DOMAIN, VALID, CircuitBreaker, EmailValidator, is_valid_syntax,
+                            validate_email)
+
+class FakeRemote:
+    """
+    A local stand-in for the ZeroBounce validator.
+    """
+    def __init__(self, verdicts=None, release=None):
+        self.verdicts = verdicts or {}
+        self.release = release
+        self.calls = 0
+
+    def __call__(self, email):
+        self.calls += 1
+        if self.release is not None:
+            self.release.wait(5)
+        return self.verdicts.get(email, VALID)
+
+def test_syntax_fast_path():
+    """
+    Test that malformed addresses are rejected without a remote call.
+
+    Returns:
+        None
+    """
+    remote = FakeRemote()
+    validator = EmailValidator(remote=remote)
+    assert is_valid_syntax('user@example.com') is True
+    assert validator.validate('not-an-email') is False
+    assert validator.validate('user@') is False
+    assert validator.validate(None) is False
+    assert remote.calls == 0
+
+def test_verdicts_are_cached():
+    """
+    Test that address and domain verdicts are served from the cache.
+
+    Returns:
+        None
+    """
+    remote = FakeRemote({'bad@example.com': INVALID, 'user@nodns.example': INVALID_DOMAIN})
+    validator = EmailValidator(remote=remote)
+    assert validator.validate('bad@example.com') is False
+    assert validator.validate('Bad@Example.com') is False
+    assert validator.validate('user@nodns.example') is False
+    assert validator.validate('other@nodns.example') is False  # Rejected by the domain cache
+    assert validator.validate('good@example.com') is True
+    assert remote.calls == 3
+
+def test_slow_remote_fails_open():
+    """
+    Test that registration does not wait for a slow remote and caches the late verdict.
+
+    Returns:
+        None
+    """
+    release = threading.Event()
+    remote = FakeRemote({'bad@example.com': INVALID}, release=release)
+    validator = EmailValidator(remote=remote, timeout=0.01)
+    assert validator.validate('bad@example.com') is True
+    release.set()
+    validator._executor.shutdown(wait=True)
+    assert validator.validate('bad@example.com') is False
+
+def test_hanging_remote_opens_breaker_and_bounds_pending_checks():
+    """
+    Test that checks that never return open the breaker and are not queued beyond the workers.
+
+    Returns:
+        None
+    """
+    release = threading.Event()
+    remote = FakeRemote(release=release)
+    validator = EmailValidator(remote=remote, timeout=0.01, workers=2,
+                               breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60))
+    assert validator.validate('first@example.com') is True
+    assert validator.breaker.state == 'closed'
+    assert validator.validate('second@example.com') is True
+    assert validator.breaker.state == 'open'
+    validator.breaker.record_success()  # Close it again to reach the pending bound
+    assert validator.validate('third@example.com') is True
+    assert len(validator._pending) == 2 and remote.calls == 2  # Refused without a remote check
+    release.set()
+    validator._executor.shutdown(wait=True)
+    assert validator._pending == {}
+
+def test_circuit_breaker_opens_after_failures():
+    """
+    Test that the breaker stops remote calls after repeated failures and then allows a trial call.
+
+    Returns:
+        None
+    """
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=lambda: now[0])
+    breaker.record_failure()
+    assert breaker.allow() is True
+    breaker.record_failure()
+    assert breaker.allow() is False
+    now[0] = 10.0
+    assert breaker.allow() is True  # Trial call
+    assert breaker.allow() is False
+    breaker.record_success()
+    assert breaker.state == 'closed'
+
+def test_register_uses_substituted_validator(app, client):
+    """
+    Test that the registration endpoint rejects addresses refused by a substituted validator.
+
+    Parameters:
+        app: The Flask app object.
+        client: The test client object.
+
+    Returns:
+        None
+    """
+    app.extensions['email_validator'] = EmailValidator(remote=FakeRemote({'bad@example.com': INVALID}))
+    response = client.post('/auth/register', json={'name': 'test', 'email': 'bad@example.com', 'password': 'secret'})
+    assert response.status_code == 400
+    assert response.json['message'] == 'Invalid email address.'
+    with app.app_context():
+        assert validate_email('good@example.com') is True
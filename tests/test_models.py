@@ -1,3 +1,4 @@
+import datetime
 from app.models import BlacklistToken, User, Movie, Genre, MoviesLog
 
 def test_user_model(app, db_session):
@@ -63,19 +64,25 @@ def test_genre_model(app, db_session):
     with app.app_context():
         movie = Movie(name='Test Movie', director='Director', popularity=7.5, imdb_score=8.0)
         movie.set_genre(['Action'])
-        genre = Genre(name='Action', movie=movie)
-        db_session.add_all([movie, genre])
+        db_session.add(movie)
         db_session.commit()
 
-        assert genre.id is not None
-        assert db_session.get(Genre,genre.id) == genre
+        genre = db_session.query(Genre).filter_by(name='Action').one()
+        assert movie.genres == [genre]
+        assert movie in genre.movies.all()
         assert genre.serialize() == {
             'id': genre.id,
             'name': 'Action',
-            'movie_id': movie.id,
-            'movie': movie.serialize()
+            'movie_count': genre.movie_count
         }
 
+        other = Movie(name='Other Movie', director='Director', popularity=7.5, imdb_score=8.0)
+        other.set_genre([' Action', 'Brand New Genre'])
+        db_session.add(other)
+        db_session.commit()
+        assert db_session.query(Genre).filter_by(name='Action').count() == 1  # Genre names are unique
+        assert other.get_genre() == ['Action', 'Brand New Genre']
+
 def test_movies_log_model(app, db_session):
     """
     Creates a test movie log model.
@@ -114,3 +121,7 @@ def test_blacklist_token_model(app, db_session):
 
         assert blacklist_token.id is not None
         assert db_session.get(BlacklistToken,blacklist_token.id) == blacklist_token
+        assert len(blacklist_token.token_hash) == 64  # Only a fixed-width digest is stored
+        assert blacklist_token.token_hash != token
+        assert blacklist_token.expires_at > blacklist_token.blacklisted_on - datetime.timedelta(days=1)
+        assert BlacklistToken.check_blacklist(token) is True
@@ -151,3 +151,404 @@ def test_get_movie_logs_admin(client, admin_token):
     headers = {'Authorization': f'Bearer {admin_token}'}
     response = client.get('/api/movie_logs', headers=headers)
     assert response.status_code == 200
+
+def test_get_movies_genre_modes(client, admin_token):
+    """
+    Test filtering movies by several genres with 'any' and 'all' semantics.
+
+    :param client: The client object used to make the API request.
+    :param admin_token: The admin token used for authentication.
+    """
+    from app.database import get_db
+    from app.models import Movie
+
+    db_session = get_db()
+    for name, genre in [('Genre One', ['Zorro', 'Quill']), ('Genre Two', ['Zorro']), ('Genre Three', ['Quill'])]:
+        movie = Movie(name=name, director='Director Name', popularity=50.0, imdb_score=5.0)
+        movie.set_genre(genre)
+        db_session.add(movie)
+    db_session.commit()
+    headers = {'Authorization': f'Bearer {admin_token}'}
+
+    def names(query):
+        response = client.get(f'/api/get_movies?{query}', headers=headers)
+        assert response.status_code == 200
+        return sorted(movie['name'] for movie in response.get_json()['movies'])
+
+    assert names('genre=Zorro') == ['Genre One', 'Genre Two']
+    assert names('genre=Zorro&genre=Quill') == ['Genre One', 'Genre Three', 'Genre Two']
+    assert names('genre=Zorro,%20Quill&genre_mode=all') == ['Genre One']
+    assert names('genre=Zorro&genre=Nothing&genre_mode=all') == []
+    assert client.get('/api/get_movies?genre=Zorro&genre_mode=some', headers=headers).status_code == 400
+
+def test_get_movies_genre_filter_is_one_statement(app, client, admin_token):
+    """
+    Test that a popular genre is filtered inside the movies query rather than by a list of ids.
+
+    :param app: The Flask app object.
+    :param client: The client object used to make the API request.
+    :param admin_token: The admin token used for authentication.
+    """
+    from sqlalchemy import event
+    from app.database import db
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    headers = {'Authorization': f'Bearer {admin_token}'}
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        response = client.get('/api/get_movies?genre=Drama', headers=headers)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+    assert response.status_code == 200
+    assert response.get_json()['movies']
+    movie_statements = [(statement, parameters) for statement, parameters in statements if 'FROM movies' in statement]
+    assert movie_statements
+    assert all('EXISTS' in statement and len(parameters) <= 3 for statement, parameters in movie_statements)
+    # Only the ids of the page itself are sent back, to fetch their genres
+    id_lists = [parameters for statement, parameters in statements if statement.startswith('SELECT movie_genres.movie_id')]
+    assert len(id_lists) == 1 and len(id_lists[0]) == 10
+
+def test_get_movies_cursor_pagination(client, user_token):
+    """
+    Test that walking the cursor pages returns every movie once, in sort order, without a count.
+
+    :param client: The client object used to make the API request.
+    :param user_token: The token of the user making the request.
+    """
+    headers = {'Authorization': f'Bearer {user_token}'}
+    first = client.get('/api/get_movies?cursor=&per_page=40&sort=popularity&order=desc&count=true', headers=headers)
+    assert first.status_code == 200
+    total = first.get_json()['total']
+
+    seen = []
+    cursor = ''
+    while cursor is not None:
+        response = client.get(f'/api/get_movies?cursor={cursor}&per_page=40&sort=popularity&order=desc', headers=headers)
+        assert response.status_code == 200
+        data = response.get_json()
+        assert 'total' not in data and 'total_pages' not in data
+        seen.extend(data['movies'])
+        cursor = data['next_cursor']
+
+    assert len(seen) == total == len({movie['id'] for movie in seen})
+    keys = [(movie['popularity'], movie['id']) for movie in seen]
+    assert keys == sorted(keys, reverse=True)
+
+def test_get_movies_cursor_errors_and_per_page(client, user_token):
+    """
+    Test cursor validation and the per_page bound.
+
+    :param client: The client object used to make the API request.
+    :param user_token: The token of the user making the request.
+    """
+    headers = {'Authorization': f'Bearer {user_token}'}
+    response = client.get('/api/get_movies?per_page=1000', headers=headers)
+    assert len(response.get_json()['movies']) == 100
+
+    next_cursor = client.get('/api/get_movies?cursor=&per_page=5', headers=headers).get_json()['next_cursor']
+    assert client.get(f'/api/get_movies?cursor={next_cursor}&sort=popularity', headers=headers).status_code == 400
+    assert client.get('/api/get_movies?cursor=not-a-cursor', headers=headers).status_code == 400
+
+def test_get_movies_facets(client, user_token):
+    """
+    Test that facets count every filtered movie, not just the page, and that unknown facets are rejected.
+
+    :param client: The client object used to make the API request.
+    :param user_token: The token of the user making the request.
+    """
+    headers = {'Authorization': f'Bearer {user_token}'}
+    assert 'facets' not in client.get('/api/get_movies', headers=headers).get_json()
+    assert client.get('/api/get_movies?facets=genre,year', headers=headers).status_code == 400
+
+    everything = client.get('/api/get_movies?facets=all&per_page=5', headers=headers).get_json()
+    assert len(everything['movies']) == 5
+    facets = everything['facets']
+    assert sum(bucket['count'] for bucket in facets['imdb_score']) == 248
+    assert sum(bucket['count'] for bucket in facets['popularity']) == 248
+    assert [bucket['from'] for bucket in facets['imdb_score']] == list(range(10))
+    genre_counts = {entry['name']: entry['count'] for entry in facets['genre']}
+    counts = [entry['count'] for entry in facets['genre']]
+    assert counts == sorted(counts, reverse=True)
+
+    drama = client.get('/api/get_movies?genre=Drama&facets=genre,imdb_score&per_page=1', headers=headers).get_json()
+    assert set(drama['facets']) == {'genre', 'imdb_score'}
+    drama_total = sum(bucket['count'] for bucket in drama['facets']['imdb_score'])
+    assert drama_total == genre_counts['Drama'] == drama['total_pages']
+    drama_genres = {entry['name']: entry['count'] for entry in drama['facets']['genre']}
+    assert drama_genres['Drama'] == drama_total
+    assert all(count <= genre_counts[name] for name, count in drama_genres.items())
+
+def test_batch_movies(app, client, admin_token):
+    """
+    Test that a batch of upserts and deletes is applied in one transaction with one log row per operation.
+
+    :param app: The Flask app object.
+    :param client: The client object used to make the API request.
+    :param admin_token: The admin token used for authentication.
+    """
+    from sqlalchemy import event
+    from app.database import db, get_db
+    from app.models import Movie, MoviesLog
+
+    headers = {'Authorization': f'Bearer {admin_token}'}
+    logs_before = get_db().query(MoviesLog).count()
+
+    commits = []
+    with app.app_context():
+        event.listen(db.engine, 'commit', lambda conn: commits.append(conn))
+    operations = [
+        {'op': 'upsert', 'name': 'Batch One', 'director': 'Director', 'popularity': 10, 'imdb_score': 6.5,
+         'genre': ['Drama', ' Batch Genre']},
+        {'op': 'upsert', 'id': 5000, 'name': 'Batch Two', 'director': 'Director', 'popularity': 20,
+         'imdb_score': 7.5},
+        {'op': 'upsert', 'id': 1, 'imdb_score': 9.9, 'genre': ['Batch Genre']},
+        {'op': 'delete', 'id': 2},
+        {'op': 'delete', 'id': 99999},
+    ]
+    response = client.post('/api/movies/batch', json={'operations': operations}, headers=headers)
+    assert response.status_code == 200
+    results = response.get_json()['results']
+    assert [result['status'] for result in results] == ['created', 'created', 'updated', 'deleted', 'not_found']
+    assert results[1]['id'] == 5000 and results[0]['id'] is not None
+    assert len(commits) == 1
+
+    db_session = get_db()
+    db_session.expire_all()
+    assert db_session.get(Movie, results[0]['id']).get_genre() == ['Batch Genre', 'Drama']
+    assert db_session.get(Movie, 1).imdb_score == 9.9 and db_session.get(Movie, 1).get_genre() == ['Batch Genre']
+    assert db_session.get(Movie, 2) is None
+    assert db_session.query(MoviesLog).count() == logs_before + 4
+    counts = client.get('/api/get_genres', headers=headers).get_json()['counts']
+    assert counts['Batch Genre'] == 2
+
+def test_batch_movies_rejects_invalid_operations(client, admin_token):
+    """
+    Test that an invalid batch is rejected with per-item errors and changes nothing.
+
+    :param client: The client object used to make the API request.
+    :param admin_token: The admin token used for authentication.
+    """
+    from app.database import get_db
+    from app.models import Movie
+
+    headers = {'Authorization': f'Bearer {admin_token}'}
+    total = get_db().query(Movie).count()
+    operations = [{'op': 'delete', 'id': 3}, {'op': 'upsert', 'imdb_score': 'high'}, {'op': 'rename'},
+                  {'op': 'upsert', 'id': 3, 'imdb_score': 5.0}]
+    response = client.post('/api/movies/batch', json=operations, headers=headers)
+    assert response.status_code == 400
+    assert [result['index'] for result in response.get_json()['results']] == [1, 2, 3]
+
+    response = client.post('/api/movies/batch', json=[{'op': 'delete', 'id': 3}, {'op': 'upsert', 'name': 'No Director'}],
+                           headers=headers)
+    assert response.status_code == 400
+    assert client.post('/api/movies/batch', json={'operations': []}, headers=headers).status_code == 400
+    assert get_db().query(Movie).count() == total
+
+def test_batch_movies_user(client, user_token):
+    """
+    Test that regular users cannot apply batches.
+
+    :param client: The client object used to make the API request.
+    :param user_token: The token of the user making the request.
+    """
+    headers = {'Authorization': f'Bearer {user_token}'}
+    assert client.post('/api/movies/batch', json=[{'op': 'delete', 'id': 1}], headers=headers).status_code == 403
+
+def test_admin_writes_commit_once_with_their_log(app, client, admin_token):
+    """
+    Test that each admin write is one transaction holding both the change and its log row.
+
+    :param app: The Flask app object.
+    :param client: The client object used to make the API request.
+    :param admin_token: The admin token used for authentication.
+    """
+    from sqlalchemy import event
+    from app.database import db, get_db
+    from app.models import Movie, MoviesLog
+
+    headers = {'Authorization': f'Bearer {admin_token}'}
+    commits = []
+    with app.app_context():
+        event.listen(db.engine, 'commit', lambda conn: commits.append(conn))
+
+    def last_log():
+        return get_db().query(MoviesLog).order_by(MoviesLog.id.desc()).first()
+
+    movie_data = {'name': 'Audited', 'director': 'Director Name', 'popularity': 1.0, 'imdb_score': 5.0, 'genre': ['Drama']}
+    assert client.post('/api/movies', json=movie_data, headers=headers).status_code == 201
+    movie_id = get_db().query(Movie.id).filter_by(name='Audited').scalar()
+    assert (last_log().movie_id, last_log().action) == (movie_id, 'ADDED')
+    assert client.put(f'/api/movies/{movie_id}', json={'name': 'Audited Again', 'genre': ['Drama']},
+                      headers=headers).status_code == 200
+    assert (last_log().movie_name, last_log().action) == ('Audited Again', 'UPDATED')
+    assert client.delete(f'/api/movies/{movie_id}', headers=headers).status_code == 200
+    assert (last_log().movie_id, last_log().movie_name, last_log().action) == (movie_id, 'Audited Again', 'DELETED')
+    assert len(commits) == 3
+
+    # A write that fails leaves neither the change nor a log row behind
+    logs = get_db().query(MoviesLog).count()
+    db_session = get_db()
+    db_session.add(Movie(id=1, name='Duplicate', director='Director', popularity=1.0, imdb_score=1.0))
+    try:
+        db_session.commit()
+    except Exception:
+        db_session.rollback()
+    assert get_db().query(MoviesLog).count() == logs
+
+def test_get_movie_logs_pages_and_filters(client, admin_token):
+    """
+    Test keyset pagination of the movie logs and their filters.
+
+    :param client: The client object used to make the API request.
+    :param admin_token: The admin token used for authentication.
+    """
+    import datetime
+    from app.database import get_db
+    from app.models import MoviesLog
+
+    db_session = get_db()
+    start = datetime.datetime(2023, 10, 1)
+    for i in range(25):
+        log = MoviesLog(movie_id=i % 5, movie_name=f'Movie {i % 5}', action=('ADDED', 'UPDATED', 'DELETED')[i % 3])
+        log.timestamp = start + datetime.timedelta(hours=i // 2)  # Pairs share a timestamp
+        db_session.add(log)
+    db_session.commit()
+    headers = {'Authorization': f'Bearer {admin_token}'}
+
+    def walk(query):
+        seen, cursor = [], ''
+        while cursor is not None:
+            response = client.get(f'/api/movie_logs?{query}&cursor={cursor}', headers=headers)
+            assert response.status_code == 200
+            data = response.get_json()
+            seen.extend(data['logs'])
+            cursor = data['next_cursor']
+        return seen
+
+    newest_first = walk('limit=4')
+    assert len(newest_first) == 25
+    keys = [(log['timestamp'], log['id']) for log in newest_first]
+    assert keys == sorted(keys, reverse=True)
+    assert [log['id'] for log in walk('limit=7&order=asc')] == sorted(log['id'] for log in newest_first)
+
+    deleted = walk('limit=3&action=deleted&movie_id=2')
+    assert deleted and all(log['action'] == 'DELETED' and log['movie_id'] == 2 for log in deleted)
+    window = walk('since=2023-10-01T02:00:00Z&until=2023-10-01T04:00:00')
+    assert sorted(log['timestamp'] for log in window) == ['2023-10-01 02:00:00'] * 2 + ['2023-10-01 03:00:00'] * 2
+
+    assert client.get('/api/movie_logs?action=RENAMED', headers=headers).status_code == 400
+    assert client.get('/api/movie_logs?since=yesterday', headers=headers).status_code == 400
+    assert client.get('/api/movie_logs?cursor=nonsense', headers=headers).status_code == 400
+
+def test_export_movie_logs(client, admin_token):
+    """
+    Test the streamed NDJSON and CSV exports of the movie logs.
+
+    :param client: The client object used to make the API request.
+    :param admin_token: The admin token used for authentication.
+    """
+    import csv
+    import io
+    import json
+
+    headers = {'Authorization': f'Bearer {admin_token}'}
+    movie_data = {'name': 'Exported', 'director': 'Director Name', 'popularity': 1.0, 'imdb_score': 5.0}
+    for _ in range(3):
+        client.post('/api/movies', json=movie_data, headers=headers)
+
+    response = client.get('/api/movie_logs?format=ndjson&action=ADDED', headers=headers)
+    assert response.status_code == 200 and response.mimetype == 'application/x-ndjson'
+    assert response.is_streamed
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [line['movie_name'] for line in lines] == ['Exported'] * 3
+    assert [line['id'] for line in lines] == sorted(line['id'] for line in lines)
+
+    response = client.get('/api/movie_logs?format=csv', headers=headers)
+    assert response.mimetype == 'text/csv'
+    assert 'attachment' in response.headers['Content-Disposition']
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert len(rows) == 3 and rows[0]['action'] == 'ADDED'
+    assert client.get('/api/movie_logs?format=xml', headers=headers).status_code == 400
+
+def test_movie_log_feed_long_polls(app, client, admin_token):
+    """
+    Test that the log feed returns new logs at once and otherwise waits for the next commit.
+
+    :param app: The Flask app object.
+    :param client: The client object used to make the API request.
+    :param admin_token: The admin token used for authentication.
+    """
+    import threading
+    import time
+    from app.database import get_db
+    from app.models import Movie
+
+    headers = {'Authorization': f'Bearer {admin_token}'}
+    movie_data = {'name': 'Fed', 'director': 'Director Name', 'popularity': 1.0, 'imdb_score': 5.0}
+    data = client.get('/api/movie_logs/feed', headers=headers).get_json()
+    assert data == {'logs': [], 'last_id': 0}
+    client.post('/api/movies', json=movie_data, headers=headers)
+    client.post('/api/movies', json=movie_data, headers=headers)
+
+    data = client.get('/api/movie_logs/feed?since_id=0&wait=5', headers=headers).get_json()
+    assert [log['action'] for log in data['logs']] == ['ADDED', 'ADDED']
+    last_id = data['last_id']
+    assert last_id == data['logs'][-1]['id']
+
+    # A commit from another thread wakes the waiting request before the poll interval
+    app.config['MOVIE_LOG_FEED_POLL_INTERVAL'] = 10
+
+    def write():
+        with app.app_context():
+            db_session = get_db()
+            db_session.add(Movie(name='Fed Later', director='Director Name', popularity=1.0, imdb_score=5.0))
+            db_session.commit()
+
+    writer = threading.Timer(0.3, write)
+    writer.start()
+    start = time.monotonic()
+    data = client.get(f'/api/movie_logs/feed?since_id={last_id}&wait=5', headers=headers).get_json()
+    writer.join()
+    assert time.monotonic() - start < 5
+    assert [log['movie_name'] for log in data['logs']] == ['Fed Later']
+
+    start = time.monotonic()
+    data = client.get(f'/api/movie_logs/feed?since_id={data["last_id"]}&wait=0.2', headers=headers).get_json()
+    assert data['logs'] == [] and time.monotonic() - start >= 0.2
+
+def test_movie_log_feed_streams_events(app, client, admin_token):
+    """
+    Test the Server-Sent Events mode of the log feed and its resumption.
+
+    :param app: The Flask app object.
+    :param client: The client object used to make the API request.
+    :param admin_token: The admin token used for authentication.
+    """
+    import json
+
+    headers = {'Authorization': f'Bearer {admin_token}'}
+    movie_data = {'name': 'Streamed', 'director': 'Director Name', 'popularity': 1.0, 'imdb_score': 5.0}
+    for _ in range(3):
+        client.post('/api/movies', json=movie_data, headers=headers)
+    app.config.update(MOVIE_LOG_FEED_STREAM_DURATION=0.3, MOVIE_LOG_FEED_KEEPALIVE=0.1)
+
+    def events(query, **extra):
+        response = client.get(f'/api/movie_logs/feed?{query}', headers={**headers, **extra})
+        assert response.status_code == 200 and response.mimetype == 'text/event-stream'
+        assert response.is_streamed
+        body = response.get_data(as_text=True)
+        assert ': keep-alive' in body
+        return [dict(line.split(': ', 1) for line in chunk.splitlines())
+                for chunk in body.split('\n\n') if chunk.startswith('id: ')]
+
+    logs = events('stream=sse&since_id=0')
+    assert [event['event'] for event in logs] == ['log'] * 3
+    assert [json.loads(event['data'])['id'] for event in logs] == [int(event['id']) for event in logs]
+    resumed = events('since_id=0', Accept='text/event-stream', **{'Last-Event-ID': logs[0]['id']})
+    assert [event['id'] for event in resumed] == [event['id'] for event in logs[1:]]
+    assert client.get('/api/movie_logs/feed?stream=websocket', headers=headers).status_code == 400
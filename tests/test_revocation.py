@@ -0,0 +1,119 @@
+from app.models import BlacklistToken, User
+from app.revocation import (RevocationCache, SQLiteRevocationBackend, get_revocation_cache, preload,
+                            token_expiry, token_fingerprint)
+
+def test_revoked_entry_expires(clock):
+    """
+    Test that a revoked fingerprint is dropped once its token has expired.
+
+    Args:
+        clock: A clock that only moves when told to.
+
+    Returns:
+        None
+    """
+    clock.now = 1000.0
+    cache = RevocationCache(clock=clock)
+    cache.revoke('abc', expires_at=1010.0)
+    assert cache.is_revoked('abc') is True
+    assert cache.is_revoked('other') is False
+
+    clock.now = 1011.0
+    assert cache.is_revoked('abc') is False
+    assert len(cache) == 0
+
+def test_already_expired_token_is_not_cached(clock):
+    """
+    Test that revoking an expired token does not grow the cache.
+
+    Args:
+        clock: A clock that only moves when told to.
+
+    Returns:
+        None
+    """
+    clock.now = 1000.0
+    cache = RevocationCache(clock=clock)
+    cache.revoke('abc', expires_at=999.0)
+    assert len(cache) == 0
+
+def test_sqlite_backend_shares_revocations(tmp_path):
+    """
+    Test that two caches sharing a SQLite backend see each other's revocations.
+
+    Parameters:
+        tmp_path: The pytest temporary directory.
+
+    Returns:
+        None
+    """
+    path = str(tmp_path / 'revocations.db')
+    worker_a = RevocationCache(SQLiteRevocationBackend(path), sync_interval=0)
+    worker_b = RevocationCache(SQLiteRevocationBackend(path), sync_interval=0)
+    expires_at = token_expiry('not-a-jwt', default_ttl=60)
+
+    worker_a.revoke('abc', expires_at)
+    assert worker_b.is_revoked('abc') is True
+    assert worker_b.is_revoked('other') is False
+
+def test_blacklist_insert_updates_cache(app, db_session):
+    """
+    Test that inserting a BlacklistToken row revokes the token in memory.
+
+    Parameters:
+        app: The Flask app object.
+        db_session: The database session object.
+
+    Returns:
+        None
+    """
+    with app.app_context():
+        user = User(name='Test User', email='test@example.com', password='password')
+        db_session.add(user)
+        db_session.commit()
+        auth_token = user.encode_auth_token(60)
+
+        assert BlacklistToken.check_blacklist(auth_token) is False
+        db_session.add(BlacklistToken(token=auth_token))
+        db_session.commit()
+        assert get_revocation_cache().is_revoked(token_fingerprint(auth_token)) is True
+        assert User.decode_auth_token(auth_token) == 'Token blacklisted. Please log in again.'
+
+def test_rolled_back_blacklist_insert_is_not_revoked(app):
+    """
+    Test that a blacklisted token only reaches the cache once its row is committed.
+
+    Parameters:
+        app: The Flask app object.
+
+    Returns:
+        None
+    """
+    from app.database import get_db
+
+    db_session = get_db()
+    db_session.add(BlacklistToken(token='rolled_back_token'))
+    db_session.flush()
+    assert get_revocation_cache().is_revoked(token_fingerprint('rolled_back_token')) is False
+    db_session.rollback()
+    db_session.commit()
+    assert get_revocation_cache().is_revoked(token_fingerprint('rolled_back_token')) is False
+
+def test_preload_from_blacklist_table(app, db_session):
+    """
+    Test that the cache can be rebuilt from the blacklist_tokens table.
+
+    Parameters:
+        app: The Flask app object.
+        db_session: The database session object.
+
+    Returns:
+        None
+    """
+    with app.app_context():
+        db_session.add(BlacklistToken(token='test_token'))
+        db_session.commit()
+
+        app.extensions['revocation_cache'] = RevocationCache()
+        assert preload(app, db_session) == 1
+        assert get_revocation_cache().is_revoked(token_fingerprint('test_token')) is True
@@ -0,0 +1,77 @@
+from app import create_app
+from app.database import get_db
+from app.models import Movie
+from app.search import match_expression, fts_enabled
+
+def search_names(client, token, query):
+    """
+    Returns the names of the movies found by a search, in response order.
+    """
+    headers = {'Authorization': f'Bearer {token}'}
+    response = client.get(f'/api/get_movies?per_page=100&{query}', headers=headers)
+    assert response.status_code == 200
+    return [movie['name'] for movie in response.get_json()['movies']]
+
+def test_match_expression():
+    """
+    Test that free text becomes quoted prefix terms and FTS operators are inert.
+    """
+    assert match_expression('dark kni') == '"dark"* "kni"*'
+    assert match_expression('star AND "wars" OR -x') == '"star"* "AND"* "wars"* "OR"* "x"*'
+    assert match_expression(' :: ') is None
+
+def test_prefix_search_and_ranking(app, client, user_token):
+    """
+    Test that every word must prefix-match and that relevance puts the best match first.
+
+    Parameters:
+    - app: The Flask app object.
+    - client: The test client.
+    - user_token: The token of a regular user.
+    """
+    with app.app_context():
+        assert fts_enabled()
+    assert set(search_names(client, user_token, 'search=star%20wa')) == {
+        'Star Wars', 'Star Wars : Episode V - The Empire Strikes Back',
+        'Star Wars : Episode VI - Return of the Jedi', 'Star Wars : Episode I - The Phantom Menace'}
+    assert set(search_names(client, user_token, 'search=geo%20luc')) == {
+        'Star Wars', 'THX 1138', 'Star Wars : Episode I - The Phantom Menace'}
+    assert search_names(client, user_token, 'search=star%20wars&sort=relevance')[0] == 'Star Wars'
+
+def test_index_follows_movie_writes(app, client, admin_token):
+    """
+    Test that the index is kept in sync when movies are added, renamed and deleted.
+
+    Parameters:
+    - app: The Flask app object.
+    - client: The test client.
+    - admin_token: The token of an admin user.
+    """
+    headers = {'Authorization': f'Bearer {admin_token}'}
+    movie_data = {'name': 'Quixotic Voyage', 'director': 'Director Name', 'popularity': 50.0,
+                  'imdb_score': 5.0, 'genre': ['Drama']}
+    assert client.post('/api/movies', json=movie_data, headers=headers).status_code == 201
+    assert search_names(client, admin_token, 'search=quixo') == ['Quixotic Voyage']
+
+    movie_id = get_db().query(Movie).filter_by(name='Quixotic Voyage').one().id
+    client.put(f'/api/movies/{movie_id}', json={'name': 'Zephyr Voyage'}, headers=headers)
+    assert search_names(client, admin_token, 'search=quixo') == []
+    assert search_names(client, admin_token, 'search=zephyr') == ['Zephyr Voyage']
+
+    client.delete(f'/api/movies/{movie_id}', headers=headers)
+    assert search_names(client, admin_token, 'search=zephyr') == []
+
+def test_like_fallback(app):
+    """
+    Test that searches fall back to substring matching when FTS is disabled.
+
+    Parameters:
+    - app: The Flask app object, whose database the fallback app shares.
+    """
+    fallback = create_app(test_config='testing')
+    fallback.config['SEARCH_FTS_ENABLED'] = False
+    from app import search
+    with fallback.app_context():
+        assert not search.init_app(fallback)
+        query = search.apply_search(Movie.query, 'ar Wa')
+        assert 'Star Wars' in [movie.name for movie in query.all()]
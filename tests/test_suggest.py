@@ -0,0 +1,210 @@
+from app.suggest import SuggestIndex, index_keys
+
+def make_index():
+    """
+    Returns an index over a few movies.
+    """
+    index = SuggestIndex()
+    index.build([
+        (1, 'Star Wars', 'George Lucas', 88.0),
+        (2, 'Star Trek', 'Marc Daniels', 80.0),
+        (3, 'THX 1138', 'George Lucas', 40.0),
+        (4, 'Stardust', 'Matthew Vaughn', 60.0),
+    ])
+    return index
+
+def test_index_keys():
+    """
+    Test that every word start of a name is a key.
+    """
+    assert index_keys('George Lucas') == ['george lucas', 'lucas']
+    assert index_keys('') == []
+
+def test_suggest_orders_by_popularity():
+    """
+    Test that prefix matches on names and directors come back most popular first.
+    """
+    index = make_index()
+    assert [s['id'] for s in index.suggest('star')] == [1, 2, 4]
+    assert [s['id'] for s in index.suggest('STAR ', limit=2)] == [1, 2]
+    assert [s['id'] for s in index.suggest('star w')] == [1]
+    assert [(s['id'], s['field']) for s in index.suggest('luc')] == [(1, 'director'), (3, 'director')]
+    assert [s['id'] for s in index.suggest('wars')] == [1]
+    assert index.suggest('') == []
+    assert index.suggest('zzz') == []
+
+def test_incremental_updates():
+    """
+    Test that adding, replacing and removing movies updates the index and its memoised results.
+    """
+    index = make_index()
+    assert [s['id'] for s in index.suggest('st')] == [1, 2, 4]
+    index.add(5, 'Stalker', 'Andrei Tarkovsky', 95.0)
+    assert [s['id'] for s in index.suggest('st')] == [5, 1, 2, 4]
+    index.add(5, 'The Mirror', 'Andrei Tarkovsky', 95.0)
+    assert [s['id'] for s in index.suggest('st')] == [1, 2, 4]
+    assert [s['id'] for s in index.suggest('mir')] == [5]
+    index.remove(1)
+    index.remove(42)
+    assert [s['id'] for s in index.suggest('st')] == [2, 4]
+    assert index.stats()['movies'] == 4
+
+def test_suggest_endpoint_follows_admin_writes(client, admin_token, user_token):
+    """
+    Test that the endpoint serves the loaded catalogue and follows movie writes.
+
+    Args:
+        client: The test client.
+        admin_token: The token of an admin user.
+        user_token: The token of a regular user.
+    """
+    user_headers = {'Authorization': f'Bearer {user_token}'}
+    admin_headers = {'Authorization': f'Bearer {admin_token}'}
+    response = client.get('/api/suggest?q=star%20wa&limit=2', headers=user_headers)
+    assert response.status_code == 200
+    suggestions = response.get_json()['suggestions']
+    assert len(suggestions) == 2 and all(s['name'].startswith('Star Wars') for s in suggestions)
+
+    movie_data = {'name': 'Quasar Drift', 'director': 'Director Name', 'popularity': 50.0,
+                  'imdb_score': 5.0, 'genre': ['Drama']}
+    client.post('/api/movies', json=movie_data, headers=admin_headers)
+    suggestions = client.get('/api/suggest?q=quasar', headers=user_headers).get_json()['suggestions']
+    assert [s['name'] for s in suggestions] == ['Quasar Drift']
+
+    client.delete(f"/api/movies/{suggestions[0]['id']}", headers=admin_headers)
+    assert client.get('/api/suggest?q=quasar', headers=user_headers).get_json()['suggestions'] == []
+
+def test_suggest_index_waits_for_commit(app, client, user_token):
+    """
+    Test that movie writes reach the index on commit and never after a rollback.
+
+    Args:
+        app: The Flask app object.
+        client: The test client.
+        user_token: The token of a regular user.
+    """
+    from app.catalogue import bump_catalogue_version
+    from app.database import get_db
+    from app.models import Movie
+    from app.suggest import get_suggest_index
+
+    headers = {'Authorization': f'Bearer {user_token}'}
+    index = get_suggest_index()
+    db_session = get_db()
+    db_session.add(Movie(name='Zephyrine Nebula', director='Director Name', popularity=1.0, imdb_score=1.0))
+    bump_catalogue_version(db_session)
+    db_session.flush()
+    assert index.suggest('zephyrine') == []
+    db_session.rollback()
+    assert client.get('/api/suggest?q=zephyrine', headers=headers).get_json()['suggestions'] == []
+
+    version = index.version
+    db_session.add(Movie(name='Zephyrine Nebula', director='Director Name', popularity=1.0, imdb_score=1.0))
+    bump_catalogue_version(db_session)
+    db_session.commit()
+    assert [s['name'] for s in index.suggest('zephyrine')] == ['Zephyrine Nebula']
+    assert index.version == version + 1  # Its own write does not force a rebuild
+
+def test_suggest_index_follows_other_workers(app, client, user_token):
+    """
+    Test that a worker rebuilds its index once another worker has changed the catalogue.
+
+    Args:
+        app: The Flask app object.
+        client: The test client.
+        user_token: The token of a regular user.
+    """
+    from app import create_app
+    from app.catalogue import bump_catalogue_version
+    from app.database import get_db
+    from app.models import Movie
+
+    headers = {'Authorization': f'Bearer {user_token}'}
+    assert client.get('/api/suggest?q=orbit', headers=headers).get_json()['suggestions'] == []
+    other_worker = create_app('testing')
+    with other_worker.app_context():
+        db_session = get_db()
+        db_session.add(Movie(name='Orbit Runner', director='Director Name', popularity=1.0, imdb_score=1.0))
+        bump_catalogue_version(db_session)
+        db_session.commit()
+
+    app.extensions['catalogue'].invalidate()  # As if the sync interval had passed
+    suggestions = client.get('/api/suggest?q=orbit', headers=headers).get_json()['suggestions']
+    assert [s['name'] for s in suggestions] == ['Orbit Runner']
+
+def test_merge_moves_index_to_version():
+    """
+    Test that merged changes are applied and the index takes the version they were read at.
+    """
+    index = make_index()
+    index.merge({2: None, 5: ('Stalker', 'Andrei Tarkovsky', 95.0)}, 7, None)
+    assert [s['id'] for s in index.suggest('st')] == [5, 1, 4]
+    assert index.version == 7
+
+def test_suggest_index_catches_up_incrementally(app, client, user_token, monkeypatch):
+    """
+    Test that changes from another worker are read without rebuilding the index.
+
+    Args:
+        app: The Flask app object.
+        client: The test client.
+        user_token: The token of a regular user.
+        monkeypatch: The pytest monkeypatch fixture.
+    """
+    from app import create_app, suggest
+    from app.catalogue import bump_catalogue_version
+    from app.database import get_db
+    from app.models import Movie
+
+    headers = {'Authorization': f'Bearer {user_token}'}
+    other_worker = create_app('testing')
+    with other_worker.app_context():
+        db_session = get_db()
+        db_session.add(Movie(name='Nadir Falls', director='Director Name', popularity=1.0, imdb_score=1.0))
+        bump_catalogue_version(db_session)
+        db_session.commit()
+    app.extensions['catalogue'].invalidate()
+    assert [s['name'] for s in client.get('/api/suggest?q=nadir', headers=headers).get_json()['suggestions']] \
+        == ['Nadir Falls']
+
+    def no_rebuild(app, db_session):
+        raise AssertionError('The index was rebuilt')
+
+    monkeypatch.setattr(suggest, 'rebuild', no_rebuild)
+    with other_worker.app_context():
+        db_session = get_db()
+        movie = db_session.query(Movie).filter_by(name='Nadir Falls').one()
+        movie.name = 'Zenith Falls'
+        bump_catalogue_version(db_session)
+        db_session.commit()
+    app.extensions['catalogue'].invalidate()
+    assert client.get('/api/suggest?q=nadir', headers=headers).get_json()['suggestions'] == []
+    assert [s['name'] for s in client.get('/api/suggest?q=zenith', headers=headers).get_json()['suggestions']] \
+        == ['Zenith Falls']
+
+    with other_worker.app_context():
+        db_session = get_db()
+        db_session.delete(db_session.query(Movie).filter_by(name='Zenith Falls').one())
+        bump_catalogue_version(db_session)
+        db_session.commit()
+    app.extensions['catalogue'].invalidate()
+    assert client.get('/api/suggest?q=zenith', headers=headers).get_json()['suggestions'] == []
+
+def test_suggest_index_catches_up_once(app):
+    """
+    Test that a request arriving while another thread catches up is answered from the index as it is.
+
+    Args:
+        app: The Flask app object.
+    """
+    from app.database import get_db
+    from app.suggest import get_suggest_index, sync
+
+    index = get_suggest_index()
+    index.version = -1  # As if another worker had changed the catalogue
+    app.extensions['catalogue'].invalidate()
+    with index._sync_lock:
+        assert sync(app, get_db()) is False
+        assert index.version == -1
+    assert sync(app, get_db()) is True
+    assert index.version == app.extensions['catalogue'].version
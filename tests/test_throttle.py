@@ -0,0 +1,122 @@
+from app.models import User
+from app.throttle import SQLiteSlidingWindowLimiter, SlidingWindowLimiter
+
+def test_sliding_window_limiter(clock):
+    """
+    Test that a key is rejected once over its limit and allowed again as the window slides.
+
+    Args:
+        clock: A clock that only moves when told to.
+
+    Returns:
+        None
+    """
+    limiter = SlidingWindowLimiter(limit=2, window=10, clock=clock)
+    assert limiter.hit('a') == 0
+    clock.now = 5
+    assert limiter.hit('a') == 0
+    assert limiter.hit('a') == 5  # The first attempt leaves the window at t=10
+    assert limiter.hit('b') == 0
+
+    clock.now = 10
+    assert limiter.hit('a') == 0
+    stats = limiter.stats()
+    assert stats['allowed'] == 4
+    assert stats['rejected'] == 1
+
+def test_sqlite_limiter_is_shared(tmp_path):
+    """
+    Test that limiters backed by the same SQLite file share their counters.
+
+    Parameters:
+        tmp_path: The pytest temporary directory.
+
+    Returns:
+        None
+    """
+    path = str(tmp_path / 'throttle.db')
+    worker_a = SQLiteSlidingWindowLimiter(path, limit=2, window=60)
+    worker_b = SQLiteSlidingWindowLimiter(path, limit=2, window=60)
+    assert worker_a.hit('a') == 0
+    assert worker_b.hit('a') == 0
+    assert worker_a.hit('a') > 0
+    assert worker_b.hit('b') == 0
+
+def test_login_is_throttled(app, client, db_session, mocker):
+    """
+    Test that login attempts over the per-email limit are rejected without checking the password.
+
+    Parameters:
+        app: The Flask app object.
+        client: The test client object.
+        db_session: The database session object.
+        mocker: The mocker object.
+
+    Returns:
+        None
+    """
+    db_session.add(User(name='Test User', email='test@example.com', password='password'))
+    db_session.commit()
+    check_password = mocker.spy(User, 'check_password')
+    data = {'email': 'test@example.com', 'password': 'wrong'}
+    for _ in range(app.config['LOGIN_THROTTLE_EMAIL_LIMIT']):
+        assert client.post('/auth/login', json=data).status_code == 400
+
+    response = client.post('/auth/login', json=data)
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) > 0
+    assert check_password.call_count == app.config['LOGIN_THROTTLE_EMAIL_LIMIT']
+
+def test_successful_logins_do_not_lock_the_email(app, client, db_session):
+    """
+    Test that only failed logins count against the per-email limit.
+
+    Parameters:
+        app: The Flask app object.
+        client: The test client object.
+        db_session: The database session object.
+
+    Returns:
+        None
+    """
+    db_session.add(User(name='Test User', email='test@example.com', password='password'))
+    db_session.commit()
+    data = {'email': 'test@example.com', 'password': 'password'}
+    for _ in range(app.config['LOGIN_THROTTLE_EMAIL_LIMIT'] + 2):
+        assert client.post('/auth/login', json=data).status_code == 200
+
+    wrong = {'email': 'test@example.com', 'password': 'wrong'}
+    for _ in range(app.config['LOGIN_THROTTLE_EMAIL_LIMIT']):
+        assert client.post('/auth/login', json=wrong).status_code == 400
+    assert client.post('/auth/login', json=data).status_code == 429
+
+def test_trusted_proxies_throttle_each_client(monkeypatch):
+    """
+    Test that behind trusted proxies the per-IP limit applies to the forwarded client address.
+
+    Parameters:
+        monkeypatch: The pytest monkeypatch fixture.
+
+    Returns:
+        None
+    """
+    from config import TestingConfig
+    from app import create_app
+    from app.database import drop_db, init_db
+
+    monkeypatch.setattr(TestingConfig, 'TRUSTED_PROXIES', 1)
+    monkeypatch.setattr(TestingConfig, 'LOGIN_THROTTLE_IP_LIMIT', 2)
+    app = create_app('testing')
+    with app.app_context():
+        init_db()
+        try:
+            client = app.test_client()
+
+            def login(ip, i):
+                return client.post('/auth/login', json={'email': f'nobody{i}@example.com', 'password': 'x'},
+                                   headers={'X-Forwarded-For': ip}).status_code
+
+            assert [login('203.0.113.1', i) for i in range(3)] == [404, 404, 429]
+            assert login('203.0.113.2', 3) == 404
+        finally:
+            drop_db()